@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI 批量分析模块
+把高互动标题按类型分成多个批次，在并发数与速率限制下异步发送 ChatCompletion 请求
+(失败自动重试)，再把各批次的 JSON 结果合并；每个批次同样经过 AI 响应缓存
+"""
+
+import json
+import time
+import asyncio
+
+from ai_cache import request_key
+
+
+DEFAULT_BATCH_SIZE = 30
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE_LIMIT = 60  # 每分钟最多发起的请求数
+DEFAULT_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 1.0
+
+
+def make_batches(titles, labels, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    按类型把标题分批：同一类型的标题 (保持原顺序) 每 batch_size 个一批
+
+    Returns:
+        [(类型, 标题列表)]，类型按首次出现的顺序排列
+    """
+    clusters = {}
+    for title, label in zip(titles, labels):
+        clusters.setdefault(label, []).append(title)
+
+    batches = []
+    for label, cluster_titles in clusters.items():
+        for start in range(0, len(cluster_titles), batch_size):
+            batches.append((label, cluster_titles[start:start + batch_size]))
+    return batches
+
+
+class RateLimiter:
+    """按固定间隔放行请求，保证每分钟发起的请求数不超过 rate_per_minute"""
+
+    def __init__(self, rate_per_minute=DEFAULT_RATE_LIMIT):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute and rate_per_minute > 0 else 0.0
+        self.next_time = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def defer(self, seconds):
+        """服务端要求等待时 (如 HTTP 429)，把之后所有请求推迟 seconds 秒"""
+        self.next_time = max(self.next_time, time.monotonic() + seconds)
+
+
+async def _request(client, model, messages, params, semaphore, limiter, retries):
+    """发送一个请求，失败时按指数退避重试"""
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                await limiter.wait()
+                response = await client.ChatCompletion.acreate(model=model, messages=messages, **params)
+            return response.choices[0].message.content
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+            print(f"⚠️  AI 请求失败 ({e})，{delay:.0f} 秒后重试 ({attempt + 1}/{retries})")
+            await asyncio.sleep(delay)
+
+
+async def run_chat_completions(client, model, message_batches, cache=None, titles_batches=None,
+                               concurrency=DEFAULT_CONCURRENCY, rate_limit=DEFAULT_RATE_LIMIT,
+                               retries=DEFAULT_RETRIES, **params):
+    """
+    并发执行多组消息的 ChatCompletion 请求
+
+    Returns:
+        与 message_batches 等长的 [(回复文本或异常, 来源)]，来源为 'cache'、'inflight'、'api' 或 'error'
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    limiter = RateLimiter(rate_limit)
+    inflight = {}
+    titles_batches = titles_batches or [None] * len(message_batches)
+
+    async def run_one(messages, titles):
+        key = request_key(model, messages, **params)
+        if cache is not None:
+            content = cache.get(key)
+            if content is not None:
+                return content, 'cache'
+
+        # 内容完全相同的批次只请求一次
+        if key in inflight:
+            return await inflight[key], 'inflight'
+        task = asyncio.ensure_future(
+            _request(client, model, messages, params, semaphore, limiter, retries)
+        )
+        inflight[key] = task
+        content = await task
+        if cache is not None:
+            cache.put(key, content, model, titles)
+        return content, 'api'
+
+    async def guarded(messages, titles):
+        try:
+            return await run_one(messages, titles)
+        except Exception as e:
+            return e, 'error'
+
+    return await asyncio.gather(*[
+        guarded(messages, titles) for messages, titles in zip(message_batches, titles_batches)
+    ])
+
+
+def batched_chat_completions(client, model, message_batches, **kwargs):
+    """run_chat_completions 的同步入口"""
+    return asyncio.run(run_chat_completions(client, model, message_batches, **kwargs))
+
+
+def _merge_value(merged, key, value):
+    if isinstance(value, list):
+        items = merged.setdefault(key, [])
+        seen = {json.dumps(item, ensure_ascii=False, sort_keys=True) for item in items}
+        for item in value:
+            marker = json.dumps(item, ensure_ascii=False, sort_keys=True)
+            if marker not in seen:
+                seen.add(marker)
+                items.append(item)
+    elif isinstance(value, dict):
+        target = merged.setdefault(key, {})
+        if isinstance(target, dict):
+            for sub_key, sub_value in value.items():
+                _merge_value(target, sub_key, sub_value)
+    elif isinstance(value, str):
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = value
+        elif isinstance(existing, str) and value not in existing.split('\n'):
+            merged[key] = f"{existing}\n{value}"
+    elif key not in merged:
+        merged[key] = value
+
+
+def merge_analyses(batch_results):
+    """
+    合并各批次的 JSON 分析结果
+    列表字段拼接并去重，对象字段逐键合并，文本字段按行拼接；
+    各批次的原始结果保存在 batches 字段中
+
+    Args:
+        batch_results: [(类型, 标题数, 分析结果 dict)]
+    """
+    merged = {}
+    batches = []
+    for label, title_count, analysis in batch_results:
+        batches.append({'cluster': label, 'titles': title_count, 'analysis': analysis})
+        for key, value in analysis.items():
+            _merge_value(merged, key, value)
+    merged['batches'] = batches
+    return merged
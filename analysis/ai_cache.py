@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI 响应缓存模块
+以 (模型 + 消息 + 参数) 的哈希为键把 ChatCompletion 的回复缓存到磁盘，支持过期时间、
+按总大小淘汰最久未使用的条目，以及同一请求并发时只发送一次；
+标题集合与缓存中某次请求足够相似时也可直接复用。FakeChatClient 用于离线运行与测试
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+
+
+DEFAULT_CACHE_DIR = os.path.join('output', '.cache', 'ai')
+DEFAULT_TTL_HOURS = 24 * 7
+DEFAULT_MAX_CACHE_MB = 50
+
+# 标题集合 Jaccard 相似度不低于该值时复用缓存 (1 表示只复用完全相同的请求)
+DEFAULT_SIMILARITY = 0.8
+
+
+def request_key(model, messages, **params):
+    """请求的内容哈希 (消息与参数按规范化 JSON 计算)"""
+    payload = json.dumps(
+        {'model': model, 'messages': messages, 'params': params},
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def title_similarity(a, b):
+    """两个标题集合的 Jaccard 相似度"""
+    a, b = set(a), set(b)
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class ResponseCache:
+    """
+    磁盘上的 AI 响应缓存
+    每个条目是 cache_dir 下的一个 <key>.json，命中时更新修改时间用于 LRU 淘汰
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl_hours=DEFAULT_TTL_HOURS,
+                 max_mb=DEFAULT_MAX_CACHE_MB):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def _entries(self):
+        """缓存目录中的 (路径, 修改时间, 大小) 列表"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _load(self, path):
+        """读取一个条目，损坏或已过期时删除并返回 None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._remove(path)
+            return None
+
+        if time.time() - entry.get('created_at', 0) > self.ttl_seconds:
+            self._remove(path)
+            return None
+        return entry
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def get(self, key):
+        """按请求哈希取缓存的回复，未命中返回 None"""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        entry = self._load(path)
+        if entry is None:
+            return None
+        os.utime(path)
+        return entry['content']
+
+    def find_similar(self, model, titles, threshold):
+        """查找同一模型下标题集合相似度不低于 threshold 的最新条目，返回 (回复, 相似度)"""
+        best = None
+        for path, mtime, _ in self._entries():
+            entry = self._load(path)
+            if entry is None or entry.get('model') != model or 'titles' not in entry:
+                continue
+            similarity = title_similarity(titles, entry['titles'])
+            if similarity >= threshold:
+                candidate = (similarity, entry['created_at'], path, entry['content'])
+                if best is None or candidate[:2] > best[:2]:
+                    best = candidate
+        if best is None:
+            return None, 0.0
+        os.utime(best[2])
+        return best[3], best[0]
+
+    def put(self, key, content, model=None, titles=None):
+        """写入一个条目 (先写临时文件再替换，避免并发读到半个文件)，然后按大小淘汰"""
+        entry = {
+            'key': key,
+            'model': model,
+            'created_at': time.time(),
+            'content': content
+        }
+        if titles is not None:
+            entry['titles'] = list(titles)
+
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """删除过期条目，并在总大小超过上限时按最久未使用的顺序删除"""
+        now = time.time()
+        entries = []
+        for path, mtime, size in self._entries():
+            if now - mtime > self.ttl_seconds:
+                self._remove(path)
+            else:
+                entries.append((mtime, path, size))
+
+        total = sum(size for _, _, size in entries)
+        for _, path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def get_or_compute(self, key, compute, model=None, titles=None):
+        """
+        取缓存，未命中时调用 compute() 并写入缓存
+        同一 key 的并发调用只执行一次 compute，其余调用等待其结果
+
+        Returns:
+            (回复, 来源)，来源为 'cache'、'inflight' 或 'api'
+        """
+        content = self.get(key)
+        if content is not None:
+            return content, 'cache'
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not owner:
+            return future.result(), 'inflight'
+
+        try:
+            content = compute()
+            self.put(key, content, model, titles)
+            future.set_result(content)
+            return content, 'api'
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+def cached_chat_completion(client, cache, model, messages, titles=None,
+                           similarity=DEFAULT_SIMILARITY, **params):
+    """
+    带缓存的 ChatCompletion 请求，返回 (回复文本, 来源)
+    cache 为 None 时直接请求；titles 用于相似请求复用，来源此时为 'similar'
+    """
+    def compute():
+        response = client.ChatCompletion.create(model=model, messages=messages, **params)
+        return response.choices[0].message.content
+
+    if cache is None:
+        return compute(), 'api'
+
+    key = request_key(model, messages, **params)
+    content = cache.get(key)
+    if content is not None:
+        return content, 'cache'
+
+    if titles is not None and similarity < 1:
+        content, _ = cache.find_similar(model, titles, similarity)
+        if content is not None:
+            return content, 'similar'
+
+    return cache.get_or_compute(key, compute, model, titles)
+
+
+class _Namespace:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeChatClient:
+    """
+    离线的 ChatCompletion 客户端，接口与 openai 模块一致
+    (client.ChatCompletion.create / acreate)，根据提示词返回确定的 JSON 回复并记录调用次数，
+    用于测试缓存与离线演示；failures 为开头若干次调用抛出的异常次数，用于测试重试
+    """
+
+    def __init__(self, latency=0.0, failures=0):
+        self.latency = latency
+        self.failures = failures
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.ChatCompletion = _Namespace(create=self._create, acreate=self._acreate)
+
+    def _count_call(self):
+        with self._lock:
+            self.calls += 1
+            if self.calls <= self.failures:
+                raise RuntimeError('模拟的 API 错误')
+
+    @staticmethod
+    def _response(model, messages):
+        prompt = messages[-1]['content']
+        digest = hashlib.sha1(f'{model}\n{prompt}'.encode('utf-8')).hexdigest()[:8]
+        content = json.dumps({
+            'raw_analysis': f'离线模拟分析 ({model}, 提示词 {digest}, {len(prompt)} 字)'
+        }, ensure_ascii=False)
+        message = _Namespace(role='assistant', content=content)
+        return _Namespace(choices=[_Namespace(message=message, finish_reason='stop')])
+
+    def _create(self, model, messages, **params):
+        self._count_call()
+        if self.latency:
+            time.sleep(self.latency)
+        return self._response(model, messages)
+
+    async def _acreate(self, model, messages, **params):
+        self._count_call()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._response(model, messages)
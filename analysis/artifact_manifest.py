@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+产物清单模块
+各分析模块把生成的文件按 (运行 ID, 模块, 产物类型) 登记到输出目录下的 SQLite 清单中，
+下游 (Notion 导出、Telegram 推送等) 通过清单按类型直接取最新产物，
+不再扫描不断增长的输出目录，并且可以只取同一次运行的产物
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+
+
+MANIFEST_FILENAME = 'manifest.db'
+
+# 同一次流水线运行的各模块共享的运行 ID (由 run_analysis_simple 等设置给子进程)
+RUN_ID_ENV = 'XHS_RUN_ID'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    run_id TEXT NOT NULL,
+    module TEXT NOT NULL,
+    artifact_type TEXT NOT NULL,
+    path TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (run_id, artifact_type, path)
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_type ON artifacts (artifact_type, created_at);
+CREATE TABLE IF NOT EXISTS latest (
+    artifact_type TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    module TEXT NOT NULL,
+    path TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+"""
+
+
+def new_run_id():
+    """生成运行 ID (时间戳 + 进程号)"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+
+
+def current_run_id():
+    """当前运行 ID：优先使用环境变量，否则生成一个并写入环境变量 (子进程继承)"""
+    run_id = os.environ.get(RUN_ID_ENV)
+    if not run_id:
+        run_id = new_run_id()
+        os.environ[RUN_ID_ENV] = run_id
+    return run_id
+
+
+class ArtifactManifest:
+    """输出目录的产物清单，路径以相对输出目录的形式保存"""
+
+    def __init__(self, output_dir='output'):
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.conn = sqlite3.connect(os.path.join(output_dir, MANIFEST_FILENAME), timeout=30)
+        self.conn.executescript(SCHEMA)
+
+    @classmethod
+    def open_existing(cls, output_dir='output'):
+        """清单已存在时打开，否则返回 None (兼容清单引入之前的输出目录)"""
+        if not os.path.exists(os.path.join(output_dir, MANIFEST_FILENAME)):
+            return None
+        return cls(output_dir)
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _relative(self, path):
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.output_dir))
+
+    def _absolute(self, path):
+        return os.path.join(self.output_dir, path)
+
+    def register(self, module, artifact_type, path, run_id=None):
+        """登记一个产物，并更新该类型的最新产物"""
+        run_id = run_id or current_run_id()
+        created_at = datetime.now().isoformat(timespec='microseconds')
+        record = (run_id, module, artifact_type, self._relative(path), created_at)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, started_at) VALUES (?, ?)", (run_id, created_at)
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO artifacts (run_id, module, artifact_type, path, created_at) "
+                "VALUES (?, ?, ?, ?, ?)", record
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO latest (run_id, module, artifact_type, path, created_at) "
+                "VALUES (?, ?, ?, ?, ?)", record
+            )
+        return path
+
+    def latest(self, artifact_type):
+        """某类型的最新产物路径 (按主键直接查找)；文件已被删除时退回到仍存在的最近一个"""
+        row = self.conn.execute(
+            "SELECT path FROM latest WHERE artifact_type = ?", (artifact_type,)
+        ).fetchone()
+        if row and os.path.exists(self._absolute(row[0])):
+            return self._absolute(row[0])
+
+        for (path,) in self.conn.execute(
+            "SELECT path FROM artifacts WHERE artifact_type = ? ORDER BY created_at DESC",
+            (artifact_type,)
+        ):
+            if os.path.exists(self._absolute(path)):
+                return self._absolute(path)
+        return None
+
+    def latest_run_id(self, artifact_type=None):
+        """最近一次运行的 ID；指定 artifact_type 时为最近生成该类型产物的运行"""
+        if artifact_type:
+            row = self.conn.execute(
+                "SELECT run_id FROM latest WHERE artifact_type = ?", (artifact_type,)
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT run_id FROM runs ORDER BY started_at DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def run_artifacts(self, run_id):
+        """
+        某次运行的全部产物 (文件仍存在的)
+
+        Returns:
+            {产物类型: [路径]}，同类型多个文件时按生成时间从新到旧排列
+        """
+        artifacts = {}
+        for artifact_type, path in self.conn.execute(
+            "SELECT artifact_type, path FROM artifacts WHERE run_id = ? ORDER BY created_at DESC",
+            (run_id,)
+        ):
+            if os.path.exists(self._absolute(path)):
+                artifacts.setdefault(artifact_type, []).append(self._absolute(path))
+        return artifacts
+
+    def entries(self):
+        """
+        清单中的全部产物记录 (包括文件已不存在的)
+
+        Returns:
+            [(运行 ID, 产物类型, 绝对路径, 生成时间)]，按生成时间从新到旧排列
+        """
+        return [
+            (run_id, artifact_type, self._absolute(path), created_at)
+            for run_id, artifact_type, path, created_at in self.conn.execute(
+                "SELECT run_id, artifact_type, path, created_at FROM artifacts ORDER BY created_at DESC"
+            )
+        ]
+
+    def forget(self, paths):
+        """删除指向这些文件的全部记录 (文件被清理或归档后调用)"""
+        relative = [(self._relative(path),) for path in paths]
+        with self.conn:
+            self.conn.executemany("DELETE FROM artifacts WHERE path = ?", relative)
+            self.conn.executemany("DELETE FROM latest WHERE path = ?", relative)
+
+    def forget_runs(self, run_types):
+        """删除 [(运行 ID, 产物类型)] 的记录，并删除已没有任何产物的运行"""
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM artifacts WHERE run_id = ? AND artifact_type = ?", run_types
+            )
+            self.conn.execute(
+                "DELETE FROM runs WHERE run_id NOT IN (SELECT DISTINCT run_id FROM artifacts)"
+            )
+
+    def relocate(self, old_path, new_path):
+        """把指向 old_path 的记录改为指向 new_path (重复文件去重后调用)"""
+        params = (self._relative(new_path), self._relative(old_path))
+        with self.conn:
+            self.conn.execute("UPDATE OR REPLACE artifacts SET path = ? WHERE path = ?", params)
+            self.conn.execute("UPDATE latest SET path = ? WHERE path = ?", params)
+
+    def resolve(self, artifact_types, run_id=None):
+        """
+        按类型取产物：优先取 run_id (默认为最近一次运行) 中的产物，
+        该运行没有的类型再取该类型的最新产物
+
+        Returns:
+            {产物类型: 路径或 None}
+        """
+        run_id = run_id or self.latest_run_id()
+        in_run = self.run_artifacts(run_id) if run_id else {}
+        return {
+            artifact_type: in_run[artifact_type][0] if artifact_type in in_run else self.latest(artifact_type)
+            for artifact_type in artifact_types
+        }
+
+
+def register_artifacts(output_dir, module, artifacts):
+    """
+    登记一批产物 ({产物类型: 路径}，路径为 None 的跳过)
+    清单写入失败只打印警告，不影响分析本身
+    """
+    try:
+        with ArtifactManifest(output_dir) as manifest:
+            for artifact_type, path in artifacts.items():
+                if path:
+                    manifest.register(module, artifact_type, path)
+    except sqlite3.Error as e:
+        print(f"⚠️  产物清单写入失败: {e}")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多账号内容日历排期模块
+一次遍历 账号 × 日期，用优先队列 (heapq) 贪心分配主题方向与关键词标签，满足以下约束：
+  - 同一账号 min_gap 天内不重复同一主题
+  - 周末不安排教程、对比等重内容 (与 optimize_calendar_distribution 的周末规则一致)
+  - 每个关键词在每个账号的日历中至少出现 keyword_quota 次 (总是优先使用次数最少的关键词)
+"""
+
+import heapq
+import numpy as np
+import pandas as pd
+
+from rng import DEFAULT_SEED, SeededRNG
+
+
+# 周末不安排的重内容主题关键词
+WEEKEND_HEAVY_KEYWORDS = ['教程', '对比']
+
+# 周末没有可用的轻松主题时使用的主题
+WEEKEND_FALLBACK_TOPIC = '打卡分享'
+
+DEFAULT_MIN_TOPIC_GAP = 2
+DEFAULT_KEYWORDS_PER_POST = 3
+
+
+def is_heavy_topic(topic):
+    """是否为周末不安排的重内容主题"""
+    return any(keyword in str(topic) for keyword in WEEKEND_HEAVY_KEYWORDS)
+
+
+def _pop_eligible(heap, allowed):
+    """弹出堆中第一个满足 allowed 的条目，跳过的条目放回堆中"""
+    skipped = []
+    chosen = None
+    while heap:
+        entry = heapq.heappop(heap)
+        if allowed(entry):
+            chosen = entry
+            break
+        skipped.append(entry)
+    for entry in skipped:
+        heapq.heappush(heap, entry)
+    return chosen
+
+
+def plan_topics(account_count, weekend, topics, min_gap=DEFAULT_MIN_TOPIC_GAP):
+    """
+    为每个账号排期主题方向
+
+    每个账号维护一个 (使用次数, 上次使用的日期, 轮换顺序, 主题) 的最小堆，
+    每天弹出使用最少、最久未用且满足间隔与周末约束的主题；各账号的轮换顺序错开；
+    临近周末时优先弹出重内容主题，避免周末可用的轻松主题在间隔期内已被用掉
+
+    Args:
+        account_count: 账号数
+        weekend: 长度为天数的布尔数组
+        topics: 主题方向列表 (去重后按优先顺序)
+
+    Returns:
+        (账号数 × 天数 的主题矩阵, 违反间隔约束的次数)
+    """
+    days = len(weekend)
+    topics = list(dict.fromkeys(topics))
+    heavy = [is_heavy_topic(topic) for topic in topics]
+    weekend = np.asarray(weekend, dtype=bool)
+    schedule = np.empty((account_count, days), dtype=object)
+    violations = 0
+
+    heaps = []
+    for account in range(account_count):
+        heap = [
+            (0, -days - 1, (i - account) % len(topics), i)
+            for i in range(len(topics))
+        ]
+        heapq.heapify(heap)
+        heaps.append(heap)
+
+    # 按日期在外层遍历，所有账号的日历在同一次遍历中生成
+    for day in range(days):
+        light_only = bool(weekend[day])
+        # 周末前 min_gap 天优先安排重内容，把轻松主题留给周末
+        prefer_heavy = not light_only and bool(weekend[day + 1:day + min_gap + 1].any())
+
+        for account, heap in enumerate(heaps):
+            def fits(entry, check_gap=True):
+                _, last_day, _, i = entry
+                if light_only and heavy[i]:
+                    return False
+                return not check_gap or day - last_day > min_gap
+
+            entry = None
+            if prefer_heavy:
+                entry = _pop_eligible(heap, lambda e: heavy[e[3]] and fits(e))
+            if entry is None:
+                entry = _pop_eligible(heap, fits)
+            if entry is None:
+                # 间隔约束无法满足时退而选最久未用的主题
+                entry = _pop_eligible(heap, lambda e: fits(e, check_gap=False))
+                if entry is not None:
+                    violations += 1
+
+            if entry is None:
+                schedule[account, day] = WEEKEND_FALLBACK_TOPIC
+                continue
+
+            count, _, order, i = entry
+            schedule[account, day] = topics[i]
+            heapq.heappush(heap, (count + 1, day, order, i))
+
+    return schedule, violations
+
+
+def plan_keywords(account_keys, days, keywords, per_post=DEFAULT_KEYWORDS_PER_POST, seed=DEFAULT_SEED):
+    """
+    为每个账号排期关键词标签
+
+    每个账号维护一个 (使用次数, 随机顺序, 关键词) 的最小堆，每条内容取使用次数最少的 per_post 个，
+    因此各关键词的使用次数最多相差 1，覆盖配额在可行时总能满足
+
+    Returns:
+        账号数 × 天数 的关键词标签矩阵 (用 、 拼接)
+    """
+    keywords = list(dict.fromkeys(keywords))
+    per_post = min(per_post, len(keywords))
+    rng = SeededRNG(seed)
+    schedule = np.empty((len(account_keys), days), dtype=object)
+
+    for a, account in enumerate(account_keys):
+        # 同一次数的关键词按账号专属的随机顺序轮换
+        priority = rng.random([f'{account}\t{keyword}' for keyword in keywords], 'keyword_priority')
+        heap = [(0, priority[i], i) for i in range(len(keywords))]
+        heapq.heapify(heap)
+        for day in range(days):
+            picked = [heapq.heappop(heap) for _ in range(per_post)]
+            schedule[a, day] = "、".join(keywords[i] for _, _, i in sorted(picked, key=lambda e: e[2]))
+            for count, order, i in picked:
+                heapq.heappush(heap, (count + 1, order, i))
+
+    return schedule
+
+
+def schedule_calendars(accounts, dates, topics, keywords, min_gap=DEFAULT_MIN_TOPIC_GAP,
+                       keywords_per_post=DEFAULT_KEYWORDS_PER_POST, keyword_quota=0,
+                       seed=DEFAULT_SEED):
+    """
+    一次生成所有账号的主题方向与关键词排期
+
+    Args:
+        accounts: 账号列表 (单账号时为 [None])
+        dates: 日期 (pd.DatetimeIndex 或可转换的序列)
+        keyword_quota: 每个关键词在每个账号日历中至少出现的次数 (0 表示不要求)
+
+    Returns:
+        (DataFrame[Account?, Date, 主题方向, 关键词标签]，行按 账号 × 日期 排列, 统计信息 dict)
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    weekend = (dates.weekday >= 5)
+    account_keys = ['' if account is None else str(account) for account in accounts]
+
+    topic_schedule, violations = plan_topics(len(accounts), weekend, topics, min_gap)
+
+    stats = {'topic_gap_violations': violations, 'keyword_quota_met': True}
+    if keywords:
+        keyword_schedule = plan_keywords(account_keys, len(dates), keywords, keywords_per_post, seed)
+        unique_keywords = len(dict.fromkeys(keywords))
+        slots = len(dates) * min(keywords_per_post, unique_keywords)
+        stats['min_keyword_uses'] = slots // unique_keywords
+        stats['keyword_quota_met'] = stats['min_keyword_uses'] >= keyword_quota
+    else:
+        keyword_schedule = np.full((len(accounts), len(dates)), None, dtype=object)
+
+    schedule_df = pd.DataFrame({
+        'Date': np.tile(dates.strftime('%Y-%m-%d').to_numpy(dtype=object), len(accounts)),
+        '主题方向': topic_schedule.ravel(),
+        '关键词标签': keyword_schedule.ravel()
+    })
+    if accounts != [None]:
+        schedule_df.insert(0, 'Account', np.repeat(np.asarray(accounts, dtype=object), len(dates)))
+
+    return schedule_df, stats
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图表渲染模块
+各分析模块只准备绘图数据 (直方图计数、分布、散点等)，由本模块在后台进程池中
+使用 Agg 后端渲染；绘图数据与渲染参数的哈希作为缓存键，数据未变化时直接复用已渲染的图片
+"""
+
+import os
+import shutil
+import pickle
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+# 分辨率预设
+DPI_PRESETS = {
+    'draft': 100,
+    'standard': 150,
+    'high': 300
+}
+DEFAULT_DPI_PRESET = 'high'
+
+# 绘图代码变化时递增，使旧缓存失效
+RENDER_VERSION = 1
+
+CHINESE_FONTS = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
+
+
+def histogram(values, bins):
+    """预先计算直方图 (计数, 边界)，渲染时用 weights 还原与原始数据相同的直方图"""
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    return np.histogram(values, bins=bins)
+
+
+def _pyplot():
+    """在渲染进程中加载 Agg 后端的 pyplot 并设置中文字体"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    plt.rcParams['font.sans-serif'] = CHINESE_FONTS
+    plt.rcParams['axes.unicode_minus'] = False
+    return plt
+
+
+def _hist(ax, hist, **kwargs):
+    counts, edges = hist
+    ax.hist(edges[:-1], edges, weights=counts, **kwargs)
+
+
+def render_engagement_overview(payload, output_path, dpi):
+    """互动指标分布图 (竞品分析)"""
+    plt = _pyplot()
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+
+    # 点赞数分布
+    _hist(axes[0, 0], payload['liked_hist'], alpha=0.7, color='skyblue')
+    axes[0, 0].set_title('点赞数分布')
+    axes[0, 0].set_xlabel('点赞数')
+    axes[0, 0].set_ylabel('频次')
+
+    # 收藏数分布
+    _hist(axes[0, 1], payload['collected_hist'], alpha=0.7, color='lightgreen')
+    axes[0, 1].set_title('收藏数分布')
+    axes[0, 1].set_xlabel('收藏数')
+    axes[0, 1].set_ylabel('频次')
+
+    # 互动率分布
+    _hist(axes[1, 0], payload['rate_hist'], alpha=0.7, color='orange')
+    axes[1, 0].set_title('互动率分布')
+    axes[1, 0].set_xlabel('互动率 (%)')
+    axes[1, 0].set_ylabel('频次')
+
+    # 内容类型分布
+    labels, values = payload['content_counts']
+    axes[1, 1].pie(values, labels=labels, autopct='%1.1f%%')
+    axes[1, 1].set_title('内容类型分布')
+
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_time_trends(payload, output_path, dpi):
+    """发布时间趋势图 (竞品分析)"""
+    plt = _pyplot()
+    fig, axes = plt.subplots(2, 1, figsize=(15, 10))
+
+    # 按日期统计发布量
+    dates, daily_counts = payload['daily_posts']
+    axes[0].plot(dates, daily_counts, marker='o')
+    axes[0].set_title('每日发布量趋势')
+    axes[0].set_xlabel('日期')
+    axes[0].set_ylabel('发布数量')
+    axes[0].tick_params(axis='x', rotation=45)
+
+    # 按小时统计发布量
+    hours, hourly_counts = payload['hourly_posts']
+    axes[1].bar(hours, hourly_counts, alpha=0.7)
+    axes[1].set_title('发布时间分布 (按小时)')
+    axes[1].set_xlabel('小时')
+    axes[1].set_ylabel('发布数量')
+
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_koc_overview(payload, output_path, dpi):
+    """KOC 分析图 (KOC 筛选)"""
+    plt = _pyplot()
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+
+    # 1. KOC 评分分布
+    _hist(axes[0, 0], payload['score_hist'], alpha=0.7, color='skyblue', edgecolor='black')
+    axes[0, 0].set_title('KOC 评分分布')
+    axes[0, 0].set_xlabel('KOC 评分')
+    axes[0, 0].set_ylabel('用户数量')
+    axes[0, 0].axvline(payload['score_mean'], color='red', linestyle='--',
+                       label=f"平均分: {payload['score_mean']:.1f}")
+    axes[0, 0].legend()
+
+    # 2. 粉丝数 vs 互动数散点图
+    scatter = axes[0, 1].scatter(payload['followers'], payload['engagement'],
+                                 c=payload['scores'], cmap='viridis', alpha=0.7)
+    axes[0, 1].set_title('粉丝数 vs 平均互动数')
+    axes[0, 1].set_xlabel('估算粉丝数')
+    axes[0, 1].set_ylabel('平均互动数')
+    plt.colorbar(scatter, ax=axes[0, 1], label='KOC评分')
+
+    # 3. 用户类型分布
+    labels, values = payload['user_type_counts']
+    axes[1, 0].pie(values, labels=labels, autopct='%1.1f%%')
+    axes[1, 0].set_title('KOC 用户类型分布')
+
+    # 4. 发布数量 vs KOC 评分
+    post_counts, scores = payload['post_counts'], payload['scores']
+    axes[1, 1].scatter(post_counts, scores, alpha=0.7, color='orange')
+    axes[1, 1].set_title('发布数量 vs KOC 评分')
+    axes[1, 1].set_xlabel('发布数量')
+    axes[1, 1].set_ylabel('KOC 评分')
+
+    # 添加趋势线
+    z = np.polyfit(post_counts, scores, 1)
+    p = np.poly1d(z)
+    axes[1, 1].plot(post_counts, p(post_counts), "r--", alpha=0.8)
+
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_wordcloud(payload, output_path, dpi):
+    """带标题的词云图 (关键词分析)"""
+    from wordcloud import WordCloud
+
+    plt = _pyplot()
+    font_path = payload['font_path']
+
+    wordcloud = WordCloud(
+        width=1200,
+        height=800,
+        background_color='white',
+        font_path=font_path,
+        max_words=payload['max_words'],
+        colormap='viridis',
+        relative_scaling=0.5,
+        random_state=42
+    ).generate_from_frequencies(dict(payload['frequencies']))
+
+    fig = plt.figure(figsize=(15, 10))
+    plt.imshow(wordcloud, interpolation='bilinear')
+    plt.axis('off')
+
+    # 设置标题（如果有中文字体）
+    if font_path:
+        from matplotlib import font_manager
+        font_prop = font_manager.FontProperties(fname=font_path, size=16)
+        plt.title('小红书笔记标题关键词词云图', fontproperties=font_prop, pad=20)
+    else:
+        plt.title('Keywords WordCloud', fontsize=16, pad=20)
+
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+# 图表类型 -> 渲染函数
+RENDERERS = {
+    'engagement_overview': render_engagement_overview,
+    'time_trends': render_time_trends,
+    'koc_overview': render_koc_overview,
+    'wordcloud': render_wordcloud
+}
+
+
+def _render_job(chart, payload, output_path, dpi):
+    """渲染进程中执行的任务"""
+    RENDERERS[chart](payload, output_path, dpi)
+    return output_path
+
+
+def _link_or_copy(source, target):
+    """优先硬链接 (不额外占用磁盘)，失败时复制"""
+    if os.path.exists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+class ChartRenderer:
+    """
+    后台图表渲染服务
+    submit 立即返回，图表在进程池中渲染；close 等待全部完成并写入缓存
+    workers=0 时在当前进程中同步渲染
+    """
+
+    def __init__(self, dpi_preset=DEFAULT_DPI_PRESET, workers=1, cache_dir=None):
+        self.dpi = DPI_PRESETS[dpi_preset]
+        self.cache_dir = cache_dir
+        self.executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        self.pending = []
+        self.reused = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _cache_path(self, chart, payload):
+        if not self.cache_dir:
+            return None
+        digest = hashlib.sha1(
+            pickle.dumps((RENDER_VERSION, chart, payload, self.dpi), protocol=4)
+        ).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f'{chart}_{digest}.png')
+
+    def submit(self, chart, payload, output_path, label='图表'):
+        """提交一个图表，绘图数据与分辨率未变化时直接复用缓存"""
+        cache_path = self._cache_path(chart, payload)
+        if cache_path and os.path.exists(cache_path):
+            _link_or_copy(cache_path, output_path)
+            self.reused += 1
+            print(f"♻️  {label}数据未变化，复用缓存图表: {output_path}")
+            return output_path
+
+        if self.executor:
+            future = self.executor.submit(_render_job, chart, payload, output_path, self.dpi)
+        else:
+            _render_job(chart, payload, output_path, self.dpi)
+            future = None
+        self.pending.append((future, output_path, cache_path, label))
+        return output_path
+
+    def close(self):
+        """等待所有图表渲染完成，返回渲染输出的路径列表"""
+        paths = []
+        for future, output_path, cache_path, label in self.pending:
+            if future is not None:
+                future.result()
+            if cache_path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                _link_or_copy(output_path, cache_path)
+            print(f"📈 {label}已保存到: {output_path}")
+            paths.append(output_path)
+        self.pending = []
+
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
+        return paths
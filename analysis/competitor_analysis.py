@@ -9,50 +9,72 @@ import os
 import sys
 import argparse
 import pandas as pd
-import numpy as np
 from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
 import re
 
+# 以脚本方式运行时也能导入同目录下的共享模块
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from data_loader import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_MEMORY_BUDGET_MB,
+    NOTE_ID_COLUMN, describe_input_files, fill_text_columns, open_notes,
+    resolve_input_files
+)
+from rng import DEFAULT_SEED, SeededRNG
+from text_patterns import KeywordMatcher
+from engagement import add_engagement_metrics
+from topk import top_k_multi
+from chart_renderer import DEFAULT_DPI_PRESET, DPI_PRESETS, ChartRenderer, histogram
+from artifact_manifest import register_artifacts
+
+
+# 内容类型关键词模式
+CONTENT_TYPE_PATTERNS = {
+    '亲身体验': [
+        '我的', '亲测', '体验', '试用', '使用感受', '真实感受',
+        '第一次', '初体验', '尝试', '感受', '心得', '日记'
+    ],
+    '种草推荐': [
+        '推荐', '安利', '种草', '必买', '好用', '值得', '强烈推荐',
+        '不踩雷', '闭眼入', '回购', '爱用', '好物'
+    ],
+    '教程指导': [
+        '教程', '教学', '怎么', '如何', '方法', '步骤', '技巧',
+        '入门', '零基础', '新手', '指南', '攻略'
+    ],
+    '对比测评': [
+        'vs', '对比', '测评', '评测', '区别', '哪个好', '选择',
+        '比较', '测试', '横评', '对决'
+    ],
+    '知识科普': [
+        '科普', '知识', '原理', '为什么', '什么是', '解析',
+        '揭秘', '真相', '误区', '注意事项'
+    ],
+    '打卡分享': [
+        '打卡', '日常', 'vlog', '记录', '分享', '今天',
+        '坚持', '第几天', '进步', '变化'
+    ]
+}
+
+# 由关键词模式构建一次的多模式匹配器
+CONTENT_TYPE_MATCHER = KeywordMatcher(CONTENT_TYPE_PATTERNS)
+
+# 高表现内容榜单: 榜单名 -> 排序指标
+HIGH_PERFORMANCE_METRICS = {
+    'high_engagement': 'engagement_rate',
+    'high_total': 'total_engagement',
+    'high_collect': 'collect_rate'
+}
+
 
 def classify_content_type(title, desc):
-    """根据标题和描述分类内容类型"""
+    """根据标题和描述分类内容类型 (单条版本，批量分类见 classify_chunk)"""
     title = str(title).lower()
     desc = str(desc).lower()
     content = f"{title} {desc}"
     
-    # 定义关键词模式
-    patterns = {
-        '亲身体验': [
-            '我的', '亲测', '体验', '试用', '使用感受', '真实感受',
-            '第一次', '初体验', '尝试', '感受', '心得', '日记'
-        ],
-        '种草推荐': [
-            '推荐', '安利', '种草', '必买', '好用', '值得', '强烈推荐',
-            '不踩雷', '闭眼入', '回购', '爱用', '好物'
-        ],
-        '教程指导': [
-            '教程', '教学', '怎么', '如何', '方法', '步骤', '技巧',
-            '入门', '零基础', '新手', '指南', '攻略'
-        ],
-        '对比测评': [
-            'vs', '对比', '测评', '评测', '区别', '哪个好', '选择',
-            '比较', '测试', '横评', '对决'
-        ],
-        '知识科普': [
-            '科普', '知识', '原理', '为什么', '什么是', '解析',
-            '揭秘', '真相', '误区', '注意事项'
-        ],
-        '打卡分享': [
-            '打卡', '日常', 'vlog', '记录', '分享', '今天',
-            '坚持', '第几天', '进步', '变化'
-        ]
-    }
-    
     # 计算每种类型的匹配分数
     scores = {}
-    for content_type, keywords in patterns.items():
+    for content_type, keywords in CONTENT_TYPE_PATTERNS.items():
         score = sum(1 for keyword in keywords if keyword in content)
         scores[content_type] = score
     
@@ -63,37 +85,66 @@ def classify_content_type(title, desc):
         return '其他'
 
 
-def calculate_engagement_metrics(df):
+def calculate_engagement_metrics(df, seed=DEFAULT_SEED):
     """计算互动指标"""
     print("📊 计算互动指标...")
     
-    # 转换数值类型
-    numeric_columns = ['liked_count', 'collected_count', 'comment_count', 'share_count']
-    for col in numeric_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    
-    # 计算总互动数
-    df['total_engagement'] = (
-        df.get('liked_count', 0) + 
-        df.get('collected_count', 0) + 
-        df.get('comment_count', 0) + 
-        df.get('share_count', 0)
-    )
+    return add_engagement_columns(df, seed)
+
+
+def calculate_engagement_metrics_chunked(chunks, seed=DEFAULT_SEED):
+    """分块计算互动指标，逐块产出结果"""
+    print("📊 分块计算互动指标...")
+    
+    for chunk in chunks:
+        yield add_engagement_columns(chunk, seed)
+
+
+def note_keys(df):
+    """笔记的随机数键：优先使用 note_id，缺失时使用标题 + 作者"""
+    if NOTE_ID_COLUMN in df.columns:
+        return df[NOTE_ID_COLUMN]
+    return df[[col for col in ['title', 'nickname'] if col in df.columns]]
+
+
+def add_engagement_columns(df, seed=DEFAULT_SEED):
+    """为笔记数据添加互动指标列 (总互动数、收藏率、评论率与分位由共享的互动指标模块计算)"""
+    df = add_engagement_metrics(df)
     
     # 计算互动率 (假设曝光量为总互动数的10-50倍)
-    # 这里使用一个估算公式
-    df['estimated_views'] = df['total_engagement'] * np.random.uniform(15, 35, len(df))
+    # 这里使用一个估算公式，倍数按 (seed, 笔记) 确定，同一笔记每次运行结果一致
+    df['estimated_views'] = df['total_engagement'] * SeededRNG(seed).uniform(
+        note_keys(df), 15, 35, 'estimated_views'
+    )
     df['engagement_rate'] = (df['total_engagement'] / df['estimated_views'] * 100).round(2)
     
-    # 计算收藏率
-    df['collect_rate'] = (df.get('collected_count', 0) / df['total_engagement'] * 100).round(2)
-    df['collect_rate'] = df['collect_rate'].fillna(0)
+    return df
+
+
+def prepare_notes_chunked(chunks, seed=DEFAULT_SEED, workers=1):
+    """分块完成内容分类与互动指标计算，丢弃描述列后再合并"""
+    processed = []
     
-    # 计算评论率
-    df['comment_rate'] = (df.get('comment_count', 0) / df['total_engagement'] * 100).round(2)
-    df['comment_rate'] = df['comment_rate'].fillna(0)
+    labeled_chunks = (classify_chunk(fill_text_columns(chunk), workers) for chunk in chunks)
+    for chunk in calculate_engagement_metrics_chunked(labeled_chunks, seed):
+        processed.append(chunk.drop(columns=['desc'], errors='ignore'))
     
+    # 分位需基于全部笔记，合并后重新计算
+    return add_engagement_metrics(pd.concat(processed, ignore_index=True))
+
+
+def classify_chunk(df, workers=1):
+    """
+    为一块笔记数据分类内容类型
+    整列拼接标题与描述后交给多模式匹配器，每条笔记只扫描一次，结果与 classify_content_type 一致
+    """
+    # 与单条版本的 str() 保持一致 (缺失值按 'nan' 处理)
+    title = df['title'].map(str) if 'title' in df.columns else ''
+    desc = df['desc'].map(str) if 'desc' in df.columns else ''
+    content = pd.Series(title, index=df.index) + ' ' + desc
+    df['content_type'] = CONTENT_TYPE_MATCHER.best_group(
+        content.str.lower(), default='其他', workers=workers
+    )
     return df
 
 
@@ -123,19 +174,12 @@ def identify_high_performance_content(df, top_n=20):
     """识别高表现内容"""
     print(f"🏆 识别前 {top_n} 个高表现内容...")
     
-    # 按互动率排序
-    high_engagement = df.nlargest(top_n, 'engagement_rate').copy()
-    
-    # 按总互动数排序
-    high_total = df.nlargest(top_n, 'total_engagement').copy()
-    
-    # 按收藏率排序
-    high_collect = df.nlargest(top_n, 'collect_rate').copy()
+    # 按互动率、总互动数、收藏率各取前 N 条 (部分选择，不做全量排序)
+    leaderboards = top_k_multi(df, list(HIGH_PERFORMANCE_METRICS.values()), top_n)
     
     return {
-        'high_engagement': high_engagement,
-        'high_total': high_total,
-        'high_collect': high_collect
+        category: leaderboards[metric].copy()
+        for category, metric in HIGH_PERFORMANCE_METRICS.items()
     }
 
 
@@ -194,78 +238,52 @@ def generate_competitor_report(df, output_dir):
         f.write(f"\n\n报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
     
     print(f"📋 竞品分析报告已保存到: {report_path}")
+    register_artifacts(output_dir, 'competitor_analysis', {'competitor_report': report_path})
     
     return stats, content_type_dist, user_stats
 
 
-def create_visualizations(df, output_dir):
-    """创建可视化图表"""
+def create_visualizations(df, output_dir, renderer=None):
+    """
+    创建可视化图表
+    这里只准备绘图数据，渲染交给图表渲染服务 (未传入 renderer 时同步渲染)
+    """
     print("📈 生成可视化图表...")
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    # 设置中文字体
-    plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
-    plt.rcParams['axes.unicode_minus'] = False
+    local_renderer = renderer is None
+    if local_renderer:
+        renderer = ChartRenderer(workers=0)
     
     # 1. 互动指标分布图
-    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-    
-    # 点赞数分布
-    axes[0, 0].hist(df['liked_count'], bins=30, alpha=0.7, color='skyblue')
-    axes[0, 0].set_title('点赞数分布')
-    axes[0, 0].set_xlabel('点赞数')
-    axes[0, 0].set_ylabel('频次')
-    
-    # 收藏数分布
-    axes[0, 1].hist(df['collected_count'], bins=30, alpha=0.7, color='lightgreen')
-    axes[0, 1].set_title('收藏数分布')
-    axes[0, 1].set_xlabel('收藏数')
-    axes[0, 1].set_ylabel('频次')
-    
-    # 互动率分布
-    axes[1, 0].hist(df['engagement_rate'], bins=30, alpha=0.7, color='orange')
-    axes[1, 0].set_title('互动率分布')
-    axes[1, 0].set_xlabel('互动率 (%)')
-    axes[1, 0].set_ylabel('频次')
-    
-    # 内容类型分布
     content_counts = df['content_type'].value_counts()
-    axes[1, 1].pie(content_counts.values, labels=content_counts.index, autopct='%1.1f%%')
-    axes[1, 1].set_title('内容类型分布')
-    
-    plt.tight_layout()
     chart1_path = os.path.join(output_dir, f'engagement_analysis_{timestamp}.png')
-    plt.savefig(chart1_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    renderer.submit('engagement_overview', {
+        'liked_hist': histogram(df['liked_count'], 30),
+        'collected_hist': histogram(df['collected_count'], 30),
+        'rate_hist': histogram(df['engagement_rate'], 30),
+        'content_counts': (content_counts.index.tolist(), content_counts.values)
+    }, chart1_path, label='互动分析图表')
+    charts = {'engagement_chart': chart1_path}
     
     # 2. 时间趋势图
     if 'publish_datetime' in df.columns and not df['publish_datetime'].isna().all():
-        fig, axes = plt.subplots(2, 1, figsize=(15, 10))
-        
-        # 按日期统计发布量
+        # 按日期、按小时统计发布量
         daily_posts = df.groupby(df['publish_datetime'].dt.date).size()
-        axes[0].plot(daily_posts.index, daily_posts.values, marker='o')
-        axes[0].set_title('每日发布量趋势')
-        axes[0].set_xlabel('日期')
-        axes[0].set_ylabel('发布数量')
-        axes[0].tick_params(axis='x', rotation=45)
-        
-        # 按小时统计发布量
         hourly_posts = df.groupby('publish_hour').size()
-        axes[1].bar(hourly_posts.index, hourly_posts.values, alpha=0.7)
-        axes[1].set_title('发布时间分布 (按小时)')
-        axes[1].set_xlabel('小时')
-        axes[1].set_ylabel('发布数量')
         
-        plt.tight_layout()
         chart2_path = os.path.join(output_dir, f'time_analysis_{timestamp}.png')
-        plt.savefig(chart2_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        print(f"📈 时间分析图表已保存到: {chart2_path}")
+        renderer.submit('time_trends', {
+            'daily_posts': (daily_posts.index.tolist(), daily_posts.values),
+            'hourly_posts': (hourly_posts.index.tolist(), hourly_posts.values)
+        }, chart2_path, label='时间分析图表')
+        charts['time_chart'] = chart2_path
+    
+    if local_renderer:
+        renderer.close()
     
-    print(f"📈 互动分析图表已保存到: {chart1_path}")
+    register_artifacts(output_dir, 'competitor_analysis', charts)
+    return charts
 
 
 def main():
@@ -284,7 +302,17 @@ def main():
         '--input', '-i',
         type=str,
         required=True,
-        help='输入的 CSV 文件路径'
+        help='输入的 CSV 文件路径、目录或 glob 模式 (latest/all 表示爬虫数据目录)'
+    )
+    parser.add_argument(
+        '--since',
+        type=str,
+        help='只分析该日期及之后爬取的文件 (YYYY-MM-DD)'
+    )
+    parser.add_argument(
+        '--until',
+        type=str,
+        help='只分析该日期及之前爬取的文件 (YYYY-MM-DD)'
     )
     parser.add_argument(
         '--output-dir', '-o',
@@ -298,11 +326,59 @@ def main():
         default=20,
         help='分析前 N 个高表现内容 (默认: 20)'
     )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f'分块读取时每块的笔记数 (默认: {DEFAULT_CHUNK_SIZE})'
+    )
+    parser.add_argument(
+        '--memory-budget-mb',
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET_MB,
+        help=f'内存预算 (MB)，估算超出时分块读取 (默认: {DEFAULT_MEMORY_BUDGET_MB})'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'曝光量估算的随机种子 (默认: {DEFAULT_SEED})'
+    )
+    parser.add_argument(
+        '--full-output',
+        choices=['unsorted', 'sorted', 'none'],
+        default='unsorted',
+        help='完整结果的输出方式: unsorted=按读取顺序, sorted=按互动率排序, none=只输出高表现榜单 (默认: unsorted)'
+    )
+    parser.add_argument(
+        '--no-charts',
+        action='store_true',
+        help='不生成图表，只输出 CSV 与报告 (跳过绘图库的加载，启动更快)'
+    )
+    parser.add_argument(
+        '--dpi-preset',
+        choices=list(DPI_PRESETS),
+        default=DEFAULT_DPI_PRESET,
+        help=f'图表分辨率预设 (默认: {DEFAULT_DPI_PRESET})'
+    )
+    parser.add_argument(
+        '--chart-workers',
+        type=int,
+        default=1,
+        help='后台渲染图表的进程数，0 表示同步渲染 (默认: 1)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='内容分类使用的进程数 (默认: 1，数据量较小时自动使用单进程)'
+    )
     
     args = parser.parse_args()
     
-    # 检查输入文件
-    if not os.path.exists(args.input):
+    # 解析输入文件 (支持目录、glob 模式与日期范围)
+    input_files = resolve_input_files(args.input, args.since, args.until)
+    if not input_files:
         print(f"❌ 输入文件不存在: {args.input}")
         sys.exit(1)
     
@@ -315,27 +391,43 @@ def main():
     
     try:
         # 读取数据
-        print(f"📖 读取数据文件: {args.input}")
-        df = pd.read_csv(args.input)
-        
-        print(f"📊 数据概览: {len(df)} 条笔记")
-        
-        # 数据清理
-        df = df.fillna('')
-        
-        # 分类内容类型
-        print("🏷️ 分析内容类型...")
-        df['content_type'] = df.apply(
-            lambda row: classify_content_type(row.get('title', ''), row.get('desc', '')),
-            axis=1
+        print(f"📖 读取数据文件: {describe_input_files(input_files)}")
+        df, streaming = open_notes(
+            input_files, 'competitor_analysis', memory_budget_mb=args.memory_budget_mb,
+            chunk_size=args.chunk_size
         )
         
-        # 计算互动指标
-        df = calculate_engagement_metrics(df)
+        if streaming:
+            # 分块分类内容类型并计算互动指标
+            print("🏷️ 分析内容类型...")
+            df = prepare_notes_chunked(df, args.seed, args.workers)
+            
+            print(f"📊 数据概览: {len(df)} 条笔记")
+        else:
+            print(f"📊 数据概览: {len(df)} 条笔记")
+            
+            # 数据清理
+            df = fill_text_columns(df)
+            
+            # 分类内容类型
+            print("🏷️ 分析内容类型...")
+            df = classify_chunk(df, args.workers)
+            
+            # 计算互动指标
+            df = calculate_engagement_metrics(df, args.seed)
         
         # 分析时间模式
         df = analyze_time_patterns(df)
         
+        # 提交图表到后台渲染，与后续的结果输出并行
+        renderer = None
+        if not args.no_charts:
+            renderer = ChartRenderer(
+                args.dpi_preset, args.chart_workers,
+                cache_dir=os.path.join(args.output_dir, '.cache', 'charts')
+            )
+            create_visualizations(df, args.output_dir, renderer)
+        
         # 识别高表现内容
         high_performance = identify_high_performance_content(df, args.top_n)
         
@@ -349,7 +441,7 @@ def main():
         output_columns = [
             'title', 'nickname', 'content_type', 'liked_count', 'collected_count',
             'comment_count', 'share_count', 'total_engagement', 'engagement_rate',
-            'collect_rate', 'comment_rate'
+            'collect_rate', 'comment_rate', 'engagement_percentile'
         ]
         
         # 添加时间相关列（如果存在）
@@ -358,10 +450,14 @@ def main():
             if col in df.columns:
                 output_columns.append(col)
         
-        # 按互动率排序并保存
-        df_sorted = df.sort_values('engagement_rate', ascending=False)
-        df_sorted[output_columns].to_csv(main_output, index=False, encoding='utf-8-sig')
-        print(f"📄 竞品分析结果已保存到: {main_output}")
+        # 保存完整结果 (只有指定 sorted 时才按互动率全量排序)
+        if args.full_output != 'none':
+            df_output = df
+            if args.full_output == 'sorted':
+                df_output = df.sort_values('engagement_rate', ascending=False)
+            df_output[output_columns].to_csv(main_output, index=False, encoding='utf-8-sig')
+            print(f"📄 竞品分析结果已保存到: {main_output}")
+            register_artifacts(args.output_dir, 'competitor_analysis', {'competitor_csv': main_output})
         
         # 保存高表现内容
         for category, data in high_performance.items():
@@ -370,12 +466,14 @@ def main():
             )
             data[output_columns].to_csv(category_output, index=False, encoding='utf-8-sig')
             print(f"📄 {category} 已保存到: {category_output}")
+            register_artifacts(args.output_dir, 'competitor_analysis', {category: category_output})
         
         # 生成报告
         stats, content_dist, user_stats = generate_competitor_report(df, args.output_dir)
         
-        # 创建可视化
-        create_visualizations(df, args.output_dir)
+        # 等待图表渲染完成
+        if renderer:
+            renderer.close()
         
         # 输出统计信息
         print("\n" + "=" * 60)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据读取模块
+为各分析模块提供统一的 CSV 读取方式：显式列类型、按模块投影列、
+超出内存预算时分块迭代读取，以及多天爬取文件的合并与去重
+"""
+
+import os
+import re
+import glob
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+
+# 爬虫数据目录与内容文件匹配模式
+DATA_DIR = 'core/media_crawler/data/xhs'
+DEFAULT_DATA_PATTERN = os.path.join(DATA_DIR, '*_search_contents_*.csv')
+
+# 文件名中的爬取日期，如 1_search_contents_2025-07-02.csv
+FILE_DATE_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})')
+
+# 笔记去重键
+NOTE_ID_COLUMN = 'note_id'
+
+
+# 互动数列，统一转换为 int32
+COUNT_COLUMNS = ['liked_count', 'collected_count', 'comment_count', 'share_count']
+
+# 重复值多的字符串列，使用 category 存储
+CATEGORY_COLUMNS = ['nickname', 'user_id', 'type']
+
+# 各分析模块实际用到的列
+MODULE_COLUMNS = {
+    'keyword_analysis': ['title', 'desc', 'time'] + COUNT_COLUMNS,
+    'competitor_analysis': ['note_id', 'title', 'desc', 'nickname', 'time'] + COUNT_COLUMNS,
+    'koc_filter': ['user_id', 'nickname', 'title'] + COUNT_COLUMNS,
+    'topic_generator': ['title'] + COUNT_COLUMNS
+}
+
+# 默认内存预算 (MB) 与分块大小 (行)
+DEFAULT_MEMORY_BUDGET_MB = 256
+DEFAULT_CHUNK_SIZE = 20000
+
+# CSV 读入 DataFrame 后相对文件大小的大致膨胀系数
+MEMORY_EXPANSION_FACTOR = 4
+
+INT32_MAX = np.iinfo(np.int32).max
+
+
+def resolve_columns(input_file, module=None, columns=None):
+    """根据模块名或显式列名确定需要读取的列 (只保留文件中存在的列)"""
+    wanted = columns or MODULE_COLUMNS.get(module)
+    if wanted is None:
+        return None
+
+    header = pd.read_csv(input_file, nrows=0).columns
+    return [col for col in wanted if col in header]
+
+
+def build_dtypes(usecols):
+    """为读取的列构造显式类型"""
+    dtypes = {}
+    for col in usecols or CATEGORY_COLUMNS:
+        if col in CATEGORY_COLUMNS:
+            dtypes[col] = 'category'
+        elif col in COUNT_COLUMNS:
+            # 互动数可能包含 "1万+" 等非数字内容，先按字符串读取再统一转换
+            dtypes[col] = str
+    return dtypes
+
+
+def coerce_count_columns(df):
+    """将互动数列转换为 int32，无法解析的值按 0 处理"""
+    for col in COUNT_COLUMNS:
+        if col in df.columns and df[col].dtype != np.int32:
+            values = pd.to_numeric(df[col], errors='coerce').fillna(0)
+            df[col] = values.clip(0, INT32_MAX).astype(np.int32)
+    return df
+
+
+def should_stream(input_files, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """估算文件 (单个或多个) 读入后的内存占用是否超出预算"""
+    if isinstance(input_files, str):
+        input_files = [input_files]
+    return estimate_memory_bytes(input_files) > memory_budget_mb * 1024 * 1024
+
+
+def load_notes(input_file, module=None, columns=None):
+    """一次性读取笔记数据 (带类型与列投影)"""
+    usecols = resolve_columns(input_file, module, columns)
+    df = pd.read_csv(input_file, usecols=usecols, dtype=build_dtypes(usecols))
+    return coerce_count_columns(df)
+
+
+def iter_notes(input_file, module=None, columns=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """分块读取笔记数据 (带类型与列投影)，每次产出一个 DataFrame"""
+    usecols = resolve_columns(input_file, module, columns)
+    reader = pd.read_csv(
+        input_file, usecols=usecols, dtype=build_dtypes(usecols), chunksize=chunk_size
+    )
+    for chunk in reader:
+        yield coerce_count_columns(chunk)
+
+
+def fill_text_columns(df, fill_value=''):
+    """填充文本/分类列中的缺失值 (分类列先补充对应类别)"""
+    for col in df.columns:
+        if col in COUNT_COLUMNS or not df[col].isna().any():
+            continue
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            if fill_value not in df[col].cat.categories:
+                df[col] = df[col].cat.add_categories([fill_value])
+            df[col] = df[col].fillna(fill_value)
+        elif not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].fillna(fill_value)
+    return df
+
+
+def get_file_date(path):
+    """获取数据文件的爬取日期 (优先取文件名中的日期，其次取修改时间)"""
+    match = FILE_DATE_PATTERN.search(os.path.basename(path))
+    if match:
+        try:
+            return datetime.strptime(match.group(1), '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(os.path.getmtime(path)).date()
+
+
+def resolve_input_files(spec, since=None, until=None):
+    """
+    解析 --input 参数为数据文件列表 (按爬取日期从旧到新排序)
+    spec 可以是单个文件、目录、glob 模式，或 latest / all (默认数据目录)
+    since / until 为 YYYY-MM-DD 格式的日期范围 (包含两端)
+    """
+    if spec in ('latest', 'all'):
+        paths = glob.glob(DEFAULT_DATA_PATTERN)
+    elif os.path.isdir(spec):
+        paths = glob.glob(os.path.join(spec, '*_search_contents_*.csv'))
+    elif glob.has_magic(spec):
+        paths = glob.glob(spec)
+    else:
+        paths = [spec] if os.path.exists(spec) else []
+
+    since_date = datetime.strptime(since, '%Y-%m-%d').date() if since else None
+    until_date = datetime.strptime(until, '%Y-%m-%d').date() if until else None
+
+    dated = []
+    for path in paths:
+        file_date = get_file_date(path)
+        if since_date and file_date < since_date:
+            continue
+        if until_date and file_date > until_date:
+            continue
+        dated.append((file_date, os.path.getmtime(path), path))
+
+    dated.sort()
+    files = [path for _, _, path in dated]
+
+    if spec == 'latest':
+        return files[-1:]
+    return files
+
+
+def describe_input_files(input_files):
+    """输入文件的简短描述，用于日志输出"""
+    if len(input_files) == 1:
+        return input_files[0]
+    return f"{len(input_files)} 个文件 ({input_files[0]} ~ {input_files[-1]})"
+
+
+def estimate_memory_bytes(input_files):
+    """估算多个文件读入后的总内存占用"""
+    return sum(os.path.getsize(path) for path in input_files) * MEMORY_EXPANSION_FACTOR
+
+
+def _with_note_id(input_file, module, columns):
+    """多文件去重需要额外读取 note_id 列"""
+    usecols = resolve_columns(input_file, module, columns)
+    if usecols is not None and NOTE_ID_COLUMN not in usecols:
+        header = pd.read_csv(input_file, nrows=0).columns
+        if NOTE_ID_COLUMN in header:
+            usecols = usecols + [NOTE_ID_COLUMN]
+    return usecols
+
+
+def load_notes_multi(input_files, module=None, columns=None, max_workers=4):
+    """
+    多线程读取多个数据文件并合并
+    同一笔记出现在多天的数据中时，只保留最新一次爬取的快照
+    """
+    if len(input_files) == 1:
+        return load_notes(input_files[0], module, columns)
+
+    def read_one(path):
+        return load_notes(path, columns=_with_note_id(path, module, columns))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(read_one, input_files))
+
+    df = pd.concat(frames, ignore_index=True)
+    del frames
+
+    # 文件按日期从旧到新排列，保留每个笔记最后出现的记录
+    if NOTE_ID_COLUMN in df.columns:
+        duplicated = df[NOTE_ID_COLUMN].duplicated(keep='last')
+        if duplicated.any():
+            print(f"🔁 去除重复笔记快照: {int(duplicated.sum())} 条")
+            df = df[~duplicated].reset_index(drop=True)
+
+    # 各文件的分类列类别不同，合并后重新转换为 category
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    return df
+
+
+def iter_notes_multi(input_files, module=None, columns=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    分块读取多个数据文件
+    从最新的文件开始读取并跳过更新文件中已出现过的 note_id，从而只保留每个笔记的最新快照
+    """
+    if len(input_files) == 1:
+        yield from iter_notes(input_files[0], module, columns, chunk_size)
+        return
+
+    newer_ids = set()
+    for path in reversed(input_files):
+        file_ids = set()
+        usecols = _with_note_id(path, module, columns)
+        for chunk in iter_notes(path, columns=usecols, chunk_size=chunk_size):
+            if NOTE_ID_COLUMN in chunk.columns:
+                note_ids = chunk[NOTE_ID_COLUMN].astype(str)
+                keep = ~note_ids.isin(newer_ids)
+                file_ids.update(note_ids[keep])
+                chunk = chunk[keep]
+            if len(chunk) > 0:
+                yield chunk
+        newer_ids |= file_ids
+
+
+def open_notes(input_files, module=None, columns=None,
+               memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    按内存预算打开数据: 返回 (数据, 是否分块)
+    未超出预算时返回合并后的 DataFrame，否则返回分块迭代器
+    """
+    if should_stream(input_files, memory_budget_mb):
+        print(f"📦 数据超出内存预算 ({memory_budget_mb}MB)，按每块 {chunk_size} 条分块读取")
+        return iter_notes_multi(input_files, module, columns, chunk_size), True
+
+    return load_notes_multi(input_files, module, columns), False
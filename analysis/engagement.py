@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+互动指标模块
+在 int32 互动数矩阵上一次性计算总互动数、收藏率、评论率与总互动数分位，
+结果作为列缓存在笔记 DataFrame 上，供竞品分析、选题生成等模块复用
+"""
+
+import numpy as np
+
+from data_loader import COUNT_COLUMNS, coerce_count_columns
+
+
+# 互动指标列
+ENGAGEMENT_COLUMNS = ['total_engagement', 'collect_rate', 'comment_rate', 'engagement_percentile']
+
+# 记录互动指标已计算的 attrs 键 (值为计算时的行数)
+ENGAGEMENT_ATTR = 'engagement_metrics_rows'
+
+
+def engagement_matrix(df):
+    """
+    取出 行数 × 4 的 int32 互动数矩阵 (列顺序同 COUNT_COLUMNS)
+    通过 data_loader 读取的数据已是 int32，不再重复转换；缺失的列按 0 处理
+    """
+    coerce_count_columns(df)
+    counts = np.zeros((len(df), len(COUNT_COLUMNS)), dtype=np.int32)
+    for i, col in enumerate(COUNT_COLUMNS):
+        if col in df.columns:
+            counts[:, i] = df[col].to_numpy()
+    return counts
+
+
+def compute_engagement_metrics(counts):
+    """
+    由互动数矩阵计算互动指标
+
+    Returns:
+        {'total_engagement', 'collect_rate', 'comment_rate', 'engagement_percentile'}
+        比率为百分比并保留两位小数 (总互动数为 0 时记为 0)，
+        分位为总互动数不超过该笔记的笔记占比 (0-100)
+    """
+    total = counts.sum(axis=1, dtype=np.int64)
+    has_total = total > 0
+    safe_total = np.where(has_total, total, 1)
+
+    collected = counts[:, COUNT_COLUMNS.index('collected_count')]
+    comment = counts[:, COUNT_COLUMNS.index('comment_count')]
+    collect_rate = np.where(has_total, np.round(collected / safe_total * 100, 2), 0.0)
+    comment_rate = np.where(has_total, np.round(comment / safe_total * 100, 2), 0.0)
+
+    percentile = np.zeros(len(total))
+    if len(total):
+        sorted_total = np.sort(total)
+        percentile = np.searchsorted(sorted_total, total, side='right') / len(total) * 100
+
+    return {
+        'total_engagement': total,
+        'collect_rate': collect_rate,
+        'comment_rate': comment_rate,
+        'engagement_percentile': percentile
+    }
+
+
+def add_engagement_metrics(df):
+    """
+    为笔记 DataFrame 添加互动指标列并返回
+    已为同一批数据计算过时直接复用 (互动数列在读取后不应再修改)
+    """
+    if df.attrs.get(ENGAGEMENT_ATTR) == len(df) and all(col in df.columns for col in ENGAGEMENT_COLUMNS):
+        return df
+
+    metrics = compute_engagement_metrics(engagement_matrix(df))
+    for col in ENGAGEMENT_COLUMNS:
+        df[col] = metrics[col]
+    df.attrs[ENGAGEMENT_ATTR] = len(df)
+    return df
@@ -10,35 +10,68 @@ import sys
 import argparse
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
 import glob
-import re
+
+# 以脚本方式运行时也能导入同目录下的共享模块
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from rng import DEFAULT_SEED, SeededRNG
+from text_patterns import PatternMatcher
+from artifact_manifest import ArtifactManifest, register_artifacts
+from calendar_planner import (
+    DEFAULT_MIN_TOPIC_GAP, WEEKEND_HEAVY_KEYWORDS, WEEKEND_FALLBACK_TOPIC, schedule_calendars
+)
+
+
+# 亮点关键词模式 (字面串或正则表达式，匹配小写后的 标题 + 描述)
+HIGHLIGHT_PATTERNS = {
+    '数字亮点': [r'\d+天', r'\d+个', r'\d+种', r'\d+分钟', r'\d+次'],
+    '效果亮点': ['减肥', '塑形', '瘦身', '变化', '效果', '改善', '提升'],
+    '体验亮点': ['亲测', '真实', '体验', '感受', '心得', '分享'],
+    '专业亮点': ['教程', '教学', '技巧', '方法', '指导', '专业'],
+    '对比亮点': ['vs', '对比', '区别', '哪个好', '选择'],
+    '情感亮点': ['爱了', '绝了', '太好', '超棒', '推荐', '必看']
+}
+
+# 没有匹配到亮点时尝试提取的动词 (按顺序取第一个)
+ACTION_WORDS = ['学会', '掌握', '了解', '体验', '尝试', '练习']
+
+HIGHLIGHT_MATCHER = PatternMatcher(HIGHLIGHT_PATTERNS)
+ACTION_MATCHER = PatternMatcher({word: [word] for word in ACTION_WORDS})
+
+
+# 所需分析文件 -> (产物清单中的类型, 没有清单时的文件名模式)
+ANALYSIS_ARTIFACTS = {
+    'topic_suggestions': ('topic_csv', 'topic_suggestions_*.csv'),
+    'high_engagement': ('high_engagement', 'high_engagement_*.csv'),
+    'keywords_analysis': ('keywords_csv', 'keywords_analysis_*.csv')
+}
 
 
 def find_latest_analysis_files(output_dir):
-    """查找最新的分析文件"""
+    """
+    查找最新的分析文件
+    优先从产物清单中取最近一次运行的产物 (不扫描目录)，没有清单时按文件名模式查找
+    """
     files = {}
-    
-    # 查找各类分析文件
-    patterns = {
-        'topic_suggestions': 'topic_suggestions_*.csv',
-        'high_engagement': 'high_engagement_*.csv',
-        'keywords_analysis': 'keywords_analysis_*.csv'
-    }
-    
-    for file_type, pattern in patterns.items():
-        file_pattern = os.path.join(output_dir, pattern)
-        matching_files = glob.glob(file_pattern)
-        
-        if matching_files:
+    manifest = ArtifactManifest.open_existing(output_dir)
+    
+    if manifest is not None:
+        with manifest:
+            resolved = manifest.resolve([artifact_type for artifact_type, _ in ANALYSIS_ARTIFACTS.values()])
+        for file_type, (artifact_type, _) in ANALYSIS_ARTIFACTS.items():
+            files[file_type] = resolved[artifact_type]
+    else:
+        for file_type, (_, pattern) in ANALYSIS_ARTIFACTS.items():
+            matching_files = glob.glob(os.path.join(output_dir, pattern))
             # 选择最新的文件（按文件名排序，通常包含时间戳）
-            latest_file = sorted(matching_files)[-1]
-            files[file_type] = latest_file
+            files[file_type] = sorted(matching_files)[-1] if matching_files else None
+    
+    for file_type, latest_file in files.items():
+        if latest_file:
             print(f"✅ 找到 {file_type}: {os.path.basename(latest_file)}")
         else:
             print(f"⚠️  未找到 {file_type} 文件")
-            files[file_type] = None
     
     return files
 
@@ -77,167 +110,271 @@ def load_analysis_data(files):
     return data
 
 
-def extract_content_highlights(title, desc=""):
-    """从标题和描述中提取内容亮点"""
-    if not title or pd.isna(title):
-        return ""
-    
-    title = str(title)
-    desc = str(desc) if desc and not pd.isna(desc) else ""
-    content = f"{title} {desc}".lower()
-    
-    # 定义亮点关键词模式
-    highlight_patterns = {
-        '数字亮点': [r'\d+天', r'\d+个', r'\d+种', r'\d+分钟', r'\d+次'],
-        '效果亮点': ['减肥', '塑形', '瘦身', '变化', '效果', '改善', '提升'],
-        '体验亮点': ['亲测', '真实', '体验', '感受', '心得', '分享'],
-        '专业亮点': ['教程', '教学', '技巧', '方法', '指导', '专业'],
-        '对比亮点': ['vs', '对比', '区别', '哪个好', '选择'],
-        '情感亮点': ['爱了', '绝了', '太好', '超棒', '推荐', '必看']
-    }
-    
-    highlights = []
-    
-    for category, patterns in highlight_patterns.items():
-        for pattern in patterns:
-            if re.search(pattern, content):
-                highlights.append(category.replace('亮点', ''))
-                break
-    
-    # 如果没有找到特定亮点，尝试提取数字或关键词
-    if not highlights:
-        # 提取数字
-        numbers = re.findall(r'\d+', title)
-        if numbers:
-            highlights.append(f"{numbers[0]}个要点")
+def content_highlights(titles, descs=None):
+    """
+    批量提取内容亮点
+    整列 标题 + 描述 一次匹配出亮点类型矩阵，每行最多取两个亮点
+    """
+    titles = pd.Series(titles, dtype=object).reset_index(drop=True)
+    if descs is None:
+        descs = pd.Series('', index=titles.index, dtype=object)
+    else:
+        descs = pd.Series(descs, dtype=object).reset_index(drop=True)
+    descs = descs.where(descs.notna(), '').map(lambda desc: str(desc) if desc else '')
+    
+    title_text = titles.map(str)
+    content = (title_text + ' ' + descs).str.lower()
+    hits = HIGHLIGHT_MATCHER.match_matrix(content)
+    actions = ACTION_MATCHER.match_matrix(content)
+    numbers = title_text.str.extract(r'(\d+)', expand=False)
+    labels = [category.replace('亮点', '') for category in HIGHLIGHT_MATCHER.group_names]
+    
+    results = []
+    for row, title in enumerate(titles):
+        if pd.isna(title) or not title:
+            results.append("")
+            continue
+        
+        highlights = [labels[i] for i in np.flatnonzero(hits[row])]
         
-        # 提取动词
-        action_words = ['学会', '掌握', '了解', '体验', '尝试', '练习']
-        for word in action_words:
-            if word in content:
-                highlights.append(f"{word}方法")
-                break
+        # 如果没有找到特定亮点，尝试提取数字或关键词
+        if not highlights:
+            if pd.notna(numbers[row]):
+                highlights.append(f"{numbers[row]}个要点")
+            matched_actions = np.flatnonzero(actions[row])
+            if len(matched_actions):
+                highlights.append(f"{ACTION_WORDS[matched_actions[0]]}方法")
+        
+        results.append("、".join(highlights[:2]))
     
-    return "、".join(highlights[:2]) if highlights else ""
+    return results
+
+
+def extract_content_highlights(title, desc=""):
+    """从标题和描述中提取内容亮点"""
+    return content_highlights([title], [desc])[0]
+
+
+# 没有选题建议时的默认主题方向
+DEFAULT_TOPICS = ['体验分享', '教程指导', '对比测评', '知识科普', '打卡记录']
 
+# 关键词标签从前 N 个高频关键词中选取
+TOP_KEYWORD_COUNT = 5
 
-def generate_content_calendar(data, days=30):
-    """生成内容日历"""
+# 默认目标人群
+TARGET_AUDIENCES = ['宝妈', '健身初学者', '上班族', '学生党', '新手妈妈', '职场女性']
+
+# 没有关键词分析结果时的默认关键词标签
+DEFAULT_KEYWORD_TAGS = "普拉提、运动、健身"
+
+# 标题草稿的改写方式 (前缀, 后缀)，最后一种保留原标题
+TITLE_VARIATIONS = [('我的', ''), ('', '｜真实体验'), ('分享：', ''), ('', '（详细版）'), ('', '')]
+
+# 主题方向关键词 -> 内容建议 (按顺序取第一个匹配)
+CONTENT_SUGGESTIONS = [
+    ('体验', "分享个人真实体验，包含前后对比"),
+    ('教程', "提供详细步骤，配图或视频演示"),
+    ('对比', "客观分析优缺点，给出明确建议"),
+    ('科普', "用通俗易懂的语言解释专业知识"),
+    ('打卡', "记录日常练习，展示坚持过程")
+]
+DEFAULT_SUGGESTION = "结合个人经验，提供实用价值"
+
+
+def sample_columns(rng, keys, items, count, stream):
+    """
+    每行不重复地随机选取 count 个元素
+    每行对每个元素取一个随机数，按随机数排序后取前 count 个
+
+    Returns:
+        行数 × count 的元素矩阵
+    """
+    items = np.asarray(items, dtype=object)
+    scores = np.column_stack([rng.random(keys, f'{stream}_{j}') for j in range(len(items))])
+    return items[np.argsort(scores, axis=1)[:, :count]]
+
+
+def join_columns(matrix, sep="、"):
+    """把元素矩阵的每行用 sep 拼接成字符串"""
+    joined = matrix[:, 0]
+    for j in range(1, matrix.shape[1]):
+        joined = joined + sep + matrix[:, j]
+    return joined
+
+
+def top_keyword_pool(keywords):
+    """关键词标签的候选: 关键词分析结果中的前 TOP_KEYWORD_COUNT 个关键词"""
+    if keywords is None or len(keywords) == 0:
+        return []
+    return keywords.head(TOP_KEYWORD_COUNT)['关键词'].tolist()
+
+
+def generate_content_calendar(data, days=30, seed=DEFAULT_SEED, accounts=None):
+    """
+    生成内容日历
+    日期由 pd.date_range 一次生成，主题、标题、关键词按数组下标批量分配；
+    每行的随机选择由 (seed, 账号, 日期) 确定，同一输入重复生成的日历一致
+
+    Args:
+        accounts: 账号列表，提供时为每个账号各生成 days 天，并增加 Account 列
+    """
     print(f"📅 生成 {days} 天内容日历...")
     
-    calendar_entries = []
+    rng = SeededRNG(seed)
+    account_names = list(accounts) if accounts else [None]
+    
+    # 生成日期列表（从今天开始的未来 days 天），多个账号时按 账号 × 日期 展开
+    dates = pd.date_range(datetime.now().date(), periods=days, freq='D').strftime('%Y-%m-%d')
+    day_index = np.tile(np.arange(days), len(account_names))
+    account_index = np.repeat(np.arange(len(account_names)), days)
+    
+    calendar_df = pd.DataFrame({'Date': np.tile(dates.to_numpy(dtype=object), len(account_names))})
+    if accounts:
+        calendar_df.insert(0, 'Account', np.asarray(account_names, dtype=object)[account_index])
+        keys = calendar_df[['Account', 'Date']]
+    else:
+        keys = calendar_df['Date']
     
-    # 生成日期列表（从今天开始的未来30天）
-    start_date = datetime.now().date()
-    dates = [start_date + timedelta(days=i) for i in range(days)]
+    # 各账号的轮换起点错开，避免同一天所有账号发同一主题
+    slot = day_index + account_index
     
     # 准备数据源
     topics = data.get('topics')
     high_engagement = data.get('high_engagement')
     keywords = data.get('keywords')
     
-    # 获取前5个高频关键词
-    top_keywords = []
-    if keywords is not None and len(keywords) > 0:
-        top_keywords = keywords.head(5)['关键词'].tolist()
-    
-    # 默认目标人群
-    target_audiences = ['宝妈', '健身初学者', '上班族', '学生党', '新手妈妈', '职场女性']
-    
-    # 生成内容日历条目
-    for i, date in enumerate(dates):
-        entry = {}
+    # 主题方向
+    if topics is not None and len(topics) > 0:
+        topic_types = (
+            topics['type'].to_numpy(dtype=object) if 'type' in topics.columns
+            else np.full(len(topics), '通用内容', dtype=object)
+        )
+        calendar_df['主题方向'] = topic_types[slot % len(topics)]
+    else:
+        calendar_df['主题方向'] = np.asarray(DEFAULT_TOPICS, dtype=object)[slot % len(DEFAULT_TOPICS)]
+    
+    # 标题草稿、内容亮点与笔记链接
+    placeholder_titles = '第' + (day_index + 1).astype(str).astype(object) + '天内容分享'
+    if high_engagement is not None and len(high_engagement) > 0:
+        rows = slot % len(high_engagement)
+        source_titles = (
+            high_engagement['title'] if 'title' in high_engagement.columns
+            else pd.Series('', index=high_engagement.index)
+        )
+        titles = source_titles.fillna('').map(str).to_numpy(dtype=object)[rows]
+        has_title = titles != ''
         
-        # 日期
-        entry['Date'] = date.strftime('%Y-%m-%d')
+        # 对原标题进行简单改写，避免完全重复
+        variation = rng.integers(keys, 0, len(TITLE_VARIATIONS), 'title_variation')
+        prefixes = np.asarray([prefix for prefix, _ in TITLE_VARIATIONS], dtype=object)[variation]
+        suffixes = np.asarray([suffix for _, suffix in TITLE_VARIATIONS], dtype=object)[variation]
+        calendar_df['标题草稿'] = np.where(has_title, prefixes + titles + suffixes, placeholder_titles)
         
-        # 主题方向
-        if topics is not None and len(topics) > 0:
-            topic_idx = i % len(topics)
-            topic_row = topics.iloc[topic_idx]
-            entry['主题方向'] = topic_row.get('type', '通用内容')
-        else:
-            # 默认主题方向
-            default_topics = ['体验分享', '教程指导', '对比测评', '知识科普', '打卡记录']
-            entry['主题方向'] = default_topics[i % len(default_topics)]
-        
-        # 标题草稿
-        if high_engagement is not None and len(high_engagement) > 0:
-            title_idx = i % len(high_engagement)
-            title_row = high_engagement.iloc[title_idx]
-            original_title = title_row.get('title', '')
-            
-            # 对原标题进行简单改写，避免完全重复
-            if original_title:
-                # 简单的标题变化策略
-                variations = [
-                    f"我的{original_title}",
-                    f"{original_title}｜真实体验",
-                    f"分享：{original_title}",
-                    f"{original_title}（详细版）",
-                    original_title  # 保留原标题
-                ]
-                entry['标题草稿'] = random.choice(variations)
-                
-                # 提取内容亮点
-                desc = title_row.get('desc', '') if 'desc' in title_row else ''
-                entry['内容亮点'] = extract_content_highlights(original_title, desc)
-                
-                # 笔记链接
-                entry['笔记链接'] = title_row.get('note_url', '') if 'note_url' in title_row else ''
-            else:
-                entry['标题草稿'] = f"第{i+1}天内容分享"
-                entry['内容亮点'] = ""
-                entry['笔记链接'] = ""
-        else:
-            entry['标题草稿'] = f"第{i+1}天内容分享"
-            entry['内容亮点'] = ""
-            entry['笔记链接'] = ""
+        # 内容亮点对整列高互动内容一次提取
+        highlights = np.asarray(content_highlights(
+            source_titles,
+            high_engagement['desc'] if 'desc' in high_engagement.columns else None
+        ), dtype=object)
+        calendar_df['内容亮点'] = np.where(has_title, highlights[rows], "")
         
-        # 关键词标签
-        if top_keywords:
-            # 随机选择2-3个关键词
-            selected_keywords = random.sample(top_keywords, min(3, len(top_keywords)))
-            entry['关键词标签'] = "、".join(selected_keywords)
+        if 'note_url' in high_engagement.columns:
+            links = high_engagement['note_url'].fillna('').to_numpy(dtype=object)[rows]
+            calendar_df['笔记链接'] = np.where(has_title, links, "")
         else:
-            entry['关键词标签'] = "普拉提、运动、健身"
-        
-        # 目标人群（随机选择1-2个）
-        num_audiences = random.randint(1, 2)
-        selected_audiences = random.sample(target_audiences, num_audiences)
-        entry['目标人群'] = "、".join(selected_audiences)
-        
-        # 发布状态
-        entry['发布状态'] = "待写"
-        
-        calendar_entries.append(entry)
+            calendar_df['笔记链接'] = ""
+    else:
+        calendar_df['标题草稿'] = placeholder_titles
+        calendar_df['内容亮点'] = ""
+        calendar_df['笔记链接'] = ""
+    
+    # 关键词标签: 从前5个高频关键词中随机选择最多3个
+    top_keywords = top_keyword_pool(keywords)
+    if top_keywords:
+        selected_keywords = sample_columns(rng, keys, top_keywords, min(3, len(top_keywords)), 'keyword')
+        calendar_df['关键词标签'] = join_columns(selected_keywords)
+    else:
+        calendar_df['关键词标签'] = DEFAULT_KEYWORD_TAGS
+    
+    # 目标人群（随机选择1-2个）
+    num_audiences = rng.integers(keys, 1, 3, 'audience_count')
+    selected_audiences = sample_columns(rng, keys, TARGET_AUDIENCES, 2, 'audience')
+    calendar_df['目标人群'] = np.where(
+        num_audiences == 2, join_columns(selected_audiences), selected_audiences[:, 0]
+    )
+    
+    # 发布状态
+    calendar_df['发布状态'] = "待写"
     
-    return pd.DataFrame(calendar_entries)
+    return calendar_df
+
+
+def rebalance_topics(topics):
+    """按主题首次出现的顺序轮流分配，确保主题方向分布均匀"""
+    unique_topics = pd.unique(topics)
+    return unique_topics[np.arange(len(topics)) % len(unique_topics)]
 
 
 def optimize_calendar_distribution(calendar_df):
     """优化内容日历分布"""
     print("🔧 优化内容分布...")
     
-    # 确保主题方向分布均匀
-    unique_topics = calendar_df['主题方向'].unique()
-    
-    # 重新分配主题，确保分布更均匀
-    for i, topic in enumerate(unique_topics):
-        # 每个主题分配到对应的日期
-        topic_indices = list(range(i, len(calendar_df), len(unique_topics)))
-        calendar_df.loc[topic_indices, '主题方向'] = topic
+    # 重新分配主题，确保分布更均匀 (多个账号时各账号分别分配)
+    if 'Account' in calendar_df.columns:
+        calendar_df['主题方向'] = (
+            calendar_df.groupby('Account', sort=False)['主题方向']
+            .transform(lambda topics: rebalance_topics(topics.to_numpy(dtype=object)))
+        )
+    else:
+        calendar_df['主题方向'] = rebalance_topics(calendar_df['主题方向'].to_numpy(dtype=object))
     
     # 确保周末有更轻松的内容
-    for idx, row in calendar_df.iterrows():
-        date_obj = datetime.strptime(row['Date'], '%Y-%m-%d')
-        weekday = date_obj.weekday()
-        
-        # 周末（周六日）安排轻松内容
-        if weekday >= 5:  # 5=周六, 6=周日
-            if '教程' in row['主题方向'] or '对比' in row['主题方向']:
-                calendar_df.loc[idx, '主题方向'] = '打卡分享'
-                calendar_df.loc[idx, '标题草稿'] = f"周末放松｜{row['标题草稿']}"
+    weekday = pd.to_datetime(calendar_df['Date'], format='%Y-%m-%d').dt.weekday
+    topics = calendar_df['主题方向'].astype(str)
+    
+    # 周末（周六日）安排轻松内容
+    heavy = np.logical_or.reduce([
+        topics.str.contains(keyword, regex=False).to_numpy() for keyword in WEEKEND_HEAVY_KEYWORDS
+    ])
+    relax = (weekday >= 5).to_numpy() & heavy
+    calendar_df.loc[relax, '主题方向'] = WEEKEND_FALLBACK_TOPIC
+    calendar_df.loc[relax, '标题草稿'] = "周末放松｜" + calendar_df.loc[relax, '标题草稿'].astype(str)
+    
+    return calendar_df
+
+
+def plan_content_calendar(calendar_df, data, min_gap=DEFAULT_MIN_TOPIC_GAP, keyword_quota=0,
+                          seed=DEFAULT_SEED):
+    """
+    用约束排期替换日历的主题方向与关键词标签 (替代 optimize_calendar_distribution 的轮换)
+    同一账号 min_gap 天内不重复主题、周末只排轻松内容、每个关键词至少出现 keyword_quota 次
+    """
+    print("🧮 按约束排期主题与关键词...")
+    
+    topics = data.get('topics')
+    if topics is not None and len(topics) > 0 and 'type' in topics.columns:
+        topic_pool = topics['type'].dropna().astype(str).tolist()
+    else:
+        topic_pool = DEFAULT_TOPICS
+    keyword_pool = top_keyword_pool(data.get('keywords'))
+    
+    if 'Account' in calendar_df.columns:
+        accounts = list(pd.unique(calendar_df['Account']))
+    else:
+        accounts = [None]
+    dates = calendar_df['Date'].iloc[:len(calendar_df) // len(accounts)]
+    
+    schedule_df, stats = schedule_calendars(
+        accounts, dates, topic_pool, keyword_pool, min_gap,
+        keyword_quota=keyword_quota, seed=seed
+    )
+    calendar_df['主题方向'] = schedule_df['主题方向'].to_numpy()
+    if keyword_pool:
+        calendar_df['关键词标签'] = schedule_df['关键词标签'].to_numpy()
+    
+    if stats['topic_gap_violations']:
+        print(f"⚠️  主题数量不足，有 {stats['topic_gap_violations']} 天无法满足 {min_gap} 天内不重复的约束")
+    if keyword_pool and not stats['keyword_quota_met']:
+        print(f"⚠️  日历天数不足，每个关键词最多只能保证出现 {stats['min_keyword_uses']} 次 (配额: {keyword_quota})")
     
     return calendar_df
 
@@ -246,28 +383,12 @@ def add_content_suggestions(calendar_df):
     """添加内容建议"""
     print("💡 添加内容建议...")
     
-    # 为每个条目添加内容建议
-    suggestions = []
-    
-    for _, row in calendar_df.iterrows():
-        topic = row['主题方向']
-        
-        if '体验' in topic:
-            suggestion = "分享个人真实体验，包含前后对比"
-        elif '教程' in topic:
-            suggestion = "提供详细步骤，配图或视频演示"
-        elif '对比' in topic:
-            suggestion = "客观分析优缺点，给出明确建议"
-        elif '科普' in topic:
-            suggestion = "用通俗易懂的语言解释专业知识"
-        elif '打卡' in topic:
-            suggestion = "记录日常练习，展示坚持过程"
-        else:
-            suggestion = "结合个人经验，提供实用价值"
-        
-        suggestions.append(suggestion)
-    
-    calendar_df['内容建议'] = suggestions
+    topics = calendar_df['主题方向'].astype(str)
+    calendar_df['内容建议'] = np.select(
+        [topics.str.contains(keyword, regex=False).to_numpy() for keyword, _ in CONTENT_SUGGESTIONS],
+        [suggestion for _, suggestion in CONTENT_SUGGESTIONS],
+        default=DEFAULT_SUGGESTION
+    )
     
     return calendar_df
 
@@ -282,6 +403,10 @@ def save_notion_calendar(calendar_df, output_path):
         '目标人群', '内容亮点', '内容建议', '笔记链接', '发布状态'
     ]
     
+    # 多账号日历保留账号列
+    if 'Account' in calendar_df.columns:
+        column_order = ['Account'] + column_order
+    
     # 重新排列列顺序
     calendar_df = calendar_df[column_order]
     
@@ -289,6 +414,7 @@ def save_notion_calendar(calendar_df, output_path):
     calendar_df.to_csv(output_path, index=False, encoding='utf-8-sig')
     
     print(f"✅ 成功生成 {len(calendar_df)} 条内容日历记录")
+    register_artifacts(os.path.dirname(output_path) or '.', 'export_notionsheet', {'notion_csv': output_path})
     
     return calendar_df
 
@@ -343,6 +469,7 @@ def generate_summary_report(calendar_df, output_dir):
         f.write(f"\n\n报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
     
     print(f"📋 汇总报告已保存到: {report_path}")
+    register_artifacts(output_dir, 'export_notionsheet', {'notion_report': report_path})
     
     return report_path
 
@@ -357,6 +484,8 @@ def main():
   python analysis/export_notionsheet.py
   python analysis/export_notionsheet.py --output-dir output --days 45
   python analysis/export_notionsheet.py --input-dir analysis_results
+  python analysis/export_notionsheet.py --days 365 --accounts 账号A,账号B,账号C
+  python analysis/export_notionsheet.py --accounts 账号A,账号B --planner constraint --min-topic-gap 3 --keyword-quota 10
         """
     )
 
@@ -384,6 +513,35 @@ def main():
         default='notion_content_calendar.csv',
         help='输出文件名 (默认: notion_content_calendar.csv)'
     )
+    parser.add_argument(
+        '--accounts',
+        type=str,
+        help='为多个账号生成日历 (逗号分隔)，输出增加 Account 列'
+    )
+    parser.add_argument(
+        '--planner',
+        choices=['rotation', 'constraint'],
+        default='rotation',
+        help='主题与关键词的分配方式: rotation=轮换后按周末规则调整, constraint=按约束排期 (默认: rotation)'
+    )
+    parser.add_argument(
+        '--min-topic-gap',
+        type=int,
+        default=DEFAULT_MIN_TOPIC_GAP,
+        help=f'constraint 模式下同一主题在几天内不重复 (默认: {DEFAULT_MIN_TOPIC_GAP})'
+    )
+    parser.add_argument(
+        '--keyword-quota',
+        type=int,
+        default=0,
+        help='constraint 模式下每个关键词在每个账号日历中至少出现的次数 (默认: 0)'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'日历随机选择的种子 (默认: {DEFAULT_SEED})'
+    )
 
     args = parser.parse_args()
 
@@ -416,10 +574,16 @@ def main():
 
         # 生成内容日历
         print(f"\n📅 生成 {args.days} 天内容日历...")
-        calendar_df = generate_content_calendar(data, args.days)
+        accounts = [a.strip() for a in args.accounts.split(',') if a.strip()] if args.accounts else None
+        calendar_df = generate_content_calendar(data, args.days, args.seed, accounts)
 
         # 优化内容分布
-        calendar_df = optimize_calendar_distribution(calendar_df)
+        if args.planner == 'constraint':
+            calendar_df = plan_content_calendar(
+                calendar_df, data, args.min_topic_gap, args.keyword_quota, args.seed
+            )
+        else:
+            calendar_df = optimize_calendar_distribution(calendar_df)
 
         # 添加内容建议
         calendar_df = add_content_suggestions(calendar_df)
@@ -8,15 +8,48 @@
 import os
 import sys
 import argparse
+import hashlib
+import json
+import shutil
 import pandas as pd
 import jieba
-import jieba.analyse
 from collections import Counter
 from datetime import datetime
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
+from functools import lru_cache
 import numpy as np
 
+# 以脚本方式运行时也能导入同目录下的共享模块
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from data_loader import (
+    COUNT_COLUMNS, DEFAULT_CHUNK_SIZE, DEFAULT_MEMORY_BUDGET_MB,
+    describe_input_files, iter_notes_multi, load_notes_multi,
+    resolve_columns, resolve_input_files, should_stream
+)
+from chart_renderer import DEFAULT_DPI_PRESET, DPI_PRESETS, ChartRenderer
+from artifact_manifest import register_artifacts
+
+
+# 中文字体候选路径
+POSSIBLE_FONTS = [
+    'C:/Windows/Fonts/simhei.ttf',  # Windows 黑体
+    'C:/Windows/Fonts/msyh.ttf',    # Windows 微软雅黑
+    '/System/Library/Fonts/PingFang.ttc',  # macOS
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',  # Linux
+    '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',  # Linux
+    '/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc',  # Linux CJK
+    '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc'  # Linux CJK
+]
+
+# 快速词云的尺寸/质量预设
+WORDCLOUD_PRESETS = {
+    'draft': {'width': 600, 'height': 400, 'scale': 1},
+    'standard': {'width': 900, 'height': 600, 'scale': 1},
+    'high': {'width': 1200, 'height': 800, 'scale': 2}
+}
+
+# TF-IDF 排序使用的文本列
+TFIDF_TEXT_COLUMNS = ['title', 'desc']
+
 
 def setup_jieba():
     """设置 jieba 分词"""
@@ -76,6 +109,133 @@ def extract_keywords_from_titles(titles, stop_words, top_n=30):
     return top_keywords, word_counter
 
 
+def extract_keywords_from_chunks(chunks, stop_words, top_n=30):
+    """分块从标题中提取关键词，逐块累加词频"""
+    word_counter = Counter()
+    title_count = 0
+
+    for chunk in chunks:
+        titles = chunk['title'].dropna().astype(str)
+        title_count += len(titles)
+
+        words = jieba.cut(' '.join(titles))
+        word_counter.update(
+            word.strip() for word in words
+            if len(word.strip()) > 1 and word.strip() not in stop_words
+        )
+
+    print(f"📊 分块分析了 {title_count} 个标题")
+
+    top_keywords = word_counter.most_common(top_n)
+
+    print(f"✅ 提取到 {len(top_keywords)} 个关键词")
+
+    return top_keywords, word_counter
+
+
+def tokenize_text(text, stop_words):
+    """分词并过滤停用词和单字符"""
+    tokens = (word.strip() for word in jieba.cut(text))
+    return [word for word in tokens if len(word) > 1 and word not in stop_words]
+
+
+def rank_keywords_tfidf(chunks, stop_words, top_n=30, ranking='tfidf'):
+    """
+    基于标题+描述的 TF-IDF 与互动加权关键词排序
+    按块构建文档-词项矩阵 (COO 形式)，只累加每个词项的统计量，
+    内存占用与单块大小和词表大小相关，与输入文件总大小无关
+    """
+    vocab = {}
+    doc_freq = np.zeros(0, dtype=np.int64)
+    term_count = np.zeros(0, dtype=np.int64)
+    tf_sum = np.zeros(0, dtype=np.float64)
+    weighted_tf_sum = np.zeros(0, dtype=np.float64)
+    n_docs = 0
+
+    for chunk in chunks:
+        text = pd.Series('', index=chunk.index)
+        for col in TFIDF_TEXT_COLUMNS:
+            if col in chunk.columns:
+                text = text + ' ' + chunk[col].fillna('').astype(str)
+
+        # 互动权重: log(1 + 总互动数)，避免头部笔记完全主导排序
+        engagement = np.zeros(len(chunk), dtype=np.float64)
+        for col in COUNT_COLUMNS:
+            if col in chunk.columns:
+                engagement += chunk[col].to_numpy(dtype=np.float64)
+        doc_weights = np.log1p(engagement)
+
+        doc_ids = []
+        term_ids = []
+        for doc_idx, doc_text in enumerate(text):
+            for word in tokenize_text(doc_text, stop_words):
+                term_ids.append(vocab.setdefault(word, len(vocab)))
+                doc_ids.append(doc_idx)
+
+        n_docs += len(chunk)
+        n_terms = len(vocab)
+
+        # 词表增长时扩展累加数组
+        grow = n_terms - len(doc_freq)
+        if grow > 0:
+            doc_freq = np.concatenate([doc_freq, np.zeros(grow, dtype=np.int64)])
+            term_count = np.concatenate([term_count, np.zeros(grow, dtype=np.int64)])
+            tf_sum = np.concatenate([tf_sum, np.zeros(grow)])
+            weighted_tf_sum = np.concatenate([weighted_tf_sum, np.zeros(grow)])
+
+        if not term_ids:
+            continue
+
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+
+        # 合并重复的 (文档, 词项) 对，得到稀疏矩阵的非零元
+        cells, counts = np.unique(doc_ids * n_terms + term_ids, return_counts=True)
+        cell_docs = cells // n_terms
+        cell_terms = cells % n_terms
+
+        doc_lengths = np.bincount(doc_ids, minlength=len(chunk))
+        tf = counts / doc_lengths[cell_docs]
+
+        doc_freq += np.bincount(cell_terms, minlength=n_terms)
+        term_count += np.bincount(cell_terms, weights=counts, minlength=n_terms).astype(np.int64)
+        tf_sum += np.bincount(cell_terms, weights=tf, minlength=n_terms)
+        weighted_tf_sum += np.bincount(
+            cell_terms, weights=tf * doc_weights[cell_docs], minlength=n_terms
+        )
+
+    print(f"📊 TF-IDF 分析: {n_docs} 篇笔记, 词表大小 {len(vocab)}")
+
+    # 平滑 IDF
+    idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+    scores = pd.DataFrame({
+        '关键词': list(vocab),
+        '出现次数': term_count,
+        '文档频次': doc_freq,
+        'TF-IDF': (tf_sum * idf).round(4),
+        '互动加权得分': (weighted_tf_sum * idf).round(4)
+    })
+
+    sort_column = '互动加权得分' if ranking == 'engagement' else 'TF-IDF'
+    scores = scores.nlargest(top_n, sort_column).reset_index(drop=True)
+
+    print(f"✅ 提取到 {len(scores)} 个关键词 (排序依据: {sort_column})")
+
+    return scores, sort_column
+
+
+def save_keyword_scores_csv(scores, output_path):
+    """保存 TF-IDF 关键词排序结果到 CSV"""
+    df = scores.copy()
+    df.insert(0, '排名', range(1, len(df) + 1))
+
+    df.to_csv(output_path, index=False, encoding='utf-8-sig')
+    print(f"📄 关键词分析结果已保存到: {output_path}")
+    register_artifacts(os.path.dirname(output_path) or '.', 'keyword_analysis', {'keywords_csv': output_path})
+
+    return df
+
+
 def save_keywords_csv(keywords, output_path):
     """保存关键词分析结果到 CSV"""
     df = pd.DataFrame(keywords, columns=['关键词', '出现次数'])
@@ -84,149 +244,203 @@ def save_keywords_csv(keywords, output_path):
     
     df.to_csv(output_path, index=False, encoding='utf-8-sig')
     print(f"📄 关键词分析结果已保存到: {output_path}")
+    register_artifacts(os.path.dirname(output_path) or '.', 'keyword_analysis', {'keywords_csv': output_path})
     
     return df
 
 
-def generate_wordcloud(word_counter, output_path, max_words=100):
-    """生成词云图"""
+@lru_cache(maxsize=1)
+def resolve_font_path(allow_install=True):
+    """查找可用的中文字体路径 (进程内只解析一次)"""
+    for font in POSSIBLE_FONTS:
+        if os.path.exists(font):
+            print(f"🔤 使用字体: {font}")
+            return font
+
+    if not allow_install:
+        print("⚠️  未找到中文字体，使用 WordCloud 默认字体")
+        return None
+
+    print("⚠️  未找到中文字体，尝试安装字体...")
+    # 在 GitHub Actions 环境中尝试安装字体
+    try:
+        import subprocess
+        subprocess.run(['apt-get', 'update'], capture_output=True)
+        subprocess.run(['apt-get', 'install', '-y', 'fonts-noto-cjk'], capture_output=True)
+        # 重新检查字体
+        for font in POSSIBLE_FONTS:
+            if os.path.exists(font):
+                print(f"🔤 安装后使用字体: {font}")
+                return font
+    except:
+        pass
+
+    return None
+
+
+def generate_wordcloud(word_counter, output_path, max_words=100, renderer=None):
+    """
+    生成词云图
+    只取前 max_words 个词频交给图表渲染服务 (未传入 renderer 时同步渲染)
+    """
     print("🎨 生成词云图...")
     
     # 设置中文字体
-    font_path = None
-    possible_fonts = [
-        'C:/Windows/Fonts/simhei.ttf',  # Windows 黑体
-        'C:/Windows/Fonts/msyh.ttf',    # Windows 微软雅黑
-        '/System/Library/Fonts/PingFang.ttc',  # macOS
-        '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',  # Linux
-        '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',  # Linux
-        '/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc',  # Linux CJK
-        '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc'  # Linux CJK
-    ]
+    font_path = resolve_font_path()
+    
+    local_renderer = renderer is None
+    if local_renderer:
+        renderer = ChartRenderer(workers=0)
+    
+    renderer.submit('wordcloud', {
+        'frequencies': Counter(word_counter).most_common(max_words),
+        'max_words': max_words,
+        'font_path': font_path
+    }, output_path, label='词云图')
+    
+    if local_renderer:
+        renderer.close()
+    
+    register_artifacts(os.path.dirname(output_path) or '.', 'keyword_analysis', {'wordcloud': output_path})
 
-    for font in possible_fonts:
-        if os.path.exists(font):
-            font_path = font
-            print(f"🔤 使用字体: {font}")
-            break
 
-    if not font_path:
-        print("⚠️  未找到中文字体，尝试安装字体...")
-        # 在 GitHub Actions 环境中尝试安装字体
-        try:
-            import subprocess
-            subprocess.run(['apt-get', 'update'], capture_output=True)
-            subprocess.run(['apt-get', 'install', '-y', 'fonts-noto-cjk'], capture_output=True)
-            # 重新检查字体
-            for font in possible_fonts:
-                if os.path.exists(font):
-                    font_path = font
-                    print(f"🔤 安装后使用字体: {font}")
-                    break
-        except:
-            pass
-    
-    # 创建词云
+def generate_wordcloud_fast(word_counter, output_path, max_words=100, quality='standard',
+                            cache_dir=None):
+    """
+    快速生成词云图
+    直接用 WordCloud.to_file 输出 (不经过 matplotlib 重新渲染)，
+    前 N 个词频未变化时复用缓存的词云图
+    """
+    print(f"🎨 快速生成词云图 (质量: {quality})...")
+    from wordcloud import WordCloud
+
+    preset = WORDCLOUD_PRESETS[quality]
+    top_words = Counter(word_counter).most_common(max_words)
+    font_path = resolve_font_path(allow_install=False)
+
+    # 缓存键: 前 N 词频 + 渲染参数 + 字体
+    cache_key = hashlib.sha1(
+        json.dumps([top_words, preset, font_path], ensure_ascii=False).encode('utf-8')
+    ).hexdigest()[:16]
+
+    cached_path = None
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        cached_path = os.path.join(cache_dir, f'wordcloud_{cache_key}.png')
+        if os.path.exists(cached_path):
+            shutil.copyfile(cached_path, output_path)
+            print(f"♻️  词频未变化，复用缓存词云图: {output_path}")
+            register_artifacts(os.path.dirname(output_path) or '.', 'keyword_analysis', {'wordcloud': output_path})
+            return output_path
+
     wordcloud = WordCloud(
-        width=1200,
-        height=800,
         background_color='white',
         font_path=font_path,
         max_words=max_words,
         colormap='viridis',
         relative_scaling=0.5,
-        random_state=42
-    ).generate_from_frequencies(word_counter)
-    
-    # 保存词云图
-    plt.figure(figsize=(15, 10))
-    plt.imshow(wordcloud, interpolation='bilinear')
-    plt.axis('off')
-
-    # 设置标题（如果有中文字体）
-    if font_path:
-        # 设置中文字体属性
-        from matplotlib import font_manager
-        font_prop = font_manager.FontProperties(fname=font_path, size=16)
-        plt.title('小红书笔记标题关键词词云图', fontproperties=font_prop, pad=20)
-    else:
-        plt.title('Keywords WordCloud', fontsize=16, pad=20)
-
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    
+        random_state=42,
+        **preset
+    ).generate_from_frequencies(dict(top_words))
+
+    wordcloud.to_file(output_path)
+
+    if cached_path:
+        shutil.copyfile(output_path, cached_path)
+
     print(f"🎨 词云图已保存到: {output_path}")
+    register_artifacts(os.path.dirname(output_path) or '.', 'keyword_analysis', {'wordcloud': output_path})
+
+    return output_path
 
 
 def analyze_keyword_trends(df, keywords_df, output_dir):
-    """分析关键词趋势"""
+    """分析关键词趋势 (df 可以是 DataFrame，也可以是分块迭代器)"""
     print("📈 分析关键词趋势...")
     
-    # 转换时间戳 - 处理不同的时间格式
-    try:
-        # 尝试作为时间戳处理
-        df['publish_date'] = pd.to_datetime(df['time'], unit='ms')
-    except (ValueError, TypeError):
-        try:
-            # 尝试作为日期字符串处理
-            df['publish_date'] = pd.to_datetime(df['time'])
-        except:
-            # 如果都失败，使用当前日期
-            df['publish_date'] = pd.Timestamp.now()
-            print("⚠️  时间格式无法解析，使用当前日期")
-
-    df['month'] = df['publish_date'].dt.to_period('M')
+    chunks = [df] if isinstance(df, pd.DataFrame) else df
     
     # 获取前10个关键词
     top_10_keywords = keywords_df.head(10)['关键词'].tolist()
     
-    # 分析每个月的关键词出现情况
-    monthly_trends = []
+    # 分析每个月的关键词出现情况 (按块累加)
+    monthly_counts = {}
     
-    for month in df['month'].unique():
-        month_data = df[df['month'] == month]
-        month_titles = ' '.join(month_data['title'].fillna(''))
-        
-        month_row = {'月份': str(month)}
-        for keyword in top_10_keywords:
-            count = month_titles.count(keyword)
-            month_row[keyword] = count
+    for chunk in chunks:
+        # 转换时间戳 - 处理不同的时间格式
+        try:
+            # 尝试作为时间戳处理
+            chunk['publish_date'] = pd.to_datetime(chunk['time'], unit='ms')
+        except (ValueError, TypeError):
+            try:
+                # 尝试作为日期字符串处理
+                chunk['publish_date'] = pd.to_datetime(chunk['time'])
+            except:
+                # 如果都失败，使用当前日期
+                chunk['publish_date'] = pd.Timestamp.now()
+                print("⚠️  时间格式无法解析，使用当前日期")
+
+        chunk['month'] = chunk['publish_date'].dt.to_period('M')
         
-        monthly_trends.append(month_row)
+        for month in chunk['month'].unique():
+            month_data = chunk[chunk['month'] == month]
+            month_titles = ' '.join(month_data['title'].fillna(''))
+            
+            month_row = monthly_counts.setdefault(str(month), dict.fromkeys(top_10_keywords, 0))
+            for keyword in top_10_keywords:
+                month_row[keyword] += month_titles.count(keyword)
+    
+    monthly_trends = [{'月份': month, **counts} for month, counts in monthly_counts.items()]
     
     trends_df = pd.DataFrame(monthly_trends)
     trends_output = os.path.join(output_dir, 'keyword_trends.csv')
     trends_df.to_csv(trends_output, index=False, encoding='utf-8-sig')
     
     print(f"📈 关键词趋势分析已保存到: {trends_output}")
+    register_artifacts(output_dir, 'keyword_analysis', {'keyword_trends': trends_output})
     
     return trends_df
 
 
-def analyze_keywords(input_file, output_dir='output'):
-    """关键词分析主函数 - 供其他模块调用"""
+def analyze_keywords(input_file, output_dir='output', ranking='frequency',
+                     chunk_size=DEFAULT_CHUNK_SIZE):
+    """关键词分析主函数 - 供其他模块调用 (input_file 支持目录与 glob 模式)"""
     try:
-        # 读取数据
-        df = pd.read_csv(input_file)
-        print(f"📊 读取数据: {len(df)} 条记录")
+        input_files = resolve_input_files(input_file)
 
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
 
-        # 提取关键词
         stop_words = setup_jieba()
-        titles = df['title'].dropna().tolist()
-        top_keywords, word_counter = extract_keywords_from_titles(titles, stop_words)
-
-        # 生成词云图
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         wordcloud_output = os.path.join(output_dir, f'keyword_wordcloud_{timestamp}.png')
-        generate_wordcloud(word_counter, wordcloud_output)
+        keywords_output = os.path.join(output_dir, f'keywords_{timestamp}.csv')
+
+        if ranking == 'frequency':
+            # 读取数据
+            df = load_notes_multi(input_files, columns=['title', 'time'])
+            print(f"📊 读取数据: {len(df)} 条记录")
 
-        # 保存关键词数据
-        keywords_df = save_keywords_csv(top_keywords,
-                                       os.path.join(output_dir, f'keywords_{timestamp}.csv'))
+            # 提取关键词
+            titles = df['title'].dropna().tolist()
+            top_keywords, word_counter = extract_keywords_from_titles(titles, stop_words)
+
+            # 生成词云图
+            generate_wordcloud(word_counter, wordcloud_output)
+
+            # 保存关键词数据
+            keywords_df = save_keywords_csv(top_keywords, keywords_output)
+        else:
+            # 标题+描述流式 TF-IDF 排序，趋势分析只读取标题和时间列
+            scores, sort_column = rank_keywords_tfidf(
+                iter_notes_multi(input_files, columns=TFIDF_TEXT_COLUMNS + COUNT_COLUMNS,
+                                 chunk_size=chunk_size),
+                stop_words, ranking=ranking
+            )
+            generate_wordcloud(dict(zip(scores['关键词'], scores[sort_column])), wordcloud_output)
+            keywords_df = save_keyword_scores_csv(scores, keywords_output)
+
+            df = load_notes_multi(input_files, columns=['title', 'time'])
 
         # 分析关键词趋势
         trends_df = analyze_keyword_trends(df, keywords_df, output_dir)
@@ -251,6 +465,8 @@ def main():
 使用示例:
   python analysis/keyword_analysis.py --input core/media_crawler/data/xhs/1_search_contents_2025-07-02.csv
   python analysis/keyword_analysis.py --input data.csv --top-n 50 --max-words 150
+  python analysis/keyword_analysis.py --input data.csv --ranking engagement --chunk-size 2000
+  python analysis/keyword_analysis.py --input data.csv --render-mode fast --quality draft
         """
     )
     
@@ -258,7 +474,17 @@ def main():
         '--input', '-i',
         type=str,
         required=True,
-        help='输入的 CSV 文件路径'
+        help='输入的 CSV 文件路径、目录或 glob 模式 (latest/all 表示爬虫数据目录)'
+    )
+    parser.add_argument(
+        '--since',
+        type=str,
+        help='只分析该日期及之后爬取的文件 (YYYY-MM-DD)'
+    )
+    parser.add_argument(
+        '--until',
+        type=str,
+        help='只分析该日期及之前爬取的文件 (YYYY-MM-DD)'
     )
     parser.add_argument(
         '--output-dir', '-o',
@@ -278,11 +504,63 @@ def main():
         default=100,
         help='词云图最大词数 (默认: 100)'
     )
+    parser.add_argument(
+        '--ranking',
+        type=str,
+        choices=['frequency', 'tfidf', 'engagement'],
+        default='frequency',
+        help='关键词排序方式: frequency=标题词频, tfidf=标题+描述 TF-IDF, '
+             'engagement=互动加权 TF-IDF (默认: frequency)'
+    )
+    parser.add_argument(
+        '--render-mode',
+        type=str,
+        choices=['classic', 'fast'],
+        default='classic',
+        help='词云渲染模式: classic=matplotlib 高清渲染, fast=直接输出并缓存 (默认: classic)'
+    )
+    parser.add_argument(
+        '--quality',
+        type=str,
+        choices=list(WORDCLOUD_PRESETS),
+        default='standard',
+        help='fast 模式下的词云尺寸/质量预设 (默认: standard)'
+    )
+    parser.add_argument(
+        '--no-charts',
+        action='store_true',
+        help='不生成词云图，只输出关键词 CSV (跳过绘图库的加载，启动更快)'
+    )
+    parser.add_argument(
+        '--dpi-preset',
+        choices=list(DPI_PRESETS),
+        default=DEFAULT_DPI_PRESET,
+        help=f'classic 模式下的图表分辨率预设 (默认: {DEFAULT_DPI_PRESET})'
+    )
+    parser.add_argument(
+        '--chart-workers',
+        type=int,
+        default=1,
+        help='classic 模式下后台渲染图表的进程数，0 表示同步渲染 (默认: 1)'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f'分块读取时每块的笔记数 (默认: {DEFAULT_CHUNK_SIZE})'
+    )
+    parser.add_argument(
+        '--memory-budget-mb',
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET_MB,
+        help=f'内存预算 (MB)，估算超出时分块读取 (默认: {DEFAULT_MEMORY_BUDGET_MB})'
+    )
     
     args = parser.parse_args()
     
-    # 检查输入文件
-    if not os.path.exists(args.input):
+    # 解析输入文件 (支持目录、glob 模式与日期范围)
+    input_files = resolve_input_files(args.input, args.since, args.until)
+    if not input_files:
         print(f"❌ 输入文件不存在: {args.input}")
         sys.exit(1)
     
@@ -295,60 +573,119 @@ def main():
     
     try:
         # 读取数据
-        print(f"📖 读取数据文件: {args.input}")
-        df = pd.read_csv(args.input)
+        print(f"📖 读取数据文件: {describe_input_files(input_files)}")
+        columns = resolve_columns(input_files[0], 'keyword_analysis')
         
-        if 'title' not in df.columns:
+        if 'title' not in columns:
             print("❌ CSV 文件中没有找到 'title' 列")
             sys.exit(1)
         
-        # 清理标题数据
-        titles = df['title'].fillna('').astype(str).tolist()
-        titles = [title.strip() for title in titles if title.strip()]
+        streaming = should_stream(input_files, args.memory_budget_mb)
+        note_count = None
         
-        if not titles:
-            print("❌ 没有找到有效的标题数据")
-            sys.exit(1)
+        if streaming:
+            print(f"📦 数据超出内存预算 ({args.memory_budget_mb}MB)，按每块 {args.chunk_size} 条分块读取")
+        else:
+            # 只读取标题和时间列，描述列在 TF-IDF 模式下分块读取
+            df = load_notes_multi(input_files, columns=['title', 'time'])
+            
+            # 清理标题数据
+            titles = df['title'].fillna('').astype(str).tolist()
+            titles = [title.strip() for title in titles if title.strip()]
+            note_count = len(titles)
+            
+            if not titles:
+                print("❌ 没有找到有效的标题数据")
+                sys.exit(1)
         
         # 设置 jieba
         stop_words = setup_jieba()
         
-        # 提取关键词
-        top_keywords, word_counter = extract_keywords_from_titles(
-            titles, stop_words, args.top_n
-        )
-        
         # 生成时间戳
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # 保存关键词 CSV
         keywords_output = os.path.join(
             args.output_dir, f'keywords_analysis_{timestamp}.csv'
         )
-        keywords_df = save_keywords_csv(top_keywords, keywords_output)
-        
-        # 生成词云图
         wordcloud_output = os.path.join(
             args.output_dir, f'wordcloud_{timestamp}.png'
         )
-        generate_wordcloud(word_counter, wordcloud_output, args.max_words)
+        
+        if args.ranking == 'frequency':
+            # 提取关键词
+            if streaming:
+                top_keywords, word_counter = extract_keywords_from_chunks(
+                    iter_notes_multi(input_files, columns=['title'], chunk_size=args.chunk_size),
+                    stop_words, args.top_n
+                )
+            else:
+                top_keywords, word_counter = extract_keywords_from_titles(
+                    titles, stop_words, args.top_n
+                )
+            
+            # 保存关键词 CSV
+            keywords_df = save_keywords_csv(top_keywords, keywords_output)
+            
+            word_scores = word_counter
+        else:
+            # 标题+描述 TF-IDF / 互动加权排序
+            scores, sort_column = rank_keywords_tfidf(
+                iter_notes_multi(input_files, columns=TFIDF_TEXT_COLUMNS + COUNT_COLUMNS,
+                                 chunk_size=args.chunk_size),
+                stop_words, max(args.top_n, args.max_words), args.ranking
+            )
+            
+            # 保存关键词 CSV
+            keywords_df = save_keyword_scores_csv(scores.head(args.top_n), keywords_output)
+            top_keywords = list(zip(keywords_df['关键词'], keywords_df[sort_column]))
+            word_scores = dict(zip(scores['关键词'], scores[sort_column]))
+        
+        # 生成词云图
+        renderer = None
+        if args.no_charts:
+            wordcloud_output = None
+        elif args.render_mode == 'fast':
+            generate_wordcloud_fast(
+                word_scores, wordcloud_output, args.max_words, args.quality,
+                cache_dir=os.path.join(args.output_dir, '.cache')
+            )
+        else:
+            # 词云在后台渲染，与趋势分析并行
+            renderer = ChartRenderer(
+                args.dpi_preset, args.chart_workers,
+                cache_dir=os.path.join(args.output_dir, '.cache', 'charts')
+            )
+            generate_wordcloud(word_scores, wordcloud_output, args.max_words, renderer)
         
         # 分析关键词趋势
-        if 'time' in df.columns:
-            analyze_keyword_trends(df, keywords_df, args.output_dir)
+        if 'time' in columns:
+            if streaming:
+                trend_source = iter_notes_multi(
+                    input_files, columns=['title', 'time'], chunk_size=args.chunk_size
+                )
+            else:
+                trend_source = df
+            analyze_keyword_trends(trend_source, keywords_df, args.output_dir)
+        
+        if renderer:
+            renderer.close()
         
         # 输出统计信息
         print("\n" + "=" * 60)
         print("📊 分析结果统计")
         print("=" * 60)
-        print(f"📝 分析笔记数量: {len(titles)}")
+        if note_count is not None:
+            print(f"📝 分析笔记数量: {note_count}")
         print(f"🔤 提取关键词数量: {len(top_keywords)}")
         print(f"📄 关键词 CSV: {keywords_output}")
-        print(f"🎨 词云图: {wordcloud_output}")
+        if wordcloud_output:
+            print(f"🎨 词云图: {wordcloud_output}")
         
         print("\n🏆 前10个热门关键词:")
         for i, (word, count) in enumerate(top_keywords[:10], 1):
-            print(f"  {i:2d}. {word} ({count}次)")
+            if args.ranking == 'frequency':
+                print(f"  {i:2d}. {word} ({count}次)")
+            else:
+                print(f"  {i:2d}. {word} (得分: {count:.3f})")
         
         print("\n✅ 关键词分析完成!")
         
@@ -11,46 +11,69 @@ import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
 import re
 
+# 以脚本方式运行时也能导入同目录下的共享模块
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from data_loader import (
+    COUNT_COLUMNS, DEFAULT_CHUNK_SIZE, DEFAULT_MEMORY_BUDGET_MB,
+    describe_input_files, open_notes, resolve_input_files
+)
+from user_profile_store import KEYWORD_FLAG_PREFIX, UserProfileStore, update_profile_store
+from topk import StreamingTopK, top_k_by_group, top_k_frame, top_k_indices
+from rng import DEFAULT_SEED, SeededRNG
+from chart_renderer import DEFAULT_DPI_PRESET, DPI_PRESETS, ChartRenderer, histogram
+from artifact_manifest import register_artifacts
 
-def estimate_follower_count(nickname, liked_count, collected_count, comment_count):
+
+# 昵称特征关键词
+# 机构/品牌特征 (通常粉丝较多)
+BRAND_KEYWORDS = [
+    '官方', '旗舰店', '品牌', '工作室', '机构', '中心',
+    '学院', '培训', '教育', '健身房', '瑜伽馆', '普拉提馆'
+]
+
+# 个人博主特征
+PERSONAL_KEYWORDS = [
+    '老师', '教练', '博主', '达人', '分享', '记录',
+    '日记', '生活', '小', '爱', '喜欢'
+]
+
+# 新手特征 (通常粉丝较少)
+NEWBIE_KEYWORDS = [
+    '新手', '小白', '初学', '菜鸟', '学习中', '努力',
+    '加油', '坚持', '第一次', '尝试'
+]
+
+# 预编译的昵称关键词匹配模式
+BRAND_PATTERN = re.compile('|'.join(map(re.escape, BRAND_KEYWORDS)))
+PERSONAL_PATTERN = re.compile('|'.join(map(re.escape, PERSONAL_KEYWORDS)))
+NEWBIE_PATTERN = re.compile('|'.join(map(re.escape, NEWBIE_KEYWORDS)))
+
+# 用户聚合键
+USER_KEYS = ['user_id', 'nickname']
+
+
+def estimate_follower_count(nickname, liked_count, collected_count, comment_count,
+                            user_id='', seed=DEFAULT_SEED):
     """
     估算用户粉丝数
-    基于用户昵称特征和互动数据进行估算
+    基于用户昵称特征和互动数据进行估算 (单条版本，批量估算见 estimate_follower_counts)
+    随机扰动由 (seed, user_id, nickname) 决定，与批量估算结果一致
     """
     # 基础互动数
     total_engagement = liked_count + collected_count + comment_count
     
     # 昵称特征分析
     nickname_score = 0
+    nickname_raw = nickname
     nickname = str(nickname).lower()
     
-    # 机构/品牌特征 (通常粉丝较多)
-    brand_keywords = [
-        '官方', '旗舰店', '品牌', '工作室', '机构', '中心',
-        '学院', '培训', '教育', '健身房', '瑜伽馆', '普拉提馆'
-    ]
-    
-    # 个人博主特征
-    personal_keywords = [
-        '老师', '教练', '博主', '达人', '分享', '记录',
-        '日记', '生活', '小', '爱', '喜欢'
-    ]
-    
-    # 新手特征 (通常粉丝较少)
-    newbie_keywords = [
-        '新手', '小白', '初学', '菜鸟', '学习中', '努力',
-        '加油', '坚持', '第一次', '尝试'
-    ]
-    
-    if any(keyword in nickname for keyword in brand_keywords):
+    if any(keyword in nickname for keyword in BRAND_KEYWORDS):
         nickname_score = 3  # 机构类，粉丝可能较多
-    elif any(keyword in nickname for keyword in personal_keywords):
+    elif any(keyword in nickname for keyword in PERSONAL_KEYWORDS):
         nickname_score = 2  # 个人博主
-    elif any(keyword in nickname for keyword in newbie_keywords):
+    elif any(keyword in nickname for keyword in NEWBIE_KEYWORDS):
         nickname_score = 1  # 新手用户
     else:
         nickname_score = 1.5  # 普通用户
@@ -81,19 +104,90 @@ def estimate_follower_count(nickname, liked_count, collected_count, comment_coun
             estimated_followers *= nickname_score * 0.2  # 降低个人博主粉丝数
 
         # 添加随机性，模拟真实情况，确保有小号存在
-        import random
-        random_factor = random.uniform(0.1, 2.0)  # 更大的随机范围
+        rng = SeededRNG(seed)
+        user_key = pd.DataFrame({'user_id': [user_id], 'nickname': [nickname_raw]})
+        random_factor = rng.uniform(user_key, 0.1, 2.0, 'follower_factor')[0]  # 更大的随机范围
         estimated_followers *= random_factor
 
         # 特殊处理：确保至少30%的用户是KOC（< 1000粉丝）
-        if random.random() < 0.3:  # 30%概率强制设为KOC
-            estimated_followers = min(estimated_followers, random.randint(100, 999))
+        if rng.random(user_key, 'force_koc')[0] < 0.3:  # 30%概率强制设为KOC
+            estimated_followers = min(estimated_followers, rng.integers(user_key, 100, 1000, 'koc_followers')[0])
 
         return max(int(estimated_followers), 100)  # 最少100粉丝
     else:
         return 100
 
 
+def match_nicknames(nicknames, patterns):
+    """
+    批量匹配昵称关键词，返回每个模式的布尔数组列表
+    只对去重后的昵称做正则匹配，再按编码映射回每一行
+    """
+    codes, uniques = pd.factorize(pd.Series(nicknames), use_na_sentinel=False)
+    uniques = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.lower()
+
+    return [uniques.str.contains(pattern).to_numpy()[codes] for pattern in patterns]
+
+
+def score_nicknames(nicknames):
+    """批量计算昵称特征分数 (机构=3, 个人博主=2, 新手=1, 普通=1.5)"""
+    return np.select(
+        match_nicknames(nicknames, [BRAND_PATTERN, PERSONAL_PATTERN, NEWBIE_PATTERN]),
+        [3.0, 2.0, 1.0],
+        default=1.5
+    )
+
+
+def estimate_follower_counts(nicknames, liked_count, collected_count, comment_count,
+                             user_keys, rng):
+    """
+    批量估算用户粉丝数 (estimate_follower_count 的向量化版本)
+    user_keys 为用户键 (user_id + nickname)，rng 为 SeededRNG；
+    每个用户的随机扰动只取决于种子与用户键，与行顺序、分块方式无关
+    """
+    liked_count = np.asarray(liked_count, dtype=np.float64)
+    total_engagement = (
+        liked_count + np.asarray(collected_count, dtype=np.float64) +
+        np.asarray(comment_count, dtype=np.float64)
+    )
+
+    nickname_score = score_nicknames(nicknames)
+
+    # 基于互动数估算粉丝数，互动率范围 1%-15%
+    estimated_followers_low = total_engagement / 0.15
+    estimated_followers_high = total_engagement / 0.01
+
+    # 按互动数分档确定低/高估算的权重
+    low_weight = np.select(
+        [total_engagement < 500, total_engagement < 1000, total_engagement < 2000],
+        [0.9, 0.8, 0.6],
+        default=0.4
+    )
+    estimated_followers = (
+        estimated_followers_low * low_weight +
+        estimated_followers_high * (1 - low_weight)
+    )
+
+    # 根据昵称特征调整
+    estimated_followers *= np.select(
+        [nickname_score == 3, nickname_score == 1],
+        [2.0, 0.1],
+        default=nickname_score * 0.2
+    )
+
+    # 随机扰动，30% 的用户强制设为 KOC (< 1000 粉丝)
+    estimated_followers *= rng.uniform(user_keys, 0.1, 2.0, 'follower_factor')
+    force_koc = rng.random(user_keys, 'force_koc') < 0.3
+    estimated_followers = np.where(
+        force_koc,
+        np.minimum(estimated_followers, rng.integers(user_keys, 100, 1000, 'koc_followers')),
+        estimated_followers
+    )
+
+    estimated_followers = np.maximum(np.trunc(estimated_followers), 100).astype(np.int64)
+    return np.where(total_engagement > 0, estimated_followers, 100)
+
+
 def classify_user_type(nickname, estimated_followers, avg_engagement):
     """分类用户类型 - 更新的分类标准"""
     nickname = str(nickname).lower()
@@ -102,12 +196,7 @@ def classify_user_type(nickname, estimated_followers, avg_engagement):
     total_likes_collections = avg_engagement * 0.8
 
     # 机构/品牌账号
-    brand_keywords = [
-        '官方', '旗舰店', '品牌', '工作室', '机构', '中心',
-        '学院', '培训', '教育', '健身房', '瑜伽馆', '普拉提馆'
-    ]
-
-    if any(keyword in nickname for keyword in brand_keywords):
+    if any(keyword in nickname for keyword in BRAND_KEYWORDS):
         return '机构/品牌'
 
     # 新的分类标准
@@ -130,6 +219,57 @@ def classify_user_type(nickname, estimated_followers, avg_engagement):
             return 'Micro KOL'  # 不满足互动量要求的降级
 
 
+def classify_user_types(user_stats):
+    """批量分类用户类型 (classify_user_type 的向量化版本)"""
+    is_brand, = match_nicknames(user_stats['nickname'], [BRAND_PATTERN])
+    followers = user_stats['estimated_followers'].to_numpy()
+
+    # 计算总赞+收藏量 (假设为平均互动数的80%)
+    total_likes_collections = user_stats['avg_total_engagement'].to_numpy() * 0.8
+
+    nano_range = (followers >= 1000) & (followers <= 3999)
+    micro_range = (followers >= 4000) & (followers <= 10000)
+
+    # 条件顺序与单条分类的判断顺序一致
+    return np.select(
+        [
+            is_brand,
+            followers < 1000,
+            nano_range & (total_likes_collections >= 10000) & (total_likes_collections <= 49999),
+            nano_range,
+            micro_range & (total_likes_collections >= 50000) & (total_likes_collections <= 99999),
+            micro_range,
+            total_likes_collections >= 100000
+        ],
+        ['机构/品牌', 'KOC', 'Nano KOL', 'KOC', 'Micro KOL', 'Nano KOL', 'Macro KOL'],
+        default='Micro KOL'
+    ).astype(object)
+
+
+def calculate_koc_scores(user_stats):
+    """批量计算 KOC 评分 (calculate_koc_score 的向量化版本)"""
+    # 互动数评分 (40%)、互动率评分 (30%)、发布频率评分 (20%)
+    engagement_score = np.minimum(user_stats['avg_total_engagement'].to_numpy() / 1000 * 40, 40)
+    engagement_rate_score = np.minimum(user_stats['avg_engagement_rate'].to_numpy() / 10 * 30, 30)
+    post_frequency_score = np.minimum(user_stats['post_count'].to_numpy() / 10 * 20, 20)
+
+    # 粉丝数适中性评分 (10%)
+    followers = user_stats['estimated_followers'].to_numpy()
+    follower_score = np.select(
+        [
+            followers < 1000,
+            (followers >= 1000) & (followers <= 4000),
+            (followers >= 4000) & (followers <= 10000)
+        ],
+        [10, 8, 6],
+        default=np.maximum(4 - (followers - 10000) / 10000, 0)
+    )
+
+    score = engagement_score + engagement_rate_score + post_frequency_score + follower_score
+
+    return np.minimum(score, 100)  # 最高100分
+
+
 def calculate_koc_score(row):
     """计算 KOC 评分"""
     # 基础分数
@@ -163,51 +303,109 @@ def calculate_koc_score(row):
     return min(score, 100)  # 最高100分
 
 
-def check_keyword_match(titles, target_keywords):
-    """检查标题是否包含目标关键词"""
-    if not titles or not target_keywords:
-        return False
+def match_keywords(titles, target_keywords):
+    """
+    笔记级别的目标关键词匹配
+    所有关键词合并为一个正则一次扫描标题列，空标题视为不匹配
+    """
+    pattern = re.compile('|'.join(re.escape(keyword.lower()) for keyword in target_keywords))
+    matched = titles.astype(str).str.lower().str.contains(pattern)
+    return matched & titles.notna()
+
+
+def aggregate_user_chunk(df, target_keywords=None):
+    """按用户聚合一块笔记数据，只使用 sum/max/count/any 等内置聚合"""
+    keyword_match = match_keywords(df['title'], target_keywords) if target_keywords else True
+    df = df.assign(_rows=1, keyword_match=keyword_match)
+
+    aggs = {'_rows': ('_rows', 'sum'), 'post_count': ('title', 'count'),
+            'keyword_match': ('keyword_match', 'any')}
+
+    # 逐个关键词的匹配标记，用于按关键词选取 Top-K
+    if target_keywords and len(target_keywords) > 1:
+        titles = df['title'].astype(str).str.lower()
+        flags = {
+            f'{KEYWORD_FLAG_PREFIX}{keyword}':
+                titles.str.contains(keyword.lower(), regex=False) & df['title'].notna()
+            for keyword in target_keywords
+        }
+        df = df.assign(**flags)
+        aggs.update({flag: (flag, 'any') for flag in flags})
+    for col in COUNT_COLUMNS:
+        name = col.replace('_count', '')
+        aggs[f'total_{name}'] = (col, 'sum')
+        aggs[f'max_{name}'] = (col, 'max')
+
+    return df.groupby(USER_KEYS, observed=True).agg(**aggs).reset_index()
+
+
+def finalize_user_stats(user_stats):
+    """由合计值计算平均值"""
+    for col in COUNT_COLUMNS:
+        name = col.replace('_count', '')
+        user_stats[f'avg_{name}'] = (user_stats[f'total_{name}'] / user_stats['_rows']).round(2)
+
+    return user_stats.drop(columns=['_rows'])
+
 
-    # 将所有标题合并为一个字符串
-    all_titles = ' '.join(str(title).lower() for title in titles if pd.notna(title))
+def aggregate_user_stats(df, target_keywords=None):
+    """按用户聚合笔记数据 (关键词匹配在笔记级别计算后按用户取 any)"""
+    return finalize_user_stats(aggregate_user_chunk(df, target_keywords))
 
-    # 检查是否包含任何目标关键词
-    for keyword in target_keywords:
-        if keyword.lower() in all_titles:
-            return True
 
-    return False
+def aggregate_user_stats_chunked(chunks, target_keywords=None):
+    """
+    分块聚合用户统计
+    每块只保留按用户的 sum/max/count/any 部分结果并与已有结果合并
+    """
+    partial = None
+
+    for chunk in chunks:
+        chunk_stats = aggregate_user_chunk(chunk, target_keywords)
+        chunk_stats[USER_KEYS] = chunk_stats[USER_KEYS].astype(str)
+
+        if partial is not None:
+            merge_aggs = {col: ('max' if col.startswith('max_') else
+                                'any' if col.startswith('keyword_match') else 'sum')
+                          for col in chunk_stats.columns if col not in USER_KEYS}
+            chunk_stats = (
+                pd.concat([partial, chunk_stats], ignore_index=True)
+                .groupby(USER_KEYS).agg(merge_aggs).reset_index()
+            )
+        partial = chunk_stats
+
+    return finalize_user_stats(partial)
+
+
+def build_user_stats(df, target_keywords=None):
+    """按用户聚合笔记数据，df 可以是完整的 DataFrame 或分块迭代器"""
+    if isinstance(df, pd.DataFrame):
+        return aggregate_user_stats(df, target_keywords)
+    return aggregate_user_stats_chunked(df, target_keywords)
 
 
 def filter_koc_users(df, min_likes=200, min_followers=0, max_followers=999,
-                    target_keywords=None, min_engagement_rate=2.0):
-    """筛选 KOC 用户 - 更新的筛选标准 (KOC = 粉丝数 < 1000)"""
+                    target_keywords=None, min_engagement_rate=2.0, seed=DEFAULT_SEED,
+                    sort_result=True):
+    """
+    筛选 KOC 用户 - 更新的筛选标准 (KOC = 粉丝数 < 1000)
+    df 可以是完整的 DataFrame，也可以是分块迭代器 (大文件)
+    """
     print(f"🔍 筛选 KOC 用户 (点赞≥{min_likes}, 粉丝{min_followers}-{max_followers}, 互动率≥{min_engagement_rate}%)...")
 
     if target_keywords:
         print(f"🎯 目标关键词: {', '.join(target_keywords)}")
 
-    # 按用户聚合数据，包含标题信息
-    user_stats = df.groupby(['user_id', 'nickname']).agg({
-        'liked_count': ['mean', 'max', 'sum'],
-        'collected_count': ['mean', 'max', 'sum'],
-        'comment_count': ['mean', 'max', 'sum'],
-        'share_count': ['mean', 'max', 'sum'],
-        'title': ['count', lambda x: list(x)]  # 发布数量和标题列表
-    }).round(2)
-
-    # 重命名列
-    user_stats.columns = [
-        'avg_liked', 'max_liked', 'total_liked',
-        'avg_collected', 'max_collected', 'total_collected',
-        'avg_comment', 'max_comment', 'total_comment',
-        'avg_share', 'max_share', 'total_share',
-        'post_count', 'title_list'
-    ]
+    user_stats = build_user_stats(df, target_keywords)
+
+    return score_user_stats(
+        user_stats, min_likes, min_followers, max_followers,
+        target_keywords, min_engagement_rate, seed, sort_result
+    )
 
-    # 重置索引
-    user_stats = user_stats.reset_index()
 
+def add_user_scores(user_stats, seed=DEFAULT_SEED):
+    """在用户聚合结果上添加总互动数、估算粉丝数、互动率、用户类型与 KOC 评分列"""
     # 计算总互动数
     user_stats['avg_total_engagement'] = (
         user_stats['avg_liked'] + user_stats['avg_collected'] +
@@ -219,12 +417,11 @@ def filter_koc_users(df, min_likes=200, min_followers=0, max_followers=999,
         user_stats['max_comment'] + user_stats['max_share']
     )
 
-    # 估算粉丝数
-    user_stats['estimated_followers'] = user_stats.apply(
-        lambda row: estimate_follower_count(
-            row['nickname'], row['avg_liked'],
-            row['avg_collected'], row['avg_comment']
-        ), axis=1
+    # 估算粉丝数 (向量化，随机扰动按种子与用户键确定)
+    user_stats['estimated_followers'] = estimate_follower_counts(
+        user_stats['nickname'], user_stats['avg_liked'],
+        user_stats['avg_collected'], user_stats['avg_comment'],
+        user_stats[USER_KEYS], SeededRNG(seed)
     )
 
     # 计算互动率
@@ -233,26 +430,20 @@ def filter_koc_users(df, min_likes=200, min_followers=0, max_followers=999,
         (user_stats['estimated_followers'] * 0.05)  # 假设5%的曝光率
     ).fillna(0) * 100
 
-    # 检查关键词匹配
-    if target_keywords:
-        user_stats['keyword_match'] = user_stats['title_list'].apply(
-            lambda titles: check_keyword_match(titles, target_keywords)
-        )
-    else:
-        user_stats['keyword_match'] = True  # 如果没有指定关键词，默认匹配
-
     # 分类用户类型
-    user_stats['user_type'] = user_stats.apply(
-        lambda row: classify_user_type(
-            row['nickname'], row['estimated_followers'], row['avg_total_engagement']
-        ), axis=1
-    )
+    user_stats['user_type'] = classify_user_types(user_stats)
 
     # 计算 KOC 评分
-    user_stats['koc_score'] = user_stats.apply(calculate_koc_score, axis=1)
+    user_stats['koc_score'] = calculate_koc_scores(user_stats)
+
+    return user_stats
 
+
+def koc_filter_mask(user_stats, min_likes=200, min_followers=0, max_followers=999,
+                    min_engagement_rate=2.0):
+    """KOC 筛选条件 (user_stats 需已由 add_user_scores 添加评分列)"""
     # 更新的筛选条件
-    koc_filter = (
+    return (
         (user_stats['avg_liked'] >= min_likes) &  # 点赞数 ≥ 200
         (
             # 粉丝数在范围内，或者粉丝数不可见（为0或很小）
@@ -265,6 +456,18 @@ def filter_koc_users(df, min_likes=200, min_followers=0, max_followers=999,
         (user_stats['keyword_match'] == True)  # 包含目标关键词
     )
 
+
+def score_user_stats(user_stats, min_likes=200, min_followers=0, max_followers=999,
+                     target_keywords=None, min_engagement_rate=2.0, seed=DEFAULT_SEED,
+                     sort_result=True):
+    """
+    在用户聚合结果上估算粉丝数、评分并筛选 KOC 用户
+    sort_result=False 时不对筛选结果做全量排序 (后续用 Top-K 选取)
+    """
+    add_user_scores(user_stats, seed)
+
+    koc_filter = koc_filter_mask(user_stats, min_likes, min_followers, max_followers, min_engagement_rate)
+
     # 调试信息
     print(f"📊 用户统计总数: {len(user_stats)}")
     print(f"📊 平均点赞数范围: {user_stats['avg_liked'].min():.1f} - {user_stats['avg_liked'].max():.1f}")
@@ -292,7 +495,8 @@ def filter_koc_users(df, min_likes=200, min_followers=0, max_followers=999,
     koc_users = user_stats[koc_filter].copy()
 
     # 按 KOC 评分排序
-    koc_users = koc_users.sort_values('koc_score', ascending=False)
+    if sort_result:
+        koc_users = koc_users.sort_values('koc_score', ascending=False)
 
     print(f"✅ 筛选出 {len(koc_users)} 个 KOC 用户")
     if target_keywords:
@@ -302,102 +506,267 @@ def filter_koc_users(df, min_likes=200, min_followers=0, max_followers=999,
     return koc_users, user_stats
 
 
+def sweep_koc_thresholds(user_stats, min_likes_grid, max_followers_grid,
+                         min_engagement_rate_grid, min_followers=0, top_n=3):
+    """
+    批量评估多组筛选阈值 (user_stats 需已由 add_user_scores 添加评分列)
+    每个维度先对阈值数组广播得到 用户数 × 阈值数 的布尔矩阵，
+    各组合的 KOC 数与评分合计再由 einsum 一次算出；只有 Top 用户需要按组合选取
+    """
+    grids = (list(min_likes_grid), list(max_followers_grid), list(min_engagement_rate_grid))
+    min_likes_grid, max_followers_grid, min_engagement_rate_grid = (
+        np.asarray(grid, dtype=float) for grid in grids
+    )
+
+    followers = user_stats['estimated_followers'].to_numpy(dtype=float)
+    scores = user_stats['koc_score'].to_numpy(dtype=float)
+
+    # 与阈值无关的条件
+    base = (
+        (user_stats['post_count'] >= 1) & (user_stats['keyword_match'] == True)
+    ).to_numpy()
+
+    likes_masks = user_stats['avg_liked'].to_numpy(dtype=float)[:, None] >= min_likes_grid
+    followers_masks = (
+        ((followers >= min_followers)[:, None] & (followers[:, None] <= max_followers_grid)) |
+        (followers < 1000)[:, None]
+    )
+    rate_masks = (
+        user_stats['avg_engagement_rate'].to_numpy(dtype=float)[:, None] >= min_engagement_rate_grid
+    )
+
+    likes_masks &= base[:, None]
+    followers_weights = followers_masks.astype(float)
+    rate_weights = rate_masks.astype(float)
+    counts = np.einsum('ui,uj,uk->ijk', likes_masks.astype(float), followers_weights, rate_weights)
+    score_sums = np.einsum(
+        'ui,uj,uk->ijk', likes_masks * scores[:, None], followers_weights, rate_weights
+    )
+
+    rows = []
+    nicknames = user_stats['nickname'].astype(str).to_numpy()
+    for i, min_likes in enumerate(grids[0]):
+        for j, max_followers in enumerate(grids[1]):
+            for k, min_rate in enumerate(grids[2]):
+                koc_count = int(round(counts[i, j, k]))
+                top_users = ''
+                if koc_count and top_n:
+                    positions = np.flatnonzero(
+                        likes_masks[:, i] & followers_masks[:, j] & rate_masks[:, k]
+                    )
+                    best = positions[top_k_indices(scores[positions], top_n)]
+                    top_users = '、'.join(nicknames[best])
+                rows.append({
+                    'min_likes': min_likes,
+                    'max_followers': max_followers,
+                    'min_engagement_rate': min_rate,
+                    'koc_count': koc_count,
+                    'koc_ratio': round(koc_count / len(user_stats) * 100, 2) if len(user_stats) else 0,
+                    'avg_koc_score': round(score_sums[i, j, k] / koc_count, 2) if koc_count else 0,
+                    'top_users': top_users
+                })
+
+    return pd.DataFrame(rows)
+
+
+def parse_grid(value, cast=float):
+    """解析逗号分隔的阈值列表"""
+    return [cast(item) for item in str(value).split(',') if item.strip()]
+
+
+def keyword_flag_masks(user_stats, target_keywords):
+    """每个目标关键词对应的用户匹配掩码"""
+    if len(target_keywords) == 1:
+        return {target_keywords[0]: user_stats['keyword_match'].to_numpy(dtype=bool)}
+    return {
+        keyword: user_stats[f'{KEYWORD_FLAG_PREFIX}{keyword}'].to_numpy(dtype=bool)
+        for keyword in target_keywords
+    }
+
+
+def shortlist_koc_users(koc_users, top_k, target_keywords=None):
+    """
+    生成 KOC 候选名单：整体、每种用户类型、每个目标关键词各取评分最高的 top_k 个用户
+    基于部分选择，不对全部 KOC 用户排序
+    """
+    by_keyword = None
+    if target_keywords:
+        by_keyword = top_k_by_group(
+            koc_users, 'koc_score', top_k, keyword_flag_masks(koc_users, target_keywords)
+        )
+
+    return combine_shortlists(
+        top_k_frame(koc_users, 'koc_score', top_k),
+        top_k_by_group(koc_users, 'koc_score', top_k, 'user_type'),
+        by_keyword
+    )
+
+
+def combine_shortlists(overall, by_type, by_keyword=None):
+    """把整体、按用户类型、按关键词的 Top-K 合并为一张候选名单"""
+    shortlists = [
+        overall.assign(group_by='overall', group='全部', rank=np.arange(1, len(overall) + 1)),
+        by_type.assign(group_by='user_type')
+    ]
+    if by_keyword is not None:
+        shortlists.append(by_keyword.assign(group_by='keyword'))
+
+    return pd.concat(shortlists, ignore_index=True)
+
+
+def stream_koc_shortlist(user_stats_chunks, top_k, min_likes=200, min_followers=0, max_followers=999,
+                         target_keywords=None, min_engagement_rate=2.0, seed=DEFAULT_SEED,
+                         on_chunk=None):
+    """
+    分块评分并筛选 KOC 用户，用 StreamingTopK 维护整体、每种用户类型、每个目标关键词的 Top-K
+    内存中只保留当前块与各分组的 K 个用户，不构建也不排序完整的用户表；
+    结果与对完整用户表调用 top_k_frame / shortlist_koc_users 一致
+
+    Args:
+        user_stats_chunks: 用户统计的分块迭代器 (如 UserProfileStore.iter_user_stats)
+        on_chunk: 每块评分后调用，参数为该块的全部用户 (如逐块写出用户统计)
+
+    Returns:
+        (评分最高的 K 个 KOC 用户, 候选名单, KOC 特征统计)
+    """
+    overall = StreamingTopK('koc_score', top_k)
+    by_type = StreamingTopK('koc_score', top_k, group='user_type')
+    by_keyword = None
+    if target_keywords:
+        by_keyword = StreamingTopK(
+            'koc_score', top_k, group=lambda chunk: keyword_flag_masks(chunk, target_keywords)
+        )
+    accumulators = [acc for acc in (overall, by_type, by_keyword) if acc is not None]
+
+    summary = None
+    for user_stats in user_stats_chunks:
+        add_user_scores(user_stats, seed)
+        if on_chunk is not None:
+            on_chunk(user_stats)
+
+        koc_users = user_stats[
+            koc_filter_mask(user_stats, min_likes, min_followers, max_followers, min_engagement_rate)
+        ]
+        summary = merge_koc_summaries(summary, summarize_koc_users(koc_users, len(user_stats)))
+        for acc in accumulators:
+            acc.update(koc_users)
+
+    if summary is None:
+        return None, None, None
+
+    top_koc = overall.result()
+    shortlist = combine_shortlists(
+        top_koc, by_type.result(), by_keyword.result() if by_keyword is not None else None
+    )
+    return top_koc, shortlist, finalize_koc_summary(summary)
+
+
+# 粉丝数分布 - 更新的分类标准
+FOLLOWER_RANGES = [
+    (0, 1000, 'KOC (< 1K)'),
+    (1000, 4000, 'Nano KOL (1K-4K)'),
+    (4000, 10000, 'Micro KOL (4K-10K)'),
+    (10000, 50000, 'Macro KOL (10K-50K)'),
+    (50000, 100000, 'Top KOL (50K-100K)')
+]
+
+# KOC 用户的平均指标 (特征统计字段: 用户统计列)
+KOC_MEAN_COLUMNS = {
+    'avg_koc_followers': 'estimated_followers',
+    'avg_koc_engagement': 'avg_total_engagement',
+    'avg_koc_posts': 'post_count',
+    'avg_koc_score': 'koc_score'
+}
+
+
+def summarize_koc_users(koc_users, total_users):
+    """KOC 特征的可合并部分 (计数与合计值)，分块筛选时逐块合并"""
+    return {
+        'total_users': total_users,
+        'total_koc': len(koc_users),
+        'sums': {key: float(koc_users[col].sum()) for key, col in KOC_MEAN_COLUMNS.items()},
+        'user_type_dist': koc_users['user_type'].value_counts().to_dict(),
+        'follower_dist': {
+            label: int(((koc_users['estimated_followers'] >= min_f) &
+                        (koc_users['estimated_followers'] < max_f)).sum())
+            for min_f, max_f, label in FOLLOWER_RANGES
+        }
+    }
+
+
+def merge_koc_summaries(summary, other):
+    """合并两块的 KOC 特征统计 (summary 为 None 时直接返回 other)"""
+    if summary is None:
+        return other
+
+    user_type_dist = dict(summary['user_type_dist'])
+    for user_type, count in other['user_type_dist'].items():
+        user_type_dist[user_type] = user_type_dist.get(user_type, 0) + count
+
+    return {
+        'total_users': summary['total_users'] + other['total_users'],
+        'total_koc': summary['total_koc'] + other['total_koc'],
+        'sums': {key: summary['sums'][key] + other['sums'][key] for key in KOC_MEAN_COLUMNS},
+        'user_type_dist': user_type_dist,
+        'follower_dist': {
+            label: summary['follower_dist'][label] + other['follower_dist'][label]
+            for label in summary['follower_dist']
+        }
+    }
+
+
+def finalize_koc_summary(summary):
+    """由计数与合计值计算 KOC 特征 (占比、平均指标、按人数排序的类型分布)"""
+    total_koc = summary['total_koc']
+    analysis = {
+        'total_koc': total_koc,
+        'total_users': summary['total_users'],
+        'koc_ratio': total_koc / summary['total_users'] * 100 if summary['total_users'] else 0
+    }
+    for key, total in summary['sums'].items():
+        analysis[key] = total / total_koc if total_koc else np.nan
+    analysis['user_type_dist'] = dict(
+        sorted(summary['user_type_dist'].items(), key=lambda item: item[1], reverse=True)
+    )
+    analysis['follower_dist'] = summary['follower_dist']
+    return analysis
+
+
 def analyze_koc_characteristics(koc_users, all_users):
     """分析 KOC 用户特征"""
     print("📊 分析 KOC 用户特征...")
-    
-    analysis = {}
-    
-    # 基础统计
-    analysis['total_koc'] = len(koc_users)
-    analysis['total_users'] = len(all_users)
-    analysis['koc_ratio'] = len(koc_users) / len(all_users) * 100
-    
-    # KOC 用户的平均指标
-    analysis['avg_koc_followers'] = koc_users['estimated_followers'].mean()
-    analysis['avg_koc_engagement'] = koc_users['avg_total_engagement'].mean()
-    analysis['avg_koc_posts'] = koc_users['post_count'].mean()
-    analysis['avg_koc_score'] = koc_users['koc_score'].mean()
-    
-    # 用户类型分布
-    analysis['user_type_dist'] = koc_users['user_type'].value_counts().to_dict()
-    
-    # 粉丝数分布 - 更新的分类标准
-    follower_ranges = [
-        (0, 1000, 'KOC (< 1K)'),
-        (1000, 4000, 'Nano KOL (1K-4K)'),
-        (4000, 10000, 'Micro KOL (4K-10K)'),
-        (10000, 50000, 'Macro KOL (10K-50K)'),
-        (50000, 100000, 'Top KOL (50K-100K)')
-    ]
-    
-    follower_dist = {}
-    for min_f, max_f, label in follower_ranges:
-        count = len(koc_users[
-            (koc_users['estimated_followers'] >= min_f) & 
-            (koc_users['estimated_followers'] < max_f)
-        ])
-        follower_dist[label] = count
-    
-    analysis['follower_dist'] = follower_dist
-    
-    return analysis
+
+    return finalize_koc_summary(summarize_koc_users(koc_users, len(all_users)))
 
 
-def create_koc_visualizations(koc_users, all_users, output_dir):
-    """创建 KOC 分析可视化图表"""
+def create_koc_visualizations(koc_users, all_users, output_dir, renderer=None):
+    """
+    创建 KOC 分析可视化图表
+    这里只准备绘图数据，渲染交给图表渲染服务 (未传入 renderer 时同步渲染)
+    """
     print("📈 生成 KOC 分析图表...")
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    local_renderer = renderer is None
+    if local_renderer:
+        renderer = ChartRenderer(workers=0)
     
-    # 设置中文字体
-    plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
-    plt.rcParams['axes.unicode_minus'] = False
-    
-    # 创建图表
-    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-    
-    # 1. KOC 评分分布
-    axes[0, 0].hist(koc_users['koc_score'], bins=20, alpha=0.7, color='skyblue', edgecolor='black')
-    axes[0, 0].set_title('KOC 评分分布')
-    axes[0, 0].set_xlabel('KOC 评分')
-    axes[0, 0].set_ylabel('用户数量')
-    axes[0, 0].axvline(koc_users['koc_score'].mean(), color='red', linestyle='--', 
-                       label=f'平均分: {koc_users["koc_score"].mean():.1f}')
-    axes[0, 0].legend()
-    
-    # 2. 粉丝数 vs 互动数散点图
-    scatter = axes[0, 1].scatter(koc_users['estimated_followers'], koc_users['avg_total_engagement'], 
-                                c=koc_users['koc_score'], cmap='viridis', alpha=0.7)
-    axes[0, 1].set_title('粉丝数 vs 平均互动数')
-    axes[0, 1].set_xlabel('估算粉丝数')
-    axes[0, 1].set_ylabel('平均互动数')
-    plt.colorbar(scatter, ax=axes[0, 1], label='KOC评分')
-    
-    # 3. 用户类型分布
     user_type_counts = koc_users['user_type'].value_counts()
-    axes[1, 0].pie(user_type_counts.values, labels=user_type_counts.index, autopct='%1.1f%%')
-    axes[1, 0].set_title('KOC 用户类型分布')
-    
-    # 4. 发布数量 vs KOC 评分
-    axes[1, 1].scatter(koc_users['post_count'], koc_users['koc_score'], alpha=0.7, color='orange')
-    axes[1, 1].set_title('发布数量 vs KOC 评分')
-    axes[1, 1].set_xlabel('发布数量')
-    axes[1, 1].set_ylabel('KOC 评分')
-    
-    # 添加趋势线
-    z = np.polyfit(koc_users['post_count'], koc_users['koc_score'], 1)
-    p = np.poly1d(z)
-    axes[1, 1].plot(koc_users['post_count'], p(koc_users['post_count']), "r--", alpha=0.8)
-    
-    plt.tight_layout()
-    
     chart_path = os.path.join(output_dir, f'koc_analysis_{timestamp}.png')
-    plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    renderer.submit('koc_overview', {
+        'score_hist': histogram(koc_users['koc_score'], 20),
+        'score_mean': float(koc_users['koc_score'].mean()),
+        'followers': koc_users['estimated_followers'].to_numpy(),
+        'engagement': koc_users['avg_total_engagement'].to_numpy(),
+        'scores': koc_users['koc_score'].to_numpy(),
+        'post_counts': koc_users['post_count'].to_numpy(),
+        'user_type_counts': (user_type_counts.index.tolist(), user_type_counts.values)
+    }, chart_path, label='KOC 分析图表')
     
-    print(f"📈 KOC 分析图表已保存到: {chart_path}")
+    if local_renderer:
+        renderer.close()
     
+    register_artifacts(output_dir, 'koc_filter', {'koc_chart': chart_path})
     return chart_path
 
 
@@ -441,6 +810,7 @@ def generate_koc_report(analysis, output_dir):
         f.write(f"\n\n报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
     
     print(f"📋 KOC 分析报告已保存到: {report_path}")
+    register_artifacts(output_dir, 'koc_filter', {'koc_report': report_path})
     
     return report_path
 
@@ -454,6 +824,8 @@ def main():
 使用示例:
   python analysis/koc_filter.py --input core/media_crawler/data/xhs/1_search_contents_2025-07-02.csv
   python analysis/koc_filter.py --input data.csv --min-likes 300 --max-followers 30000
+  python analysis/koc_filter.py --input latest --profile-store output/user_profiles.db
+  python analysis/koc_filter.py --input latest --sweep --sweep-min-likes 100,200,300 --sweep-min-engagement-rate 1,2,5
         """
     )
     
@@ -461,7 +833,17 @@ def main():
         '--input', '-i',
         type=str,
         required=True,
-        help='输入的 CSV 文件路径'
+        help='输入的 CSV 文件路径、目录或 glob 模式 (latest/all 表示爬虫数据目录)'
+    )
+    parser.add_argument(
+        '--since',
+        type=str,
+        help='只分析该日期及之后爬取的文件 (YYYY-MM-DD)'
+    )
+    parser.add_argument(
+        '--until',
+        type=str,
+        help='只分析该日期及之前爬取的文件 (YYYY-MM-DD)'
     )
     parser.add_argument(
         '--output-dir', '-o',
@@ -498,11 +880,83 @@ def main():
         default=2.0,
         help='最小互动率百分比 (默认: 2.0)'
     )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=DEFAULT_SEED,
+        help=f'粉丝数估算的随机种子 (默认: {DEFAULT_SEED})'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f'分块读取时每块的笔记数 (默认: {DEFAULT_CHUNK_SIZE})'
+    )
+    parser.add_argument(
+        '--memory-budget-mb',
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET_MB,
+        help=f'内存预算 (MB)，估算超出时分块读取 (默认: {DEFAULT_MEMORY_BUDGET_MB})'
+    )
+    parser.add_argument(
+        '--top-k',
+        type=int,
+        help='只输出评分最高的 K 个 KOC，并按用户类型与目标关键词各生成 Top-K 名单 (不做全量排序)'
+    )
+    parser.add_argument(
+        '--sweep',
+        action='store_true',
+        help='阈值扫描模式：只聚合一次用户数据，批量评估多组阈值组合并输出汇总表'
+    )
+    parser.add_argument(
+        '--sweep-min-likes',
+        type=str,
+        help='扫描的最小平均点赞数列表，用逗号分隔 (默认: 使用 --min-likes)'
+    )
+    parser.add_argument(
+        '--sweep-max-followers',
+        type=str,
+        help='扫描的最大粉丝数列表，用逗号分隔 (默认: 使用 --max-followers)'
+    )
+    parser.add_argument(
+        '--sweep-min-engagement-rate',
+        type=str,
+        help='扫描的最小互动率列表，用逗号分隔 (默认: 使用 --min-engagement-rate)'
+    )
+    parser.add_argument(
+        '--sweep-top-n',
+        type=int,
+        default=3,
+        help='扫描结果中每组阈值列出的 Top 用户数 (默认: 3)'
+    )
+    parser.add_argument(
+        '--no-charts',
+        action='store_true',
+        help='不生成图表，只输出 CSV 与报告 (跳过绘图库的加载，启动更快)'
+    )
+    parser.add_argument(
+        '--dpi-preset',
+        choices=list(DPI_PRESETS),
+        default=DEFAULT_DPI_PRESET,
+        help=f'图表分辨率预设 (默认: {DEFAULT_DPI_PRESET})'
+    )
+    parser.add_argument(
+        '--chart-workers',
+        type=int,
+        default=1,
+        help='后台渲染图表的进程数，0 表示同步渲染 (默认: 1)'
+    )
+    parser.add_argument(
+        '--profile-store',
+        type=str,
+        help='用户画像数据库路径：先将输入数据增量写入，再基于全部历史统计筛选 KOC'
+    )
     
     args = parser.parse_args()
     
-    # 检查输入文件
-    if not os.path.exists(args.input):
+    # 解析输入文件 (支持目录、glob 模式与日期范围)
+    input_files = resolve_input_files(args.input, args.since, args.until)
+    if not input_files:
         print(f"❌ 输入文件不存在: {args.input}")
         sys.exit(1)
     
@@ -514,60 +968,144 @@ def main():
     print("=" * 60)
     
     try:
-        # 读取数据
-        print(f"📖 读取数据文件: {args.input}")
-        df = pd.read_csv(args.input)
-        
-        print(f"📊 数据概览: {len(df)} 条笔记")
-        
-        # 数据清理
-        numeric_columns = ['liked_count', 'collected_count', 'comment_count', 'share_count']
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        
         # 处理目标关键词
         target_keywords = None
         if args.target_keywords:
             target_keywords = [kw.strip() for kw in args.target_keywords.split(',')]
             print(f"🎯 使用目标关键词: {target_keywords}")
 
-        # 筛选 KOC 用户
-        koc_users, all_users = filter_koc_users(
-            df, args.min_likes, args.min_followers, args.max_followers,
-            target_keywords, args.min_engagement_rate
-        )
-        
-        if len(koc_users) == 0:
-            print("⚠️  没有找到符合条件的 KOC 用户，请调整筛选条件")
-            sys.exit(0)
-        
-        # 分析 KOC 特征
-        analysis = analyze_koc_characteristics(koc_users, all_users)
-        
+        print(f"📖 读取数据文件: {describe_input_files(input_files)}")
+        # 基于用户画像取 Top-K 时分块评分，不把全部用户读入内存
+        stream_top_k = bool(args.profile_store and args.top_k and not args.sweep)
+        if args.profile_store:
+            # 增量写入用户画像，只处理新增或变化的笔记，再读取全部历史的用户统计
+            update_profile_store(input_files, args.profile_store, target_keywords, args.chunk_size)
+            if not stream_top_k:
+                with UserProfileStore(args.profile_store) as store:
+                    user_stats = store.load_user_stats(target_keywords)
+                print(f"🗂️  用户画像: {len(user_stats)} 个用户 ({args.profile_store})")
+        else:
+            # 读取时已完成互动数列的类型转换，超出内存预算时返回分块迭代器
+            df, streaming = open_notes(
+                input_files, 'koc_filter', memory_budget_mb=args.memory_budget_mb,
+                chunk_size=args.chunk_size
+            )
+            if not streaming:
+                print(f"📊 数据概览: {len(df)} 条笔记")
+
+            user_stats = build_user_stats(df, target_keywords)
+
+        if args.sweep:
+            # 阈值扫描：评分只计算一次，各组阈值以布尔矩阵批量评估
+            add_user_scores(user_stats, args.seed)
+            sweep = sweep_koc_thresholds(
+                user_stats,
+                parse_grid(args.sweep_min_likes or args.min_likes, int),
+                parse_grid(args.sweep_max_followers or args.max_followers, int),
+                parse_grid(args.sweep_min_engagement_rate or args.min_engagement_rate),
+                args.min_followers, args.sweep_top_n
+            )
+
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            sweep_output = os.path.join(args.output_dir, f'koc_sweep_{timestamp}.csv')
+            sweep.to_csv(sweep_output, index=False, encoding='utf-8-sig')
+
+            print(f"\n📊 阈值扫描: {len(sweep)} 组组合, 用户总数 {len(user_stats)}")
+            for _, row in sweep.iterrows():
+                print(f"  点赞≥{row['min_likes']:g}, 粉丝≤{row['max_followers']:g}, "
+                      f"互动率≥{row['min_engagement_rate']:g}% → {row['koc_count']} 个 KOC")
+            print(f"📄 阈值扫描结果已保存到: {sweep_output}")
+            register_artifacts(args.output_dir, 'koc_filter', {'koc_sweep': sweep_output})
+            return
+
         # 生成时间戳
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # 保存 KOC 用户列表
         koc_output = os.path.join(args.output_dir, f'koc_users_{timestamp}.csv')
-        
+        all_users_output = os.path.join(args.output_dir, f'all_users_stats_{timestamp}.csv')
+
         # 选择输出列
         output_columns = [
             'nickname', 'user_type', 'estimated_followers', 'post_count',
             'avg_liked', 'avg_collected', 'avg_comment', 'avg_total_engagement',
             'avg_engagement_rate', 'koc_score', 'max_total_engagement'
         ]
-        
-        koc_users[output_columns].to_csv(koc_output, index=False, encoding='utf-8-sig')
+
+        # 筛选 KOC 用户
+        print(f"🔍 筛选 KOC 用户 (点赞≥{args.min_likes}, 粉丝{args.min_followers}-{args.max_followers}, 互动率≥{args.min_engagement_rate}%)...")
+        renderer = None
+        shortlist = None
+        if stream_top_k:
+            # 每块评分后直接写出全部用户统计，Top-K 由流式累加器维护
+            with UserProfileStore(args.profile_store) as store, \
+                    open(all_users_output, 'w', encoding='utf-8-sig', newline='') as all_users_file:
+                written = []
+
+                def write_all_users(chunk):
+                    chunk[output_columns].to_csv(all_users_file, index=False, header=not written)
+                    written.append(len(chunk))
+
+                top_koc, shortlist, analysis = stream_koc_shortlist(
+                    store.iter_user_stats(target_keywords, args.chunk_size), args.top_k,
+                    args.min_likes, args.min_followers, args.max_followers,
+                    target_keywords, args.min_engagement_rate, args.seed, on_chunk=write_all_users
+                )
+            print(f"🗂️  用户画像: {sum(written)} 个用户，分 {len(written)} 块评分 ({args.profile_store})")
+
+            if analysis is None or analysis['total_koc'] == 0:
+                os.remove(all_users_output)
+                print("⚠️  没有找到符合条件的 KOC 用户，请调整筛选条件")
+                sys.exit(0)
+            print(f"✅ 筛选出 {analysis['total_koc']} 个 KOC 用户")
+            if not args.no_charts:
+                print("⏭️  分块 Top-K 模式不保留全部 KOC 用户，跳过图表生成")
+        else:
+            koc_users, all_users = score_user_stats(
+                user_stats, args.min_likes, args.min_followers, args.max_followers,
+                target_keywords, args.min_engagement_rate, args.seed,
+                sort_result=args.top_k is None
+            )
+
+            if len(koc_users) == 0:
+                print("⚠️  没有找到符合条件的 KOC 用户，请调整筛选条件")
+                sys.exit(0)
+
+            # 分析 KOC 特征
+            analysis = analyze_koc_characteristics(koc_users, all_users)
+
+            # 提交图表到后台渲染，与后续的结果输出并行
+            if not args.no_charts:
+                renderer = ChartRenderer(
+                    args.dpi_preset, args.chart_workers,
+                    cache_dir=os.path.join(args.output_dir, '.cache', 'charts')
+                )
+                create_koc_visualizations(koc_users, all_users, args.output_dir, renderer)
+
+            if args.top_k:
+                # 部分选择评分最高的 K 个用户，并输出按类型/关键词分组的候选名单
+                top_koc = top_k_frame(koc_users, 'koc_score', args.top_k)
+                shortlist = shortlist_koc_users(koc_users, args.top_k, target_keywords)
+            else:
+                top_koc = koc_users
+
+            # 保存所有用户统计
+            all_users[output_columns].to_csv(all_users_output, index=False, encoding='utf-8-sig')
+
+        if shortlist is not None:
+            shortlist_output = os.path.join(args.output_dir, f'koc_shortlist_{timestamp}.csv')
+            shortlist[['group_by', 'group', 'rank'] + output_columns].to_csv(
+                shortlist_output, index=False, encoding='utf-8-sig'
+            )
+            print(f"📄 KOC Top-{args.top_k} 名单已保存到: {shortlist_output}")
+            register_artifacts(args.output_dir, 'koc_filter', {'koc_shortlist': shortlist_output})
+
+        # 保存 KOC 用户列表
+        top_koc[output_columns].to_csv(koc_output, index=False, encoding='utf-8-sig')
         print(f"📄 KOC 用户列表已保存到: {koc_output}")
-        
-        # 保存所有用户统计
-        all_users_output = os.path.join(args.output_dir, f'all_users_stats_{timestamp}.csv')
-        all_users[output_columns].to_csv(all_users_output, index=False, encoding='utf-8-sig')
         print(f"📄 所有用户统计已保存到: {all_users_output}")
-        
-        # 生成可视化
-        create_koc_visualizations(koc_users, all_users, args.output_dir)
+        register_artifacts(args.output_dir, 'koc_filter', {
+            'koc_csv': koc_output,
+            'all_users_csv': all_users_output
+        })
         
         # 生成报告
         generate_koc_report(analysis, args.output_dir)
@@ -584,11 +1122,14 @@ def main():
         print(f"⭐ 平均 KOC 评分: {analysis['avg_koc_score']:.1f}")
         
         print("\n🏆 TOP 10 KOC 用户:")
-        top_koc = koc_users.head(10)
-        for i, (_, user) in enumerate(top_koc.iterrows(), 1):
+        for i, (_, user) in enumerate(top_koc.head(10).iterrows(), 1):
             print(f"  {i:2d}. {user['nickname']} (评分: {user['koc_score']:.1f}, "
                   f"粉丝: {user['estimated_followers']:.0f}, 互动: {user['avg_total_engagement']:.1f})")
         
+        # 等待图表渲染完成
+        if renderer:
+            renderer.close()
+        
         print("\n✅ KOC 筛选完成!")
         
     except Exception as e:
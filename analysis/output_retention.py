@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输出目录保留与压缩模块
+每种产物只保留最近 N 次运行的文件；更早的 CSV 按 (产物类型, 月份) 合并进归档
+(有 pyarrow / fastparquet 时为 Parquet，否则为 csv.gz) 后删除，其余过期文件直接删除；
+内容完全相同的图片只保留最新的一份，清单中的记录改为指向保留的文件。
+产物以产物清单为准，清单之前生成的文件按文件名中的时间戳识别运行
+"""
+
+import os
+import re
+import sys
+import hashlib
+import argparse
+from datetime import datetime
+
+# 以脚本方式运行时也能导入同目录下的共享模块
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from artifact_manifest import ArtifactManifest
+
+
+DEFAULT_KEEP_RUNS = 7
+ARCHIVE_DIRNAME = 'archive'
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# 清单之前的输出文件：<类型>_<YYYYMMDD_HHMMSS>.<扩展名>
+TIMESTAMPED_FILE = re.compile(r'^(?P<type>.+?)_(?P<stamp>\d{8}_\d{6})\.(?P<ext>[A-Za-z]+)$')
+
+
+def archive_format():
+    """可用的归档格式：安装了 Parquet 引擎时为 parquet，否则为 csv.gz"""
+    for engine in ('pyarrow', 'fastparquet'):
+        try:
+            __import__(engine)
+            return 'parquet'
+        except ImportError:
+            continue
+    return 'csv.gz'
+
+
+def collect_artifacts(output_dir):
+    """
+    收集输出目录中现存的产物
+
+    Returns:
+        [(产物类型, 运行 ID, 绝对路径, 生成时间 ISO 字符串)]
+    """
+    records = []
+    tracked = set()
+
+    manifest = ArtifactManifest.open_existing(output_dir)
+    if manifest is not None:
+        with manifest:
+            for run_id, artifact_type, path, created_at in manifest.entries():
+                path = os.path.abspath(path)
+                if os.path.exists(path):
+                    records.append((artifact_type, run_id, path, created_at))
+                    tracked.add(path)
+
+    for name in os.listdir(output_dir):
+        path = os.path.abspath(os.path.join(output_dir, name))
+        if path in tracked or not os.path.isfile(path):
+            continue
+        match = TIMESTAMPED_FILE.match(name)
+        if not match:
+            continue
+        stamp = match.group('stamp')
+        created_at = datetime.strptime(stamp, '%Y%m%d_%H%M%S').isoformat(timespec='microseconds')
+        records.append((match.group('type'), stamp, path, created_at))
+
+    return records
+
+
+def find_duplicate_images(paths):
+    """
+    按内容哈希找出重复的图片 (先按文件大小分组，只对大小相同的文件计算哈希)
+
+    Args:
+        paths: 图片路径，按生成时间从新到旧排列
+
+    Returns:
+        {重复文件: 保留的文件}，每组保留最新的一份
+    """
+    by_size = {}
+    for path in paths:
+        by_size.setdefault(os.path.getsize(path), []).append(path)
+
+    duplicates = {}
+    for same_size in by_size.values():
+        if len(same_size) < 2:
+            continue
+        by_hash = {}
+        for path in same_size:
+            with open(path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            by_hash.setdefault(digest, []).append(path)
+        for group in by_hash.values():
+            for path in group[1:]:
+                duplicates[path] = group[0]
+    return duplicates
+
+
+def plan_retention(output_dir, keep_runs=DEFAULT_KEEP_RUNS):
+    """
+    生成保留计划 (不修改任何文件)
+
+    Returns:
+        dict: kept / archive / delete / duplicates 及各类型的统计
+    """
+    keep_runs = max(1, keep_runs)
+    records = collect_artifacts(output_dir)
+
+    # 每种产物按运行的最新生成时间排序，保留最近 keep_runs 次运行
+    runs_by_type = {}
+    for artifact_type, run_id, path, created_at in records:
+        runs = runs_by_type.setdefault(artifact_type, {})
+        runs[run_id] = max(runs.get(run_id, ''), created_at)
+
+    kept_runs = {
+        artifact_type: set(sorted(runs, key=runs.get, reverse=True)[:keep_runs])
+        for artifact_type, runs in runs_by_type.items()
+    }
+
+    # 每次运行覆盖写入的文件 (如 keyword_trends.csv) 只要仍属于保留的运行就不清理
+    kept = {path for artifact_type, run_id, path, _ in records if run_id in kept_runs[artifact_type]}
+
+    archive, delete = {}, []
+    expired = set()
+    types = {}
+    for artifact_type, run_id, path, created_at in records:
+        stats = types.setdefault(artifact_type, {'runs': len(runs_by_type[artifact_type]), 'expired_files': 0})
+        if path in kept or path in expired:
+            continue
+        expired.add(path)
+        stats['expired_files'] += 1
+        if path.endswith('.csv'):
+            archive.setdefault((artifact_type, created_at[:7]), []).append((run_id, path))
+        else:
+            delete.append(path)
+
+    # 过期运行的清单记录 (文件被保留的运行共用时只删除记录)
+    expired_runs = sorted({
+        (run_id, artifact_type) for artifact_type, run_id, _, _ in records
+        if run_id not in kept_runs[artifact_type]
+    })
+
+    # 图表缓存命中时复制的文件修改时间不可靠，按生成时间决定保留哪一份
+    created = {}
+    for _, _, path, created_at in records:
+        created[path] = max(created.get(path, ''), created_at)
+    images = sorted(
+        (path for path in kept if path.lower().endswith(IMAGE_EXTENSIONS)),
+        key=lambda path: (created[path], path), reverse=True
+    )
+    duplicates = find_duplicate_images(images)
+
+    freed = sum(os.path.getsize(path) for path in delete + list(duplicates))
+    freed += sum(os.path.getsize(path) for items in archive.values() for _, path in items)
+
+    return {
+        'output_dir': output_dir,
+        'keep_runs': keep_runs,
+        'kept': sorted(kept - set(duplicates)),
+        'archive': archive,
+        'delete': sorted(delete),
+        'duplicates': duplicates,
+        'expired_runs': expired_runs,
+        'types': types,
+        'freed_bytes': freed,
+        'format': archive_format()
+    }
+
+
+def _read_archive(path, fmt):
+    import pandas as pd
+    if fmt == 'parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype=str, keep_default_na=False, compression='gzip')
+
+
+def _write_archive(df, path, fmt):
+    """先写临时文件再替换，中断时不会留下损坏的归档"""
+    tmp_path = f'{path}.tmp'
+    if fmt == 'parquet':
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_csv(tmp_path, index=False, encoding='utf-8', compression='gzip')
+    os.replace(tmp_path, path)
+
+
+def compact_csvs(output_dir, artifact_type, month, items, fmt):
+    """
+    把同一类型、同一月份的过期 CSV 合并进归档文件
+    CSV 按文本读取，归档保留原始内容；已归档过的来源文件不会重复写入
+
+    Returns:
+        归档文件路径
+    """
+    import pandas as pd
+
+    archive_dir = os.path.join(output_dir, ARCHIVE_DIRNAME, artifact_type)
+    os.makedirs(archive_dir, exist_ok=True)
+    archive_path = os.path.join(archive_dir, f'{month}.{fmt}')
+
+    frames = []
+    archived_sources = set()
+    if os.path.exists(archive_path):
+        existing = _read_archive(archive_path, fmt)
+        archived_sources = set(existing['_source_file'])
+        frames.append(existing)
+
+    for run_id, path in items:
+        source = os.path.basename(path)
+        if source in archived_sources:
+            continue
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+        df.insert(0, '_source_file', source)
+        df.insert(0, '_run_id', run_id)
+        frames.append(df)
+
+    if frames:
+        # 不同时期的 CSV 列可能不同，合并后缺失的列填空字符串
+        _write_archive(pd.concat(frames, ignore_index=True).fillna(''), archive_path, fmt)
+    return archive_path
+
+
+def apply_retention(plan):
+    """按计划归档、删除与去重，并同步更新产物清单"""
+    output_dir = plan['output_dir']
+    removed = []
+
+    for (artifact_type, month), items in plan['archive'].items():
+        archive_path = compact_csvs(output_dir, artifact_type, month, items, plan['format'])
+        print(f"🗜️  {artifact_type} {month}: {len(items)} 个 CSV 已归档到 {archive_path}")
+        removed.extend(path for _, path in items)
+
+    removed.extend(plan['delete'])
+    for path in removed:
+        os.remove(path)
+
+    for path in plan['duplicates']:
+        os.remove(path)
+
+    manifest = ArtifactManifest.open_existing(output_dir)
+    if manifest is not None:
+        with manifest:
+            manifest.forget(removed)
+            manifest.forget_runs(plan['expired_runs'])
+            for path, canonical in plan['duplicates'].items():
+                manifest.relocate(path, canonical)
+
+
+def format_size(size):
+    """文件大小的可读形式"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def format_report(plan, dry_run=False):
+    """保留计划的文字报告"""
+    archived = sum(len(items) for items in plan['archive'].values())
+    lines = [
+        f"{'🔍 预演 (不修改文件)' if dry_run else '🧹 输出目录整理'}: {plan['output_dir']}",
+        f"   每种产物保留最近 {plan['keep_runs']} 次运行, 归档格式: {plan['format']}",
+        f"   保留文件: {len(plan['kept'])} 个",
+        f"   归档 CSV: {archived} 个 (合并为 {len(plan['archive'])} 个归档分区)",
+        f"   删除过期文件: {len(plan['delete'])} 个",
+        f"   删除重复图片: {len(plan['duplicates'])} 个",
+        f"   释放空间: {format_size(plan['freed_bytes'])}"
+    ]
+
+    expired_types = {t: s for t, s in plan['types'].items() if s['expired_files']}
+    if expired_types:
+        lines.append("   各类型过期文件:")
+        for artifact_type, stats in sorted(expired_types.items()):
+            lines.append(f"     {artifact_type:<24} {stats['runs']} 次运行, 过期 {stats['expired_files']} 个文件")
+
+    if dry_run:
+        for (artifact_type, month), items in sorted(plan['archive'].items()):
+            lines.append(f"   [归档] {artifact_type}/{month}.{plan['format']} <- {len(items)} 个 CSV")
+        for path in plan['delete']:
+            lines.append(f"   [删除] {os.path.basename(path)}")
+        for path, canonical in sorted(plan['duplicates'].items()):
+            lines.append(f"   [去重] {os.path.basename(path)} -> {os.path.basename(canonical)}")
+
+    return "\n".join(lines)
+
+
+def run_retention(output_dir, keep_runs=DEFAULT_KEEP_RUNS, dry_run=False):
+    """整理输出目录 (流水线阶段入口)，返回保留计划"""
+    plan = plan_retention(output_dir, keep_runs)
+    print(format_report(plan, dry_run))
+    if not dry_run:
+        apply_retention(plan)
+    return plan
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='输出目录保留与压缩工具',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python analysis/output_retention.py --dry-run
+  python analysis/output_retention.py --output-dir output --keep-runs 3
+        """
+    )
+
+    parser.add_argument(
+        '--output-dir', '-o',
+        type=str,
+        default='output',
+        help='输出目录 (默认: output)'
+    )
+    parser.add_argument(
+        '--keep-runs',
+        type=int,
+        default=DEFAULT_KEEP_RUNS,
+        help=f'每种产物保留最近几次运行的文件 (默认: {DEFAULT_KEEP_RUNS})'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='只输出将要归档、删除与去重的文件，不修改任何文件'
+    )
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.output_dir):
+        print(f"❌ 输出目录不存在: {args.output_dir}")
+        sys.exit(1)
+
+    try:
+        run_retention(args.output_dir, args.keep_runs, args.dry_run)
+        if not args.dry_run:
+            print("\n✅ 输出目录整理完成")
+    except Exception as e:
+        print(f"❌ 整理过程中出现错误: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+随机数模块
+各分析模块的估算扰动统一由 (运行种子, 实体 ID) 决定：同一笔记/用户在任意运行、
+任意分块方式下得到相同的随机值，结果因此可复现、可缓存、可增量重算
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# 默认运行种子
+DEFAULT_SEED = 42
+
+_UINT64_MASK = (1 << 64) - 1
+
+
+def _splitmix64(values):
+    """splitmix64 混合函数，将相邻的哈希值打散为均匀分布的 64 位整数"""
+    with np.errstate(over='ignore'):
+        z = values + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def entity_hashes(keys):
+    """
+    计算实体键的 64 位哈希
+    keys 可以是 Series、DataFrame (多列组合键，如 user_id + nickname) 或任意序列；
+    分类列与字符串列的同一取值哈希相同
+    """
+    if isinstance(keys, pd.DataFrame):
+        keys = keys.astype(str)
+    else:
+        keys = pd.Series(np.asarray(keys, dtype=object)).astype(str)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy(dtype=np.uint64)
+
+
+class SeededRNG:
+    """
+    按实体取随机数的 RNG 服务
+    stream 用于区分同一实体上的不同用途 (如粉丝数扰动与强制 KOC 判定互不相关)
+    """
+
+    def __init__(self, seed=DEFAULT_SEED):
+        self.seed = int(seed) & _UINT64_MASK
+
+    def _stream_key(self, stream):
+        stream_hash = entity_hashes([stream])[0]
+        return _splitmix64(np.uint64(self.seed) ^ stream_hash)
+
+    def bits(self, keys, stream=''):
+        """每个实体对应的 64 位随机整数"""
+        return _splitmix64(entity_hashes(keys) ^ self._stream_key(stream))
+
+    def random(self, keys, stream=''):
+        """每个实体对应的 [0, 1) 均匀随机数"""
+        return (self.bits(keys, stream) >> np.uint64(11)) * (1.0 / (1 << 53))
+
+    def uniform(self, keys, low=0.0, high=1.0, stream=''):
+        """每个实体对应的 [low, high) 均匀随机数"""
+        return low + (high - low) * self.random(keys, stream)
+
+    def integers(self, keys, low, high, stream=''):
+        """每个实体对应的 [low, high) 随机整数"""
+        return low + np.floor(self.random(keys, stream) * (high - low)).astype(np.int64)
+
+    def generator(self, key, stream=''):
+        """单个实体专属的 numpy Generator，用于抽样等需要多次取数的场景"""
+        return np.random.default_rng(int(self.bits([key], stream)[0]))
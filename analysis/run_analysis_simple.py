@@ -11,6 +11,12 @@ import subprocess
 import glob
 from datetime import datetime
 
+# 以脚本方式运行时也能导入同目录下的共享模块
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from data_loader import describe_input_files, resolve_input_files
+from artifact_manifest import RUN_ID_ENV, new_run_id
+from output_retention import DEFAULT_KEEP_RUNS, run_retention
+
 # 设置环境变量解决 Windows 编码问题
 os.environ['PYTHONIOENCODING'] = 'utf-8'
 
@@ -83,6 +89,10 @@ def main():
         epilog="""
 使用示例:
   python analysis/run_analysis_simple.py --input core/media_crawler/data/xhs/1_search_contents_2025-07-02.csv
+  python analysis/run_analysis_simple.py --input latest
+  python analysis/run_analysis_simple.py --input all --since 2025-07-01 --until 2025-07-07
+  python analysis/run_analysis_simple.py --input "core/media_crawler/data/xhs/*_search_contents_2025-07-*.csv"
+  python analysis/run_analysis_simple.py --input latest --keep-runs 3 --retention-dry-run
         """
     )
     
@@ -90,7 +100,17 @@ def main():
         '--input', '-i',
         type=str,
         required=True,
-        help='输入的 CSV 文件路径'
+        help='输入的 CSV 文件路径、目录或 glob 模式 (latest=最新文件, all=全部爬取文件)'
+    )
+    parser.add_argument(
+        '--since',
+        type=str,
+        help='只分析该日期及之后爬取的文件 (YYYY-MM-DD)'
+    )
+    parser.add_argument(
+        '--until',
+        type=str,
+        help='只分析该日期及之前爬取的文件 (YYYY-MM-DD)'
     )
     parser.add_argument(
         '--output-dir', '-o',
@@ -98,6 +118,27 @@ def main():
         default='output',
         help='输出目录 (默认: output)'
     )
+    parser.add_argument(
+        '--no-charts',
+        action='store_true',
+        help='各分析模块不生成图表，只输出 CSV 与报告'
+    )
+    parser.add_argument(
+        '--keep-runs',
+        type=int,
+        default=DEFAULT_KEEP_RUNS,
+        help=f'分析完成后每种产物保留最近几次运行的文件，更早的 CSV 归档 (默认: {DEFAULT_KEEP_RUNS})'
+    )
+    parser.add_argument(
+        '--retention-dry-run',
+        action='store_true',
+        help='只输出输出目录整理的预演报告，不归档或删除文件'
+    )
+    parser.add_argument(
+        '--no-retention',
+        action='store_true',
+        help='分析完成后不整理输出目录'
+    )
     
     args = parser.parse_args()
 
@@ -111,18 +152,34 @@ def main():
             print("错误: 未找到任何数据文件")
             sys.exit(1)
 
-    # 检查输入文件
-    if not os.path.exists(args.input):
+    # 检查输入文件 (支持目录、glob 模式与日期范围)
+    input_files = resolve_input_files(args.input, args.since, args.until)
+    if not input_files:
         print(f"错误: 输入文件不存在: {args.input}")
         sys.exit(1)
+
+    # 日期范围参数传递给支持多文件输入的分析模块
+    range_args = []
+    if args.since:
+        range_args.extend(['--since', args.since])
+    if args.until:
+        range_args.extend(['--until', args.until])
+    
+    # 各分析模块共享同一个运行 ID，产物登记在同一次运行下，下游只取本次运行的产物
+    run_id = new_run_id()
+    os.environ[RUN_ID_ENV] = run_id
+    
+    # 图表开关传递给生成图表的分析模块
+    chart_args = ['--no-charts'] if args.no_charts else []
     
     # 创建输出目录
     os.makedirs(args.output_dir, exist_ok=True)
     
     print_banner()
     
-    print(f"输入文件: {args.input}")
+    print(f"输入文件: {describe_input_files(input_files)}")
     print(f"输出目录: {args.output_dir}")
+    print(f"运行 ID: {run_id}")
     print(f"开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # 定义分析模块
@@ -130,22 +187,22 @@ def main():
         {
             'name': 'keyword_analysis',
             'description': '关键词分析',
-            'extra_args': ['--top-n', '20']
+            'extra_args': ['--top-n', '20'] + range_args + chart_args
         },
         {
             'name': 'competitor_analysis',
             'description': '竞品笔记分析',
-            'extra_args': ['--top-n', '15']
+            'extra_args': ['--top-n', '15'] + range_args + chart_args
         },
         {
             'name': 'koc_filter',
             'description': 'KOC 用户筛选',
-            'extra_args': ['--min-likes', '200', '--min-followers', '2000', '--max-followers', '10000', '--target-keywords', '普拉提,健身,瑜伽']
+            'extra_args': ['--min-likes', '200', '--min-followers', '2000', '--max-followers', '10000', '--target-keywords', '普拉提,健身,瑜伽'] + range_args + chart_args
         },
         {
             'name': 'topic_generator',
             'description': '内容选题辅助',
-            'extra_args': ['--top-n', '30']
+            'extra_args': ['--top-n', '30'] + range_args
         },
         {
             'name': 'export_notionsheet',
@@ -191,6 +248,14 @@ def main():
         
         print(f"  {icon} {desc} ({name}): {status}")
     
+    # 整理输出目录：过期 CSV 归档，过期文件与重复图片删除
+    if not args.no_retention:
+        print("\n" + "=" * 70)
+        try:
+            run_retention(args.output_dir, args.keep_runs, args.retention_dry_run)
+        except Exception as e:
+            print(f"警告: 输出目录整理失败: {e}")
+    
     # 输出文件位置
     print(f"\n所有结果已保存到: {os.path.abspath(args.output_dir)}")
     
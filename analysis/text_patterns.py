@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多模式关键词匹配模块
+由 {分组名: 关键词列表} 构建一次 Aho-Corasick 自动机，每条文本只扫描一遍，
+输出每个分组命中的不同关键词数 (整数矩阵)，用于内容类型等基于关键词计分的分类；
+PatternMatcher 在此基础上支持正则规则，输出 文本 × 分组 的布尔命中矩阵
+"""
+
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+
+# 每个进程至少分到的文本数，文本较少时不启用进程池
+MIN_TEXTS_PER_WORKER = 5000
+
+
+class KeywordMatcher:
+    """Aho-Corasick 多关键词匹配器"""
+
+    def __init__(self, groups):
+        """
+        构建自动机
+
+        Args:
+            groups: {分组名: 关键词列表}，关键词按原样匹配 (调用方负责大小写归一化)
+        """
+        self.group_names = list(groups)
+        self.keywords = []
+        keyword_groups = []
+        for group_index, keywords in enumerate(groups.values()):
+            for keyword in keywords:
+                self.keywords.append(keyword)
+                keyword_groups.append(group_index)
+
+        # 关键词 -> 分组的指示矩阵，命中矩阵乘以它即得每个分组的命中数
+        self.group_matrix = np.zeros((len(self.keywords), len(self.group_names)), dtype=np.int32)
+        self.group_matrix[np.arange(len(self.keywords)), keyword_groups] = 1
+
+        self._build()
+
+    def _build(self):
+        """构建字典树、失败指针，并展开为完整的状态转移表"""
+        goto = [{}]
+        outputs = [[]]
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                if char not in goto[state]:
+                    goto[state][char] = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                state = goto[state][char]
+            outputs[state].append(keyword_id)
+
+        # 按层次遍历计算失败指针，同时把失败状态的输出合并进来
+        fail = [0] * len(goto)
+        order = []
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for char, target in goto[state].items():
+                queue.append(target)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[target] = goto[fallback].get(char, 0)
+                outputs[target] = outputs[target] + outputs[fail[target]]
+
+        # 展开为确定性转移表: 扫描时每个字符只做一次字典查找
+        transitions = [dict(goto[0])]
+        transitions.extend({} for _ in range(len(goto) - 1))
+        for state in order:
+            transitions[state] = {**transitions[fail[state]], **goto[state]}
+
+        self._transitions = transitions
+        self._outputs = [tuple(ids) for ids in outputs]
+
+    def match(self, text):
+        """返回文本中出现的关键词编号集合"""
+        transitions = self._transitions
+        outputs = self._outputs
+        state = 0
+        hits = set()
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                hits.update(outputs[state])
+        return hits
+
+    def hit_matrix(self, texts):
+        """文本 × 关键词 的布尔命中矩阵"""
+        hits = np.zeros((len(texts), len(self.keywords)), dtype=bool)
+        for row, text in enumerate(texts):
+            matched = self.match(text)
+            if matched:
+                hits[row, list(matched)] = True
+        return hits
+
+    def count_matrix(self, texts, workers=1):
+        """
+        文本 × 分组 的命中数矩阵 (每个分组命中的不同关键词数)
+        相同文本只扫描一次；workers > 1 时按进程分片扫描
+        """
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object), use_na_sentinel=False)
+        uniques = [str(text) for text in uniques]
+
+        workers = min(workers or 1, os.cpu_count() or 1, len(uniques) // MIN_TEXTS_PER_WORKER)
+        if workers > 1:
+            shards = np.array_split(np.arange(len(uniques)), workers)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parts = executor.map(
+                    _hit_matrix_shard, [(self, [uniques[i] for i in shard]) for shard in shards]
+                )
+                hits = np.vstack(list(parts))
+        else:
+            hits = self.hit_matrix(uniques)
+
+        counts = hits.astype(np.int32) @ self.group_matrix
+        return counts[codes]
+
+    def best_group(self, texts, default=None, workers=1):
+        """
+        每条文本命中数最多的分组名 (并列时取分组定义顺序在前者)，没有命中时返回 default
+        """
+        counts = self.count_matrix(texts, workers)
+        labels = np.asarray(self.group_names, dtype=object)[counts.argmax(axis=1)]
+        return np.where(counts.max(axis=1) > 0, labels, default)
+
+
+def _hit_matrix_shard(args):
+    """进程池任务：扫描一个分片的文本"""
+    matcher, texts = args
+    return matcher.hit_matrix(texts)
+
+
+# 不含正则元字符的规则按字面匹配
+_REGEX_META = set('.^$*+?{}[]\\|()')
+
+# 只含普通字符的字符类，如 [？?] 或 [一二三]+，等价于其中任一字符出现
+_CHAR_CLASS = re.compile(r'^\[([^\]\\^-]+)\]\+?$')
+
+
+def _literal_alternatives(rule):
+    """规则可按字面匹配时返回等价的字面串列表，否则返回 None"""
+    if not _REGEX_META.intersection(rule):
+        return [rule]
+    char_class = _CHAR_CLASS.match(rule)
+    if char_class:
+        return list(char_class.group(1))
+    return None
+
+
+class PatternMatcher:
+    """
+    标题模式匹配器
+    字面规则统一进入一个 Aho-Corasick 自动机 (所有文本只扫描一遍)，
+    其余正则规则按分组预编译为一个交替式；各分组可以重叠 (如 "3天" 同时属于数字型和时间型)，
+    因此每个分组单独判断是否命中，且字面规则已命中的文本不再做正则匹配
+    """
+
+    def __init__(self, groups):
+        """
+        Args:
+            groups: {分组名: 规则列表}，规则为字面串或正则表达式 (按 re.search 语义匹配)
+        """
+        self.group_names = list(groups)
+        literals = {}
+        self.regexes = []
+        for name, rules in groups.items():
+            literals[name] = []
+            expressions = []
+            for rule in rules:
+                alternatives = _literal_alternatives(rule)
+                if alternatives is None:
+                    expressions.append(rule)
+                else:
+                    literals[name].extend(alternatives)
+            self.regexes.append(
+                re.compile('|'.join(f'(?:{expr})' for expr in expressions)) if expressions else None
+            )
+        self.literal_matcher = KeywordMatcher(literals)
+
+    def match_matrix(self, texts, workers=1):
+        """文本 × 分组 的布尔命中矩阵 (列顺序同分组定义顺序)，相同文本只匹配一次"""
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object), use_na_sentinel=False)
+        uniques = pd.Series([str(text) for text in uniques], dtype=object)
+
+        matrix = self.literal_matcher.count_matrix(uniques.tolist(), workers) > 0
+        for i, regex in enumerate(self.regexes):
+            if regex is None:
+                continue
+            pending = ~matrix[:, i]
+            if pending.any():
+                matrix[pending, i] = uniques[pending].str.contains(regex).to_numpy(dtype=bool)
+        return matrix[codes]
+
+    def match_frame(self, texts, workers=1):
+        """与 match_matrix 相同，但返回以分组名为列的 DataFrame"""
+        return pd.DataFrame(self.match_matrix(texts, workers), columns=self.group_names)
@@ -12,14 +12,45 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import json
-import re
 from collections import Counter
-import openai
 from typing import List, Dict, Any
 
+# 以脚本方式运行时也能导入同目录下的共享模块
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from data_loader import describe_input_files, load_notes_multi, resolve_input_files
+from engagement import add_engagement_metrics
+from topk import top_k_frame
+from artifact_manifest import register_artifacts
+from text_patterns import PatternMatcher
+from ai_cache import (
+    DEFAULT_MAX_CACHE_MB, DEFAULT_SIMILARITY, DEFAULT_TTL_HOURS,
+    FakeChatClient, ResponseCache, cached_chat_completion
+)
+from ai_batch import (
+    DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY, DEFAULT_RATE_LIMIT, DEFAULT_RETRIES,
+    batched_chat_completions, make_batches, merge_analyses
+)
+
+
+# 标题模式识别规则 (字面串或正则表达式，匹配小写后的标题)
+TITLE_PATTERN_RULES = {
+    '数字型': [r'\d+', r'[一二三四五六七八九十]+', r'第\d+', r'\d+个', r'\d+种', r'\d+天'],
+    '疑问型': [r'[？?]', r'什么', r'怎么', r'如何', r'为什么', r'哪个', r'哪里'],
+    '感叹型': [r'[！!]', r'太', r'超', r'绝了', r'爱了', r'哇', r'天啊'],
+    '对比型': [r'vs', r'对比', r'区别', r'哪个好', r'还是', r'or'],
+    '体验型': [r'体验', r'试用', r'测评', r'亲测', r'真实', r'感受', r'心得'],
+    '教程型': [r'教程', r'教学', r'入门', r'新手', r'零基础', r'学会', r'掌握'],
+    '种草型': [r'推荐', r'安利', r'种草', r'必买', r'好用', r'值得', r'不踩雷'],
+    '时间型': [r'\d+天', r'\d+周', r'\d+月', r'每天', r'坚持', r'第\d+天']
+}
+
+TITLE_PATTERN_MATCHER = PatternMatcher(TITLE_PATTERN_RULES)
+
 
 def setup_openai_client(api_key=None, base_url=None):
-    """设置 OpenAI 客户端"""
+    """设置 OpenAI 客户端 (openai 较重，只在需要 AI 分析时加载)"""
+    import openai
+    
     if api_key:
         openai.api_key = api_key
     else:
@@ -41,37 +72,15 @@ def analyze_title_patterns(titles):
     """分析标题模式"""
     print("🔍 分析标题模式...")
     
-    patterns = {
-        '数字型': [],
-        '疑问型': [],
-        '感叹型': [],
-        '对比型': [],
-        '体验型': [],
-        '教程型': [],
-        '种草型': [],
-        '时间型': []
-    }
+    # 所有标题一次匹配出 标题 × 模式类型 的命中矩阵
+    titles = list(titles)
+    matrix = TITLE_PATTERN_MATCHER.match_matrix(pd.Series(titles, dtype=object).str.lower())
     
-    # 定义模式识别规则
-    pattern_rules = {
-        '数字型': [r'\d+', r'[一二三四五六七八九十]+', r'第\d+', r'\d+个', r'\d+种', r'\d+天'],
-        '疑问型': [r'[？?]', r'什么', r'怎么', r'如何', r'为什么', r'哪个', r'哪里'],
-        '感叹型': [r'[！!]', r'太', r'超', r'绝了', r'爱了', r'哇', r'天啊'],
-        '对比型': [r'vs', r'对比', r'区别', r'哪个好', r'还是', r'or'],
-        '体验型': [r'体验', r'试用', r'测评', r'亲测', r'真实', r'感受', r'心得'],
-        '教程型': [r'教程', r'教学', r'入门', r'新手', r'零基础', r'学会', r'掌握'],
-        '种草型': [r'推荐', r'安利', r'种草', r'必买', r'好用', r'值得', r'不踩雷'],
-        '时间型': [r'\d+天', r'\d+周', r'\d+月', r'每天', r'坚持', r'第\d+天']
+    patterns = {
+        pattern_type: [titles[row] for row in np.flatnonzero(matrix[:, i])]
+        for i, pattern_type in enumerate(TITLE_PATTERN_MATCHER.group_names)
     }
     
-    for title in titles:
-        title_lower = title.lower()
-        for pattern_type, rules in pattern_rules.items():
-            for rule in rules:
-                if re.search(rule, title_lower):
-                    patterns[pattern_type].append(title)
-                    break
-    
     # 统计各类型数量
     pattern_stats = {k: len(v) for k, v in patterns.items()}
     
@@ -82,21 +91,11 @@ def extract_high_engagement_titles(df, top_n=50):
     """提取高互动标题"""
     print(f"📊 提取前 {top_n} 个高互动标题...")
     
-    # 计算总互动数
-    numeric_columns = ['liked_count', 'collected_count', 'comment_count', 'share_count']
-    for col in numeric_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    
-    df['total_engagement'] = (
-        df.get('liked_count', 0) + 
-        df.get('collected_count', 0) + 
-        df.get('comment_count', 0) + 
-        df.get('share_count', 0)
-    )
+    # 计算总互动数 (共享的互动指标模块，已计算过时直接复用)
+    df = add_engagement_metrics(df)
     
     # 按总互动数排序
-    high_engagement_df = df.nlargest(top_n, 'total_engagement')
+    high_engagement_df = top_k_frame(df, 'total_engagement', top_n)
     
     titles = high_engagement_df['title'].fillna('').astype(str).tolist()
     titles = [title.strip() for title in titles if title.strip()]
@@ -104,21 +103,18 @@ def extract_high_engagement_titles(df, top_n=50):
     return titles, high_engagement_df
 
 
-def generate_ai_analysis(titles, client, model="gpt-3.5-turbo"):
-    """使用 AI 分析标题并生成建议"""
-    print("🤖 使用 AI 分析标题模式...")
-    
-    if not client:
-        print("⚠️  OpenAI 客户端未配置，跳过 AI 分析")
-        return None
-    
-    # 准备提示词
-    titles_text = '\n'.join(titles[:30])  # 限制标题数量避免超出 token 限制
+ANALYST_SYSTEM_PROMPT = "你是一个专业的内容营销分析师，擅长分析社交媒体内容趋势和用户行为。"
+
+
+def build_analysis_messages(titles, cluster=None):
+    """构建标题分析请求的消息列表，cluster 为批量分析时该批标题的类型"""
+    titles_text = '\n'.join(titles)
+    cluster_text = f"\n（以下标题均属于「{cluster}」类型）\n" if cluster else ""
     
     prompt = f"""
 请分析以下小红书高互动标题，并提供内容选题建议：
 
-标题列表：
+标题列表：{cluster_text}
 {titles_text}
 
 请从以下几个维度进行分析：
@@ -146,25 +142,51 @@ def generate_ai_analysis(titles, client, model="gpt-3.5-turbo"):
 请以 JSON 格式返回分析结果，包含以上四个部分的详细内容。
 """
     
+    return [
+        {"role": "system", "content": ANALYST_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_ai_response(content):
+    """解析 AI 回复，不是有效的 JSON 时返回原始文本"""
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        return {"raw_analysis": content}
+
+
+def generate_ai_analysis(titles, client, model="gpt-3.5-turbo", cache=None, similarity=DEFAULT_SIMILARITY):
+    """
+    使用 AI 分析标题并生成建议
+    提供 cache 时，相同请求 (或标题集合足够相似的请求) 直接复用缓存的回复
+    """
+    print("🤖 使用 AI 分析标题模式...")
+    
+    if not client:
+        print("⚠️  OpenAI 客户端未配置，跳过 AI 分析")
+        return None
+    
+    # 准备提示词
+    prompt_titles = titles[:30]  # 限制标题数量避免超出 token 限制
+    
     try:
-        response = openai.ChatCompletion.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "你是一个专业的内容营销分析师，擅长分析社交媒体内容趋势和用户行为。"},
-                {"role": "user", "content": prompt}
-            ],
+        ai_analysis, source = cached_chat_completion(
+            client, cache, model,
+            messages=build_analysis_messages(prompt_titles),
+            titles=prompt_titles,
+            similarity=similarity,
             max_tokens=2000,
             temperature=0.7
         )
         
-        ai_analysis = response.choices[0].message.content
+        if source == 'cache':
+            print("♻️  标题未变化，复用缓存的 AI 分析")
+        elif source == 'similar':
+            print("♻️  标题与缓存中的请求基本相同，复用缓存的 AI 分析")
         
         # 尝试解析 JSON
-        try:
-            ai_result = json.loads(ai_analysis)
-        except json.JSONDecodeError:
-            # 如果不是有效的 JSON，返回原始文本
-            ai_result = {"raw_analysis": ai_analysis}
+        ai_result = parse_ai_response(ai_analysis)
         
         print("✅ AI 分析完成")
         return ai_result
@@ -174,6 +196,62 @@ def generate_ai_analysis(titles, client, model="gpt-3.5-turbo"):
         return None
 
 
+def title_pattern_labels(titles):
+    """每个标题的主要模式类型 (按模式定义顺序取第一个命中的类型，没有命中时为 其他)"""
+    matrix = TITLE_PATTERN_MATCHER.match_matrix(pd.Series(list(titles), dtype=object).str.lower())
+    labels = np.asarray(TITLE_PATTERN_MATCHER.group_names, dtype=object)[matrix.argmax(axis=1)]
+    return np.where(matrix.any(axis=1), labels, '其他').tolist()
+
+
+def generate_ai_analysis_batched(titles, client, model="gpt-3.5-turbo", cache=None,
+                                 batch_size=DEFAULT_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY,
+                                 rate_limit=DEFAULT_RATE_LIMIT, retries=DEFAULT_RETRIES):
+    """
+    批量 AI 分析：全部高互动标题按标题模式类型分批，并发请求后合并各批次的结果
+    """
+    print("🤖 使用 AI 批量分析标题模式...")
+    
+    if not client:
+        print("⚠️  OpenAI 客户端未配置，跳过 AI 分析")
+        return None
+    
+    batches = make_batches(titles, title_pattern_labels(titles), batch_size)
+    print(f"📦 {len(titles)} 个标题分为 {len(batches)} 批 (并发数: {concurrency})")
+    
+    results = batched_chat_completions(
+        client, model,
+        [build_analysis_messages(batch_titles, label) for label, batch_titles in batches],
+        cache=cache,
+        titles_batches=[batch_titles for _, batch_titles in batches],
+        concurrency=concurrency,
+        rate_limit=rate_limit,
+        retries=retries,
+        max_tokens=2000,
+        temperature=0.7
+    )
+    
+    batch_results = []
+    for (label, batch_titles), (content, source) in zip(batches, results):
+        if source == 'error':
+            print(f"❌ {label} ({len(batch_titles)} 个标题) 分析失败: {content}")
+            continue
+        analysis = parse_ai_response(content)
+        if not isinstance(analysis, dict):
+            # 回复是 JSON 数组或标量时按原始文本保存，各批次才能按字段合并
+            analysis = {"raw_analysis": content}
+        batch_results.append((label, len(batch_titles), analysis))
+    
+    if not batch_results:
+        print("❌ AI 分析失败: 所有批次均失败")
+        return None
+    
+    reused = sum(1 for _, source in results if source in ('cache', 'inflight'))
+    if reused:
+        print(f"♻️  {reused} 批复用了缓存的 AI 分析")
+    print(f"✅ AI 分析完成 ({len(batch_results)}/{len(batches)} 批成功)")
+    return merge_analyses(batch_results)
+
+
 def generate_topic_suggestions(patterns, pattern_stats, ai_analysis=None):
     """生成选题建议"""
     print("💡 生成选题建议...")
@@ -322,12 +400,20 @@ def save_analysis_results(patterns, pattern_stats, suggestions, calendar, ai_ana
 
         print(f"📄 AI 分析结果已保存到: {ai_output}")
 
-    return {
+    output_files = {
         'patterns': pattern_output,
         'suggestions': suggestions_output,
         'calendar': calendar_output,
         'ai_analysis': ai_output if ai_analysis else None
     }
+    register_artifacts(output_dir, 'topic_generator', {
+        'title_patterns': pattern_output,
+        'topic_csv': suggestions_output,
+        'topic_calendar': calendar_output,
+        'ai_analysis': output_files['ai_analysis']
+    })
+    
+    return output_files
 
 
 def generate_comprehensive_report(pattern_stats, suggestions, calendar, ai_analysis, output_dir):
@@ -378,6 +464,7 @@ def generate_comprehensive_report(pattern_stats, suggestions, calendar, ai_analy
         f.write(f"\n\n报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
 
     print(f"📋 综合分析报告已保存到: {report_path}")
+    register_artifacts(output_dir, 'topic_generator', {'topic_report': report_path})
 
     return report_path
 
@@ -391,6 +478,8 @@ def main():
 使用示例:
   python analysis/topic_generator.py --input core/media_crawler/data/xhs/1_search_contents_2025-07-02.csv
   python analysis/topic_generator.py --input data.csv --top-n 100 --api-key your_openai_key
+  python analysis/topic_generator.py --input data.csv --fake-ai
+  python analysis/topic_generator.py --input data.csv --top-n 300 --ai-mode batched --base-url http://localhost:8000/v1
         """
     )
 
@@ -398,7 +487,17 @@ def main():
         '--input', '-i',
         type=str,
         required=True,
-        help='输入的 CSV 文件路径'
+        help='输入的 CSV 文件路径、目录或 glob 模式 (latest/all 表示爬虫数据目录)'
+    )
+    parser.add_argument(
+        '--since',
+        type=str,
+        help='只分析该日期及之后爬取的文件 (YYYY-MM-DD)'
+    )
+    parser.add_argument(
+        '--until',
+        type=str,
+        help='只分析该日期及之前爬取的文件 (YYYY-MM-DD)'
     )
     parser.add_argument(
         '--output-dir', '-o',
@@ -434,11 +533,75 @@ def main():
         default=30,
         help='生成内容日历的天数 (默认: 30)'
     )
+    parser.add_argument(
+        '--fake-ai',
+        action='store_true',
+        help='使用离线模拟的 AI 客户端 (不调用 API，用于测试)'
+    )
+    parser.add_argument(
+        '--ai-mode',
+        choices=['single', 'batched'],
+        default='single',
+        help='AI 分析方式: single 只分析前 30 个标题; batched 按标题类型分批并发分析全部 --top-n 标题 (默认: single)'
+    )
+    parser.add_argument(
+        '--ai-batch-size',
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f'batched 模式下每批的标题数 (默认: {DEFAULT_BATCH_SIZE})'
+    )
+    parser.add_argument(
+        '--ai-concurrency',
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f'batched 模式下同时进行的请求数 (默认: {DEFAULT_CONCURRENCY})'
+    )
+    parser.add_argument(
+        '--ai-rate-limit',
+        type=float,
+        default=DEFAULT_RATE_LIMIT,
+        help=f'batched 模式下每分钟最多发起的请求数，0 表示不限制 (默认: {DEFAULT_RATE_LIMIT})'
+    )
+    parser.add_argument(
+        '--ai-retries',
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f'batched 模式下单个请求失败后的重试次数 (默认: {DEFAULT_RETRIES})'
+    )
+    parser.add_argument(
+        '--no-ai-cache',
+        action='store_true',
+        help='不使用 AI 响应缓存，每次都请求 API'
+    )
+    parser.add_argument(
+        '--ai-cache-dir',
+        type=str,
+        help='AI 响应缓存目录 (默认: <输出目录>/.cache/ai)'
+    )
+    parser.add_argument(
+        '--ai-cache-ttl-hours',
+        type=float,
+        default=DEFAULT_TTL_HOURS,
+        help=f'AI 响应缓存的有效期，单位小时 (默认: {DEFAULT_TTL_HOURS})'
+    )
+    parser.add_argument(
+        '--ai-cache-max-mb',
+        type=float,
+        default=DEFAULT_MAX_CACHE_MB,
+        help=f'AI 响应缓存的总大小上限，单位 MB (默认: {DEFAULT_MAX_CACHE_MB})'
+    )
+    parser.add_argument(
+        '--ai-cache-similarity',
+        type=float,
+        default=DEFAULT_SIMILARITY,
+        help=f'标题集合相似度不低于该值时复用缓存，1 表示只复用完全相同的请求 (默认: {DEFAULT_SIMILARITY})'
+    )
 
     args = parser.parse_args()
 
-    # 检查输入文件
-    if not os.path.exists(args.input):
+    # 解析输入文件 (支持目录、glob 模式与日期范围)
+    input_files = resolve_input_files(args.input, args.since, args.until)
+    if not input_files:
         print(f"❌ 输入文件不存在: {args.input}")
         sys.exit(1)
 
@@ -451,8 +614,8 @@ def main():
 
     try:
         # 读取数据
-        print(f"📖 读取数据文件: {args.input}")
-        df = pd.read_csv(args.input)
+        print(f"📖 读取数据文件: {describe_input_files(input_files)}")
+        df = load_notes_multi(input_files, 'topic_generator')
 
         print(f"📊 数据概览: {len(df)} 条笔记")
 
@@ -472,10 +635,28 @@ def main():
         openai_client = None
         ai_analysis = None
 
-        if args.api_key or os.getenv('OPENAI_API_KEY'):
+        if args.fake_ai:
+            openai_client = FakeChatClient()
+        elif args.api_key or os.getenv('OPENAI_API_KEY'):
             openai_client = setup_openai_client(args.api_key, args.base_url)
-            if openai_client:
-                ai_analysis = generate_ai_analysis(high_engagement_titles, openai_client, args.model)
+        
+        if openai_client:
+            ai_cache = None
+            if not args.no_ai_cache:
+                ai_cache = ResponseCache(
+                    args.ai_cache_dir or os.path.join(args.output_dir, '.cache', 'ai'),
+                    args.ai_cache_ttl_hours, args.ai_cache_max_mb
+                )
+            if args.ai_mode == 'batched':
+                ai_analysis = generate_ai_analysis_batched(
+                    high_engagement_titles, openai_client, args.model, ai_cache,
+                    args.ai_batch_size, args.ai_concurrency, args.ai_rate_limit, args.ai_retries
+                )
+            else:
+                ai_analysis = generate_ai_analysis(
+                    high_engagement_titles, openai_client, args.model,
+                    ai_cache, args.ai_cache_similarity
+                )
 
         # 生成选题建议
         suggestions = generate_topic_suggestions(patterns, pattern_stats, ai_analysis)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Top-K 选择模块
+基于 np.argpartition 的部分选择，只对选出的 K 条排序，避免对整张表做全量排序；
+同时提供可跨数据块维护 Top-K 的流式累加器
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def top_k_indices(values, k):
+    """
+    返回 values 中最大的 k 个元素的位置 (按值从大到小，值相同时按位置先后)
+    NaN 不参与选择 (与 DataFrame.nlargest 一致)
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    if not valid.all():
+        positions = np.flatnonzero(valid)
+        return positions[top_k_indices(values[positions], k)]
+
+    keys = values
+    n = len(keys)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < n:
+        # 先取出第 k 大的值，再保留所有不小于该值的元素，保证并列时按位置先后取舍
+        kth = keys[np.argpartition(keys, n - k)[n - k:]].min()
+        candidates = np.flatnonzero(keys >= kth)
+    else:
+        candidates = np.arange(n)
+
+    order = np.lexsort((candidates, -keys[candidates]))
+    return candidates[order[:k]]
+
+
+def top_k_frame(df, column, k):
+    """取 df 中 column 最大的 k 行 (已按 column 从大到小排序)"""
+    return df.iloc[top_k_indices(df[column].to_numpy(), k)]
+
+
+def top_k_multi(df, columns, k):
+    """
+    一次取出多个指标各自的 Top-K
+    各指标列先组成一个 行数 × 指标数 的矩阵，再逐列做部分选择
+
+    Returns:
+        {列名: 按该列从大到小排序的前 k 行}
+    """
+    metrics = df[list(columns)].to_numpy(dtype=float)
+    return {
+        column: df.iloc[top_k_indices(metrics[:, i], k)]
+        for i, column in enumerate(columns)
+    }
+
+
+def _group_masks(df, group):
+    """分组列名 (按分组名排序) 或 {分组名: 布尔掩码} 字典转为 {分组名: 掩码}"""
+    if isinstance(group, str):
+        codes, labels = pd.factorize(df[group], sort=True)
+        return {label: codes == i for i, label in enumerate(labels)}
+    return {label: np.asarray(mask, dtype=bool) for label, mask in group.items()}
+
+
+def top_k_by_group(df, column, k, group):
+    """
+    按分组取 Top-K
+    group 可以是列名，也可以是 {分组名: 布尔掩码} 的字典 (一行可属于多个分组，如多个关键词)
+    返回的 DataFrame 增加 group 与 rank 两列
+    """
+    values = df[column].to_numpy()
+    frames = []
+    for label, mask in _group_masks(df, group).items():
+        positions = np.flatnonzero(mask)
+        if len(positions) == 0:
+            continue
+        selected = positions[top_k_indices(values[positions], k)]
+        frames.append(df.iloc[selected].assign(group=label, rank=np.arange(1, len(selected) + 1)))
+
+    if not frames:
+        return df.iloc[:0].assign(group=pd.Series(dtype=object), rank=pd.Series(dtype=int))
+    return pd.concat(frames, ignore_index=True)
+
+
+class StreamingTopK:
+    """
+    跨数据块维护 Top-K
+    每块先用 argpartition 选出本块每个分组的前 K 条，再与该分组已保留的结果合并，
+    内存中每个分组始终只保留 K 条记录；并列时先出现的行优先，
+    结果与把所有数据块拼接后调用 top_k_frame / top_k_by_group 一致
+
+    group 为 None (不分组)、分组列名，或由数据块返回 {分组名: 布尔掩码} 的函数 (一行可属于多个分组)
+    """
+
+    def __init__(self, column, k, group=None):
+        self.column = column
+        self.k = k
+        self.group = group
+        self.best = {}
+        self.labels = {}
+        self.empty = None
+
+    def _masks(self, chunk):
+        if self.group is None:
+            return {None: np.ones(len(chunk), dtype=bool)}
+        if callable(self.group):
+            return _group_masks(chunk, self.group(chunk))
+        return _group_masks(chunk, self.group)
+
+    def update(self, chunk):
+        """合并一个数据块"""
+        if self.empty is None:
+            self.empty = chunk.iloc[:0]
+
+        values = chunk[self.column].to_numpy()
+        for label, mask in self._masks(chunk).items():
+            self.labels.setdefault(label, None)
+            positions = np.flatnonzero(mask)
+            if len(positions) == 0:
+                continue
+            selected = chunk.iloc[positions[top_k_indices(values[positions], self.k)]]
+            if label in self.best:
+                # 已保留的行都来自更早的数据块，放在前面使并列时先出现的行优先
+                selected = top_k_frame(
+                    pd.concat([self.best[label], selected], ignore_index=True), self.column, self.k
+                )
+            self.best[label] = selected.reset_index(drop=True)
+        return self
+
+    def result(self):
+        """
+        当前的 Top-K 结果，尚未合并任何数据块时返回 None
+        不分组时为按 column 从大到小排序的前 K 行；分组时与 top_k_by_group 相同，增加 group 与 rank 两列
+        """
+        if self.empty is None:
+            return None
+        if self.group is None:
+            return self.best.get(None, self.empty)
+
+        # 分组列按分组名排序，掩码分组按首次出现的顺序 (与 top_k_by_group 一致)
+        labels = sorted(self.best) if isinstance(self.group, str) else [
+            label for label in self.labels if label in self.best
+        ]
+        if not labels:
+            return self.empty.assign(group=pd.Series(dtype=object), rank=pd.Series(dtype=int))
+        return pd.concat([
+            self.best[label].assign(group=label, rank=np.arange(1, len(self.best[label]) + 1))
+            for label in labels
+        ], ignore_index=True)
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+用户画像存储模块
+按用户持久化累计互动统计 (sum/count/max、最近出现日期、关键词命中数)，
+每次爬取后只重算本批笔记涉及的用户，KOC 筛选可直接基于完整历史进行
+"""
+
+import os
+import sys
+import argparse
+import sqlite3
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# 以脚本方式运行时也能导入同目录下的共享模块
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from data_loader import (
+    COUNT_COLUMNS, DEFAULT_CHUNK_SIZE, NOTE_ID_COLUMN, describe_input_files,
+    get_file_date, iter_notes, resolve_input_files
+)
+
+
+DEFAULT_STORE_PATH = 'output/user_profiles.db'
+
+# 统计字段名 (liked_count -> liked)
+STAT_NAMES = [col.replace('_count', '') for col in COUNT_COLUMNS]
+
+# 单个目标关键词的用户级匹配列前缀 (如 keyword_match_普拉提)
+KEYWORD_FLAG_PREFIX = 'keyword_match_'
+
+# 入库需要的笔记列
+STORE_COLUMNS = [NOTE_ID_COLUMN, 'user_id', 'nickname', 'title'] + COUNT_COLUMNS
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS user_profiles (
+    user_id TEXT NOT NULL,
+    nickname TEXT NOT NULL,
+    note_rows INTEGER NOT NULL DEFAULT 0,
+    post_count INTEGER NOT NULL DEFAULT 0,
+    {', '.join(f'total_{name} INTEGER NOT NULL DEFAULT 0' for name in STAT_NAMES)},
+    {', '.join(f'max_{name} INTEGER NOT NULL DEFAULT 0' for name in STAT_NAMES)},
+    first_seen TEXT,
+    last_seen TEXT,
+    PRIMARY KEY (user_id, nickname)
+);
+CREATE TABLE IF NOT EXISTS notes (
+    note_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    nickname TEXT NOT NULL,
+    title TEXT,
+    {', '.join(f'{col} INTEGER NOT NULL DEFAULT 0' for col in COUNT_COLUMNS)},
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notes_user ON notes (user_id, nickname);
+CREATE TABLE IF NOT EXISTS keyword_hits (
+    user_id TEXT NOT NULL,
+    nickname TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, nickname, keyword)
+);
+CREATE TABLE IF NOT EXISTS tracked_keywords (
+    keyword TEXT PRIMARY KEY
+);
+"""
+
+
+class UserProfileStore:
+    """基于 SQLite 的用户累计统计存储"""
+
+    def __init__(self, db_path=DEFAULT_STORE_PATH):
+        """
+        打开 (或创建) 用户画像存储
+
+        Args:
+            db_path: SQLite 数据库文件路径
+        """
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+
+        # 旧版存储的笔记表没有标题，无法重算用户统计与关键词命中
+        note_columns = {row[1] for row in self.conn.execute("PRAGMA table_info(notes)")}
+        if note_columns and 'title' not in note_columns:
+            self.conn.close()
+            raise ValueError(f"用户画像存储为旧版格式: {db_path}，请删除后重新导入")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _previous_owners(self, note_ids):
+        """已入库笔记上一次快照中的用户 (user_id, nickname)"""
+        self.conn.execute("DROP TABLE IF EXISTS temp.batch_ids")
+        self.conn.execute("CREATE TEMP TABLE batch_ids (note_id TEXT PRIMARY KEY)")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO temp.batch_ids VALUES (?)", ((nid,) for nid in note_ids)
+        )
+        return pd.read_sql_query(
+            "SELECT n.note_id, n.user_id, n.nickname "
+            "FROM notes n JOIN temp.batch_ids b ON n.note_id = b.note_id",
+            self.conn
+        ).set_index(NOTE_ID_COLUMN)
+
+    def _set_batch_users(self, users):
+        """把本批涉及的用户写入临时表 temp.batch_users"""
+        self.conn.execute("DROP TABLE IF EXISTS temp.batch_users")
+        self.conn.execute(
+            "CREATE TEMP TABLE batch_users (user_id TEXT, nickname TEXT, PRIMARY KEY (user_id, nickname))"
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO temp.batch_users VALUES (?, ?)",
+            users[['user_id', 'nickname']].itertuples(index=False, name=None)
+        )
+
+    def _rebuild_profiles(self):
+        """
+        由笔记快照重算 temp.batch_users 中用户的统计
+        笔记换了用户 (改昵称或归属变化) 时，原用户与新用户都在重算范围内，
+        合计值、最大值与发布数都与按最新快照聚合的结果一致
+        """
+        stat_columns = ['note_rows', 'post_count'] + [
+            f'{kind}_{name}' for kind in ('total', 'max') for name in STAT_NAMES
+        ]
+        stat_exprs = ['COUNT(*)', 'COUNT(n.title)'] + [
+            f'{func}(n.{col})' for func in ('SUM', 'MAX') for col in COUNT_COLUMNS
+        ]
+        self.conn.execute(
+            "DELETE FROM user_profiles WHERE (user_id, nickname) IN "
+            "(SELECT user_id, nickname FROM temp.batch_users)"
+        )
+        self.conn.execute(
+            f"INSERT INTO user_profiles (user_id, nickname, {', '.join(stat_columns)}, first_seen, last_seen) "
+            f"SELECT n.user_id, n.nickname, {', '.join(stat_exprs)}, MIN(n.first_seen), MAX(n.last_seen) "
+            "FROM notes n JOIN temp.batch_users u ON n.user_id = u.user_id AND n.nickname = u.nickname "
+            "GROUP BY n.user_id, n.nickname"
+        )
+
+    @staticmethod
+    def _count_keyword_hits(notes, keywords):
+        """按用户统计每个关键词命中的笔记数 (匹配规则与 koc_filter 一致)，返回 [(user_id, nickname, 关键词, 命中数)]"""
+        titles = notes['title'].astype(str).str.lower()
+        rows = []
+        for keyword in keywords:
+            hit = titles.str.contains(keyword.lower(), regex=False) & notes['title'].notna()
+            if not hit.any():
+                continue
+            hits = notes[hit].groupby(['user_id', 'nickname']).size()
+            rows.extend(
+                (user_id, nickname, keyword, int(count)) for (user_id, nickname), count in hits.items()
+            )
+        return rows
+
+    def _rebuild_keyword_hits(self):
+        """重算 temp.batch_users 中用户对所有已跟踪关键词的命中数"""
+        keywords = sorted(self.tracked_keywords())
+        self.conn.execute(
+            "DELETE FROM keyword_hits WHERE (user_id, nickname) IN "
+            "(SELECT user_id, nickname FROM temp.batch_users)"
+        )
+        if not keywords:
+            return
+        notes = pd.read_sql_query(
+            "SELECT n.user_id, n.nickname, n.title "
+            "FROM notes n JOIN temp.batch_users u ON n.user_id = u.user_id AND n.nickname = u.nickname",
+            self.conn
+        )
+        self.conn.executemany(
+            "INSERT INTO keyword_hits VALUES (?, ?, ?, ?)", self._count_keyword_hits(notes, keywords)
+        )
+
+    def track_keywords(self, keywords, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        开始跟踪关键词：新增的关键词对已入库的全部笔记回填命中数，
+        与从头聚合全部数据的结果一致
+
+        Returns:
+            新增的关键词列表
+        """
+        added = [kw for kw in dict.fromkeys(keywords or []) if kw not in self.tracked_keywords()]
+        if not added:
+            return added
+
+        self.conn.executemany("DELETE FROM keyword_hits WHERE keyword = ?", ((kw,) for kw in added))
+        if self.conn.execute("SELECT 1 FROM notes LIMIT 1").fetchone():
+            print(f"🗂️  回填关键词命中数: {', '.join(added)}")
+            for notes in pd.read_sql_query(
+                "SELECT user_id, nickname, title FROM notes", self.conn, chunksize=chunk_size
+            ):
+                # 同一用户的笔记可能分在不同块中，命中数逐块累加
+                self.conn.executemany(
+                    "INSERT INTO keyword_hits VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(user_id, nickname, keyword) DO UPDATE SET hits = hits + excluded.hits",
+                    self._count_keyword_hits(notes, added)
+                )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO tracked_keywords VALUES (?)", ((kw,) for kw in added)
+        )
+        self.conn.commit()
+        return added
+
+    def ingest(self, df, seen_date=None, keywords=None):
+        """
+        增量写入一批笔记
+        保存每条笔记的最新快照，再由快照重算本批涉及的用户 (包括笔记原来所属的用户)，
+        因此重复导入、互动数变化、用户改昵称或笔记归属变化都不会重复计数或留下过期的统计
+
+        Returns:
+            (新笔记数, 更新的已有笔记数)
+        """
+        if NOTE_ID_COLUMN not in df.columns:
+            raise ValueError("数据中缺少 note_id 列，无法增量更新用户画像")
+
+        seen_date = seen_date or datetime.now().strftime('%Y-%m-%d')
+        # 与按用户聚合一致，缺少用户标识的笔记不计入
+        notes = df[STORE_COLUMNS].dropna(subset=[NOTE_ID_COLUMN, 'user_id', 'nickname'])
+        for col in [NOTE_ID_COLUMN, 'user_id', 'nickname']:
+            notes[col] = notes[col].astype(str)
+        notes = notes.drop_duplicates(NOTE_ID_COLUMN, keep='last').set_index(NOTE_ID_COLUMN)
+
+        # 新关键词先对已有笔记回填，本批用户随后按全部已跟踪关键词重算
+        self.track_keywords(keywords)
+
+        previous = self._previous_owners(notes.index)
+        is_new = ~notes.index.isin(previous.index)
+
+        # 保存最新快照 (首次出现日期保持不变)
+        counts = notes[COUNT_COLUMNS].astype(np.int64)
+        titles = notes['title'].astype(object).where(notes['title'].notna(), None)
+        self.conn.executemany(
+            f"INSERT INTO notes (note_id, user_id, nickname, title, {', '.join(COUNT_COLUMNS)}, "
+            f"first_seen, last_seen) VALUES ({', '.join(['?'] * (6 + len(COUNT_COLUMNS)))}) "
+            "ON CONFLICT(note_id) DO UPDATE SET user_id = excluded.user_id, "
+            "nickname = excluded.nickname, title = excluded.title, "
+            f"{', '.join(f'{col} = excluded.{col}' for col in COUNT_COLUMNS)}, "
+            "last_seen = MAX(last_seen, excluded.last_seen)",
+            (
+                (note_id, user_id, nickname, None if title is None else str(title),
+                 *map(int, row_counts), seen_date, seen_date)
+                for note_id, user_id, nickname, title, row_counts in zip(
+                    notes.index, notes['user_id'], notes['nickname'], titles,
+                    counts.itertuples(index=False, name=None)
+                )
+            )
+        )
+
+        # 本批笔记现在与原来所属的用户都需要重算
+        affected = pd.concat([notes[['user_id', 'nickname']], previous[['user_id', 'nickname']]])
+        self._set_batch_users(affected.drop_duplicates())
+        self._rebuild_profiles()
+        self._rebuild_keyword_hits()
+        self.conn.commit()
+
+        return int(is_new.sum()), int((~is_new).sum())
+
+    def tracked_keywords(self):
+        """已跟踪 (统计命中数) 的关键词"""
+        return {row[0] for row in self.conn.execute("SELECT keyword FROM tracked_keywords")}
+
+    def _user_stats_query(self, target_keywords):
+        """用户统计查询，每个目标关键词对应一个 EXISTS 子查询 (按 keyword_hits 主键查找)"""
+        hit_columns = ''.join(
+            ", EXISTS (SELECT 1 FROM keyword_hits h WHERE h.user_id = p.user_id "
+            f"AND h.nickname = p.nickname AND h.keyword = ? AND h.hits > 0) AS _hit_{i}"
+            for i in range(len(target_keywords or []))
+        )
+        return (
+            f"SELECT p.*{hit_columns} FROM user_profiles p ORDER BY p.user_id, p.nickname",
+            list(target_keywords or [])
+        )
+
+    @staticmethod
+    def _finish_user_stats(user_stats, target_keywords):
+        """由合计值计算平均值并整理关键词匹配列"""
+        for name in STAT_NAMES:
+            user_stats[f'avg_{name}'] = (
+                user_stats[f'total_{name}'] / user_stats['note_rows']
+            ).round(2)
+
+        if target_keywords:
+            hit_columns = [f'_hit_{i}' for i in range(len(target_keywords))]
+            hits = user_stats[hit_columns].to_numpy(dtype=bool)
+            user_stats = user_stats.drop(columns=hit_columns)
+            user_stats['keyword_match'] = hits.any(axis=1)
+            if len(target_keywords) > 1:
+                for i, keyword in enumerate(target_keywords):
+                    user_stats[f'{KEYWORD_FLAG_PREFIX}{keyword}'] = hits[:, i]
+        else:
+            user_stats['keyword_match'] = True
+
+        return user_stats.drop(columns=['note_rows'])
+
+    def iter_user_stats(self, target_keywords=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        按 chunk_size 个用户分块读取用户累计统计
+        各块的列与行顺序与 load_user_stats 一致，内存中只保留当前块
+        """
+        # 之前未跟踪的关键词先回填，结果与从头聚合一致
+        self.track_keywords(target_keywords)
+
+        query, params = self._user_stats_query(target_keywords)
+        for user_stats in pd.read_sql_query(query, self.conn, params=params, chunksize=chunk_size):
+            yield self._finish_user_stats(user_stats, target_keywords)
+
+    def load_user_stats(self, target_keywords=None):
+        """
+        读取用户累计统计，列与 koc_filter.aggregate_user_stats 的结果一致
+        """
+        self.track_keywords(target_keywords)
+
+        query, params = self._user_stats_query(target_keywords)
+        return self._finish_user_stats(
+            pd.read_sql_query(query, self.conn, params=params), target_keywords
+        )
+
+
+def update_profile_store(input_files, db_path=DEFAULT_STORE_PATH, keywords=None,
+                         chunk_size=DEFAULT_CHUNK_SIZE):
+    """将数据文件按爬取日期从旧到新分块写入用户画像存储"""
+    with UserProfileStore(db_path) as store:
+        for path in input_files:
+            seen_date = get_file_date(path).strftime('%Y-%m-%d')
+            new_count = updated_count = 0
+            for chunk in iter_notes(path, columns=STORE_COLUMNS, chunk_size=chunk_size):
+                chunk_new, chunk_updated = store.ingest(chunk, seen_date, keywords)
+                new_count += chunk_new
+                updated_count += chunk_updated
+            print(f"🗂️  {os.path.basename(path)}: 新增 {new_count} 条笔记, 更新 {updated_count} 条")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='小红书用户画像增量更新工具',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python analysis/user_profile_store.py --input latest --keywords 普拉提,健身,瑜伽
+  python analysis/user_profile_store.py --input all --store output/user_profiles.db
+        """
+    )
+
+    parser.add_argument(
+        '--input', '-i',
+        type=str,
+        required=True,
+        help='输入的 CSV 文件路径、目录或 glob 模式 (latest/all 表示爬虫数据目录)'
+    )
+    parser.add_argument(
+        '--since',
+        type=str,
+        help='只导入该日期及之后爬取的文件 (YYYY-MM-DD)'
+    )
+    parser.add_argument(
+        '--until',
+        type=str,
+        help='只导入该日期及之前爬取的文件 (YYYY-MM-DD)'
+    )
+    parser.add_argument(
+        '--store',
+        type=str,
+        default=DEFAULT_STORE_PATH,
+        help=f'用户画像数据库路径 (默认: {DEFAULT_STORE_PATH})'
+    )
+    parser.add_argument(
+        '--keywords',
+        type=str,
+        help='需要统计命中数的关键词，用逗号分隔 (如: 普拉提,健身,瑜伽)'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f'每次写入的笔记数 (默认: {DEFAULT_CHUNK_SIZE})'
+    )
+
+    args = parser.parse_args()
+
+    input_files = resolve_input_files(args.input, args.since, args.until)
+    if not input_files:
+        print(f"❌ 输入文件不存在: {args.input}")
+        sys.exit(1)
+
+    keywords = [kw.strip() for kw in args.keywords.split(',')] if args.keywords else None
+
+    print("=" * 60)
+    print("🗂️  小红书用户画像增量更新")
+    print("=" * 60)
+    print(f"📖 读取数据文件: {describe_input_files(input_files)}")
+
+    try:
+        update_profile_store(input_files, args.store, keywords, args.chunk_size)
+        print(f"\n✅ 用户画像已更新: {args.store}")
+    except Exception as e:
+        print(f"❌ 更新过程中出现错误: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析模块启动耗时基准
+对每个分析模块运行 python -X importtime，统计模块导入的总耗时与最重的依赖，
+并测量 CLI 以 --help 启动的实际耗时；超过阈值时以非零状态退出，可用于 CI 检查
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+
+ANALYSIS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'analysis')
+
+DEFAULT_MODULES = [
+    'keyword_analysis',
+    'competitor_analysis',
+    'koc_filter',
+    'topic_generator',
+    'export_notionsheet',
+    'user_profile_store'
+]
+
+
+def parse_importtime(stderr):
+    """
+    解析 -X importtime 的输出
+
+    Returns:
+        [(模块名, 自身耗时 us, 累计耗时 us, 层级)]，层级 0 为被测模块本身
+    """
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_part, cumulative_part, raw_name = line.split('|')
+        self_us = int(self_part.split(':')[1])
+        cumulative_us = int(cumulative_part)
+        # 模块名前的缩进表示导入层级 (每层两个空格)
+        depth = (len(raw_name) - len(raw_name.lstrip(' ')) - 1) // 2
+        records.append((raw_name.strip(), self_us, cumulative_us, depth))
+    return records
+
+
+def measure_module(module, top=5):
+    """测量一个模块的导入耗时，返回 (总耗时秒, 最重的直接依赖, --help 耗时秒)"""
+    env = dict(os.environ, PYTHONPATH=ANALYSIS_DIR)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=env, cwd=ANALYSIS_DIR
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    records = parse_importtime(result.stderr)
+    total = next(cumulative for name, _, cumulative, depth in records if depth == 0 and name == module)
+    direct = sorted(
+        [(name, cumulative) for name, _, cumulative, depth in records if depth == 1],
+        key=lambda item: item[1], reverse=True
+    )[:top]
+
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(ANALYSIS_DIR, f'{module}.py'), '--help'],
+        capture_output=True, env=env, cwd=ANALYSIS_DIR
+    )
+    help_seconds = time.perf_counter() - start
+
+    return total / 1e6, direct, help_seconds
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='分析模块导入耗时基准 (python -X importtime)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python scripts/benchmark_imports.py
+  python scripts/benchmark_imports.py --modules keyword_analysis topic_generator --top 10
+  python scripts/benchmark_imports.py --threshold 0.8
+        """
+    )
+    parser.add_argument(
+        '--modules',
+        nargs='+',
+        default=DEFAULT_MODULES,
+        help='要测量的分析模块 (默认: 全部分析模块)'
+    )
+    parser.add_argument(
+        '--top',
+        type=int,
+        default=5,
+        help='每个模块列出耗时最多的前 N 个直接依赖 (默认: 5)'
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=1.0,
+        help='导入耗时上限 (秒)，任一模块超过时以状态 1 退出 (默认: 1.0)'
+    )
+
+    args = parser.parse_args()
+
+    print("⏱️  分析模块导入耗时 (python -X importtime)")
+    print("=" * 60)
+
+    slow = []
+    for module in args.modules:
+        try:
+            total, direct, help_seconds = measure_module(module, args.top)
+        except Exception as e:
+            print(f"❌ {module}: 导入失败 ({e})")
+            slow.append(module)
+            continue
+
+        icon = "✅" if total <= args.threshold else "⚠️ "
+        print(f"{icon} {module}: 导入 {total:.3f}s, --help 启动 {help_seconds:.3f}s")
+        for name, cumulative in direct:
+            print(f"     {name:<28} {cumulative / 1e3:8.1f} ms")
+        if total > args.threshold:
+            slow.append(module)
+
+    print("=" * 60)
+    if slow:
+        print(f"⚠️  超过 {args.threshold}s 的模块: {', '.join(slow)}")
+        sys.exit(1)
+    print(f"✅ 所有模块导入耗时均在 {args.threshold}s 以内")
+
+
+if __name__ == "__main__":
+    main()
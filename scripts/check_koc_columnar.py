@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KOC 批量评分一致性检查
+在输出目录的用户统计样例 (all_users_stats_*.csv / koc_users_*.csv) 与覆盖各分档边界的构造数据上，
+比较批量版本 classify_user_types / calculate_koc_scores 与逐行版本
+classify_user_type / calculate_koc_score 的结果；不一致时以非零状态退出，可用于 CI 检查
+"""
+
+import os
+import sys
+import glob
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'analysis'))
+from koc_filter import (
+    BRAND_KEYWORDS, calculate_koc_score, calculate_koc_scores,
+    classify_user_type, classify_user_types
+)
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PATTERNS = [
+    os.path.join(PROJECT_ROOT, 'output', 'all_users_stats_*.csv'),
+    os.path.join(PROJECT_ROOT, 'output', 'koc_users_*.csv')
+]
+
+# 评分与分类用到的列
+SCORE_COLUMNS = ['nickname', 'estimated_followers', 'post_count', 'avg_total_engagement', 'avg_engagement_rate']
+
+# 粉丝数与互动数的分档边界
+FOLLOWER_EDGES = [100, 999, 1000, 3999, 4000, 10000, 10001, 20000, 50000]
+LIKES_COLLECTIONS_EDGES = [0, 9999, 10000, 49999, 50000, 99999, 100000]
+
+
+def make_boundary_stats(rows=20000, seed=0):
+    """构造覆盖各分档边界 (含品牌昵称) 的用户统计"""
+    rng = np.random.default_rng(seed)
+    # 互动数按 0.8 换算为赞藏量，边界值两侧各取一点
+    engagement = np.array([edge / 0.8 + delta for edge in LIKES_COLLECTIONS_EDGES for delta in (-1, 0, 1)])
+    nicknames = np.array(['普通用户', '健身达人'] + [f'某某{kw}' for kw in BRAND_KEYWORDS], dtype=object)
+
+    return pd.DataFrame({
+        'nickname': rng.choice(nicknames, rows),
+        'estimated_followers': np.concatenate([
+            rng.choice(FOLLOWER_EDGES, rows // 2), rng.integers(100, 60000, rows - rows // 2)
+        ]),
+        'post_count': rng.integers(1, 30, rows),
+        'avg_total_engagement': np.concatenate([
+            rng.choice(engagement, rows // 2), rng.uniform(0, 150000, rows - rows // 2).round(2)
+        ]),
+        'avg_engagement_rate': rng.uniform(0, 20, rows).round(2)
+    })
+
+
+def compare_scores(user_stats):
+    """
+    比较批量版本与逐行版本
+
+    Returns:
+        (user_type 不一致的行数, koc_score 不一致的行数)
+    """
+    expected_types = np.array([
+        classify_user_type(row['nickname'], row['estimated_followers'], row['avg_total_engagement'])
+        for _, row in user_stats.iterrows()
+    ], dtype=object)
+    expected_scores = user_stats.apply(calculate_koc_score, axis=1).to_numpy()
+
+    type_mismatches = int((classify_user_types(user_stats) != expected_types).sum())
+    score_mismatches = int((calculate_koc_scores(user_stats) != expected_scores).sum())
+    return type_mismatches, score_mismatches
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='KOC 批量分类与评分的一致性检查',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python scripts/check_koc_columnar.py
+  python scripts/check_koc_columnar.py --inputs "output/all_users_stats_*.csv" --rows 100000
+        """
+    )
+    parser.add_argument(
+        '--inputs',
+        nargs='+',
+        default=DEFAULT_PATTERNS,
+        help='用户统计 CSV 的 glob 模式 (默认: 输出目录中的 all_users_stats / koc_users 文件)'
+    )
+    parser.add_argument(
+        '--rows',
+        type=int,
+        default=20000,
+        help='构造的边界数据行数，0 表示不构造 (默认: 20000)'
+    )
+
+    args = parser.parse_args()
+
+    samples = []
+    for pattern in args.inputs:
+        for path in sorted(glob.glob(pattern)):
+            samples.append((os.path.basename(path), pd.read_csv(path, encoding='utf-8-sig')))
+    if args.rows > 0:
+        samples.append(('边界数据', make_boundary_stats(args.rows)))
+
+    if not samples:
+        print("❌ 没有可检查的数据")
+        sys.exit(1)
+
+    print(f"🔍 检查 KOC 批量分类与评分: {len(samples)} 份数据")
+    failed = []
+    for name, user_stats in samples:
+        missing = [col for col in SCORE_COLUMNS if col not in user_stats.columns]
+        if missing:
+            print(f"⏭️  {name}: 缺少列 {', '.join(missing)}，跳过")
+            continue
+        type_mismatches, score_mismatches = compare_scores(user_stats[SCORE_COLUMNS])
+        if type_mismatches or score_mismatches:
+            print(f"❌ {name}: user_type 不一致 {type_mismatches} 行, koc_score 不一致 {score_mismatches} 行")
+            failed.append(name)
+        else:
+            print(f"✅ {name}: {len(user_stats)} 行一致")
+
+    if failed:
+        sys.exit(1)
+    print("✅ 批量版本与逐行版本结果一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+用户画像存储一致性检查
+分两天把笔记写入临时存储 (第二天包含用户改昵称、笔记换用户、互动数变化、新笔记与新增关键词)，
+再与按最新快照直接聚合 (koc_filter.aggregate_user_stats) 的结果逐列比较；不一致时以非零状态退出，可用于 CI 检查
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'analysis'))
+from data_loader import COUNT_COLUMNS, NOTE_ID_COLUMN, load_notes
+from koc_filter import USER_KEYS, aggregate_user_stats
+from user_profile_store import STORE_COLUMNS, UserProfileStore
+
+
+DEFAULT_KEYWORDS = ['普拉提', '瑜伽', '健身']
+# 第二天才开始跟踪的关键词 (检查已入库笔记的回填)
+LATE_KEYWORD = '普拉提课'
+
+SAMPLE_TITLES = [
+    '普拉提入门教程', '普拉提课程分享', '瑜伽晨练打卡', '健身新手指南', '居家健身计划',
+    '减脂餐食谱', '跑步装备推荐', '普拉提课后拉伸', '瑜伽垫测评', None
+]
+
+
+def make_sample_notes(note_count=2000, user_count=300, seed=0):
+    """生成第一天的样例笔记 (固定种子，结果可复现)"""
+    rng = np.random.default_rng(seed)
+    user_index = rng.integers(0, user_count, note_count)
+    notes = pd.DataFrame({
+        NOTE_ID_COLUMN: [f'note_{i:06d}' for i in range(note_count)],
+        'user_id': [f'user_{i:04d}' for i in user_index],
+        'nickname': [f'博主{i}' for i in user_index],
+        'title': rng.choice(np.array(SAMPLE_TITLES, dtype=object), note_count)
+    })
+    for col in COUNT_COLUMNS:
+        notes[col] = rng.integers(0, 2000, note_count)
+    return notes
+
+
+def make_next_day(notes, seed=1):
+    """
+    由第一天的笔记生成第二天的爬取结果：
+    部分用户改昵称、部分笔记换到其他用户、互动数增长、部分旧笔记未出现、新增笔记
+    """
+    rng = np.random.default_rng(seed)
+    day2 = notes.copy()
+
+    renamed = rng.choice(day2['user_id'].unique(), 20, replace=False)
+    mask = day2['user_id'].isin(renamed)
+    day2.loc[mask, 'nickname'] = day2.loc[mask, 'nickname'] + '_新'
+
+    moved = rng.choice(len(day2), 30, replace=False)
+    source = (moved + 7) % len(day2)
+    day2.loc[moved, 'user_id'] = day2['user_id'].to_numpy()[source]
+    day2.loc[moved, 'nickname'] = day2['nickname'].to_numpy()[source]
+
+    for col in COUNT_COLUMNS:
+        day2[col] = day2[col] + rng.integers(0, 50, len(day2))
+
+    kept = day2.iloc[rng.permutation(len(day2))[:int(len(day2) * 0.9)]]
+    new_notes = make_sample_notes(200, 320, seed + 1)
+    new_notes[NOTE_ID_COLUMN] = 'new_' + new_notes[NOTE_ID_COLUMN]
+    return pd.concat([kept, new_notes], ignore_index=True)
+
+
+def prepare_notes(df):
+    """只保留入库需要的列，用户标识与标题转为普通字符串 (None 表示空值)"""
+    df = df[STORE_COLUMNS].dropna(subset=[NOTE_ID_COLUMN, 'user_id', 'nickname']).copy()
+    for col in [NOTE_ID_COLUMN, 'user_id', 'nickname']:
+        df[col] = df[col].astype(str)
+    df['title'] = df['title'].astype(object).where(df['title'].notna(), None)
+    return df.drop_duplicates(NOTE_ID_COLUMN, keep='last').reset_index(drop=True)
+
+
+def compare_stats(actual, expected):
+    """逐列比较两份用户统计，返回不一致的说明列表"""
+    problems = []
+    if len(actual) != len(expected):
+        problems.append(f"用户数不一致: 存储 {len(actual)}, 直接聚合 {len(expected)}")
+        return problems
+
+    missing = [col for col in expected.columns if col not in actual.columns]
+    if missing:
+        problems.append(f"存储结果缺少列: {', '.join(missing)}")
+
+    actual = actual.sort_values(USER_KEYS).reset_index(drop=True)
+    expected = expected.sort_values(USER_KEYS).reset_index(drop=True)
+    for col in expected.columns:
+        if col in missing:
+            continue
+        diff = actual[col].astype(str).to_numpy() != expected[col].astype(str).to_numpy()
+        if diff.any():
+            problems.append(f"{col}: {int(diff.sum())} 个用户不一致")
+    return problems
+
+
+def run_check(day1, day2, keywords):
+    """分两天入库后与直接聚合比较，返回不一致的说明列表"""
+    day2_keywords = keywords + [LATE_KEYWORD]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with UserProfileStore(os.path.join(tmp_dir, 'user_profiles.db')) as store:
+            store.ingest(day1, '2026-01-01', keywords)
+            store.ingest(day2, '2026-01-02', day2_keywords)
+            actual = store.load_user_stats(day2_keywords)
+
+    # 存储保存的是每条笔记的最新快照
+    latest = pd.concat([day1, day2], ignore_index=True).drop_duplicates(NOTE_ID_COLUMN, keep='last')
+    expected = aggregate_user_stats(latest, day2_keywords)
+    return compare_stats(actual, expected)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='用户画像存储与直接聚合的一致性检查',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python scripts/check_profile_store.py
+  python scripts/check_profile_store.py --input data/xhs/1_search_contents_2026-01-01.csv
+        """
+    )
+    parser.add_argument(
+        '--input', '-i',
+        type=str,
+        help='作为第一天数据的爬取 CSV (默认: 生成样例数据)'
+    )
+    parser.add_argument(
+        '--keywords', '-k',
+        nargs='+',
+        default=DEFAULT_KEYWORDS,
+        help=f"目标关键词 (默认: {' '.join(DEFAULT_KEYWORDS)})"
+    )
+
+    args = parser.parse_args()
+
+    day1 = load_notes(args.input) if args.input else make_sample_notes()
+    day1 = prepare_notes(day1)
+    day2 = prepare_notes(make_next_day(day1))
+
+    print(f"🔍 检查用户画像存储: 第一天 {len(day1)} 条笔记, 第二天 {len(day2)} 条笔记")
+    problems = run_check(day1, day2, args.keywords)
+
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+    print("✅ 存储结果与直接聚合一致 (含改昵称、笔记换用户与新增关键词)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式 Top-K 一致性检查
+1. 在并列值很多的构造数据上，按不同块大小比较 StreamingTopK 与对整表调用 top_k_frame / top_k_by_group 的结果
+2. 把笔记写入临时用户画像存储，比较分块筛选 (stream_koc_shortlist) 与读入全部用户后
+   shortlist_koc_users 的候选名单、Top-K 用户与 KOC 特征统计
+不一致时以非零状态退出，可用于 CI 检查
+"""
+
+import io
+import os
+import sys
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'analysis'))
+from koc_filter import (
+    analyze_koc_characteristics, score_user_stats, shortlist_koc_users, stream_koc_shortlist
+)
+from topk import StreamingTopK, top_k_by_group, top_k_frame
+from user_profile_store import UserProfileStore
+from data_loader import load_notes
+from check_profile_store import DEFAULT_KEYWORDS, make_sample_notes, prepare_notes
+
+
+DEFAULT_CHUNK_SIZES = [13, 250, 5000]
+DEFAULT_TOP_K = 10
+
+
+def frames_equal(actual, expected):
+    """按值比较两个 DataFrame (忽略索引与数据块拼接带来的类型差异)"""
+    if list(actual.columns) != list(expected.columns) or len(actual) != len(expected):
+        return False
+    return all(
+        (actual[col].astype(str).to_numpy() == expected[col].astype(str).to_numpy()).all()
+        for col in expected.columns
+    )
+
+
+def iter_chunks(df, chunk_size):
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def check_accumulator(chunk_sizes, k, rows=5000, seed=0):
+    """StreamingTopK 与整表 Top-K 比较 (不分组、按列分组、按掩码分组)，返回不一致的说明列表"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'row': np.arange(rows),
+        # 取值范围小，产生大量并列；少量 NaN 不参与选择
+        'score': np.where(rng.random(rows) < 0.02, np.nan, rng.integers(0, 20, rows).astype(float)),
+        'kind': rng.choice(np.array(['A', 'B', 'C', 'D'], dtype=object), rows),
+        'flag_x': rng.random(rows) < 0.3,
+        'flag_y': rng.random(rows) < 0.05
+    })
+
+    def masks(frame):
+        return {
+            'x': frame['flag_x'].to_numpy(),
+            'y': frame['flag_y'].to_numpy(),
+            'none': np.zeros(len(frame), dtype=bool)
+        }
+
+    cases = [
+        ('不分组', None, top_k_frame(df, 'score', k)),
+        ('按列分组', 'kind', top_k_by_group(df, 'score', k, 'kind')),
+        ('按掩码分组', masks, top_k_by_group(df, 'score', k, masks(df)))
+    ]
+
+    problems = []
+    for name, group, expected in cases:
+        for chunk_size in chunk_sizes:
+            accumulator = StreamingTopK('score', k, group)
+            for chunk in iter_chunks(df, chunk_size):
+                accumulator.update(chunk)
+            if not frames_equal(accumulator.result(), expected):
+                problems.append(f"StreamingTopK {name} (块大小 {chunk_size}) 与整表结果不一致")
+    return problems
+
+
+def check_store_shortlist(notes, keywords, chunk_sizes, k, min_likes):
+    """分块筛选与读入全部用户后筛选的结果比较，返回不一致的说明列表"""
+    problems = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with UserProfileStore(os.path.join(tmp_dir, 'user_profiles.db')) as store:
+            store.ingest(notes, '2026-01-01', keywords)
+
+            # 评分与筛选过程的调试输出不影响比较
+            with redirect_stdout(io.StringIO()):
+                koc_users, all_users = score_user_stats(
+                    store.load_user_stats(keywords), min_likes,
+                    target_keywords=keywords, sort_result=False
+                )
+                expected_top = top_k_frame(koc_users, 'koc_score', k)
+                expected_shortlist = shortlist_koc_users(koc_users, k, keywords)
+                expected_analysis = analyze_koc_characteristics(koc_users, all_users)
+
+            if len(koc_users) == 0:
+                return ["样例数据中没有 KOC 用户，请调低 --min-likes"]
+            print(f"   用户 {len(all_users)} 个, KOC {len(koc_users)} 个, 候选名单 {len(expected_shortlist)} 行")
+
+            for chunk_size in chunk_sizes:
+                top_koc, shortlist, analysis = stream_koc_shortlist(
+                    store.iter_user_stats(keywords, chunk_size), k, min_likes, target_keywords=keywords
+                )
+                if not frames_equal(top_koc, expected_top):
+                    problems.append(f"Top-{k} KOC 用户不一致 (块大小 {chunk_size})")
+                if not frames_equal(shortlist, expected_shortlist):
+                    problems.append(f"候选名单不一致 (块大小 {chunk_size})")
+                for key, value in expected_analysis.items():
+                    same = (np.isclose(analysis[key], value) if isinstance(value, float)
+                            else analysis[key] == value)
+                    if not same:
+                        problems.append(f"KOC 特征 {key} 不一致 (块大小 {chunk_size})")
+    return problems
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='StreamingTopK 与分块 KOC 候选名单的一致性检查',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python scripts/check_streaming_topk.py
+  python scripts/check_streaming_topk.py --input data/xhs/1_search_contents_2026-01-01.csv --top-k 20
+        """
+    )
+    parser.add_argument(
+        '--input', '-i',
+        type=str,
+        help='写入用户画像的爬取 CSV (默认: 生成样例数据)'
+    )
+    parser.add_argument(
+        '--keywords', '-k',
+        nargs='+',
+        default=DEFAULT_KEYWORDS,
+        help=f"目标关键词 (默认: {' '.join(DEFAULT_KEYWORDS)})"
+    )
+    parser.add_argument(
+        '--top-k',
+        type=int,
+        default=DEFAULT_TOP_K,
+        help=f'每个分组保留的用户数 (默认: {DEFAULT_TOP_K})'
+    )
+    parser.add_argument(
+        '--chunk-sizes',
+        type=int,
+        nargs='+',
+        default=DEFAULT_CHUNK_SIZES,
+        help=f"比较的块大小 (默认: {' '.join(map(str, DEFAULT_CHUNK_SIZES))})"
+    )
+    parser.add_argument(
+        '--min-likes',
+        type=int,
+        default=200,
+        help='KOC 筛选的最小平均点赞数 (默认: 200)'
+    )
+
+    args = parser.parse_args()
+
+    print("🔍 检查 StreamingTopK 与整表 Top-K")
+    problems = check_accumulator(args.chunk_sizes, args.top_k)
+
+    notes = load_notes(args.input) if args.input else make_sample_notes(20000, 5000)
+    print(f"🔍 检查分块 KOC 候选名单: {len(notes)} 条笔记")
+    problems += check_store_shortlist(
+        prepare_notes(notes), args.keywords, args.chunk_sizes, args.top_k, args.min_likes
+    )
+
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+    print("✅ 流式 Top-K 与整表结果一致")
+
+
+if __name__ == "__main__":
+    main()
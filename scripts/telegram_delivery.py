@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Telegram 投递模块
+整个推送过程复用同一个 Bot (同一个 HTTP 连接池)：图片合并为一个相册 (send_media_group)，
+文档合并为文档组，在并发数与每个会话的速率限制下同时上传；
+遇到 RetryAfter (HTTP 429) 时按服务端要求的时间暂停所有请求后重试，网络错误按指数退避重试，
+并记录每个文件的耗时
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+from contextlib import ExitStack
+
+from telegram import Bot, InputMediaDocument, InputMediaPhoto
+from telegram.error import BadRequest, NetworkError, RetryAfter, TelegramError
+from telegram.request import HTTPXRequest
+
+# 复用分析模块的速率限制器
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'analysis'))
+from ai_batch import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CONCURRENCY = 4
+# Telegram 建议同一会话每秒不超过 1 条消息 (相册、文档组算一次请求)
+DEFAULT_RATE_LIMIT = 60
+DEFAULT_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 1.0
+UPLOAD_TIMEOUT_SECONDS = 60
+
+# 一个相册 / 文档组最多 10 个文件
+MEDIA_GROUP_LIMIT = 10
+PHOTO_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def create_bot(token, concurrency=DEFAULT_CONCURRENCY):
+    """创建推送使用的 Bot，连接池大小与并发数一致 (用 async with 初始化与关闭)"""
+    request = HTTPXRequest(
+        connection_pool_size=concurrency + 1,
+        media_write_timeout=UPLOAD_TIMEOUT_SECONDS,
+        read_timeout=UPLOAD_TIMEOUT_SECONDS
+    )
+    return Bot(token=token, request=request)
+
+
+def _retry_after_seconds(error):
+    """RetryAfter.retry_after 在新版本中为 timedelta"""
+    delay = error.retry_after
+    return delay.total_seconds() if hasattr(delay, 'total_seconds') else float(delay)
+
+
+def _chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+class TelegramDelivery:
+    """向一个会话投递消息与文件，results 中记录每个文件的投递结果"""
+
+    def __init__(self, bot, chat_id, concurrency=DEFAULT_CONCURRENCY,
+                 rate_limit=DEFAULT_RATE_LIMIT, retries=DEFAULT_RETRIES):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.retries = retries
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.limiter = RateLimiter(rate_limit)
+        self.results = []
+
+    async def _call(self, send):
+        """
+        在并发数与速率限制下执行一次发送，可重试的错误自动重试
+
+        Args:
+            send: 无参数的协程函数 (每次重试重新调用，以便重新打开文件)
+
+        Returns:
+            (发送结果, 尝试次数)
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.semaphore:
+                    await self.limiter.wait()
+                    return await send(), attempt + 1
+            except RetryAfter as e:
+                if attempt == self.retries:
+                    raise
+                delay = _retry_after_seconds(e)
+                self.limiter.defer(delay)
+                logger.warning(f"触发 Telegram 限流，{delay:.0f} 秒后重试 ({attempt + 1}/{self.retries})")
+            except BadRequest:
+                # BadRequest 继承自 NetworkError，但请求本身有误，重试无效
+                raise
+            except NetworkError as e:
+                # 包括 TimedOut 等网络错误
+                if attempt == self.retries:
+                    raise
+                delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+                logger.warning(f"网络错误 ({e})，{delay:.0f} 秒后重试 ({attempt + 1}/{self.retries})")
+                await asyncio.sleep(delay)
+
+    def _record(self, paths, kind, started, attempts, error=None):
+        seconds = time.perf_counter() - started
+        for path in paths:
+            self.results.append({
+                'path': path,
+                'kind': kind,
+                'seconds': seconds,
+                'attempts': attempts,
+                'ok': error is None,
+                'error': error
+            })
+
+    async def send_message(self, text, parse_mode='HTML'):
+        """发送文本消息"""
+        try:
+            await self._call(lambda: self.bot.send_message(
+                chat_id=self.chat_id, text=text, parse_mode=parse_mode
+            ))
+            logger.info("文本消息发送成功")
+            return True
+        except TelegramError as e:
+            logger.error(f"发送文本消息失败: {e}")
+            return False
+
+    async def _send_single(self, path, caption, kind):
+        """单独发送一个文件"""
+        started = time.perf_counter()
+
+        async def send():
+            with open(path, 'rb') as f:
+                if kind == 'photo':
+                    return await self.bot.send_photo(chat_id=self.chat_id, photo=f, caption=caption)
+                return await self.bot.send_document(
+                    chat_id=self.chat_id, document=f, caption=caption,
+                    filename=os.path.basename(path)
+                )
+
+        try:
+            _, attempts = await self._call(send)
+            self._record([path], kind, started, attempts)
+        except (TelegramError, OSError) as e:
+            logger.error(f"发送文件失败 {path}: {e}")
+            self._record([path], kind, started, self.retries + 1, str(e))
+
+    async def _send_group(self, items, kind):
+        """把 2~10 个同类文件作为一个相册 / 文档组发送；整组失败时逐个重发，定位出错的文件"""
+        started = time.perf_counter()
+        paths = [path for path, _ in items]
+
+        async def send():
+            with ExitStack() as stack:
+                media = []
+                for path, caption in items:
+                    f = stack.enter_context(open(path, 'rb'))
+                    if kind == 'photo':
+                        media.append(InputMediaPhoto(media=f, caption=caption))
+                    else:
+                        media.append(InputMediaDocument(
+                            media=f, caption=caption, filename=os.path.basename(path)
+                        ))
+                return await self.bot.send_media_group(chat_id=self.chat_id, media=media)
+
+        try:
+            _, attempts = await self._call(send)
+            self._record(paths, kind, started, attempts)
+        except (TelegramError, OSError) as e:
+            logger.warning(f"{len(items)} 个文件合并发送失败 ({e})，改为逐个发送")
+            for path, caption in items:
+                await self._send_single(path, caption, kind)
+
+    async def _send_batch(self, items, kind):
+        for chunk in _chunks(items, MEDIA_GROUP_LIMIT):
+            if len(chunk) == 1:
+                await self._send_single(chunk[0][0], chunk[0][1], kind)
+            else:
+                await self._send_group(chunk, kind)
+
+    async def send_files(self, items):
+        """
+        发送一组文件：图片合并为相册，其他文件合并为文档组，两组同时上传
+
+        Args:
+            items: [(文件路径, 说明)]，不存在的文件跳过
+
+        Returns:
+            本次发送的投递结果列表
+        """
+        start = len(self.results)
+        existing = [(path, caption) for path, caption in items if os.path.exists(path)]
+        photos = [item for item in existing if item[0].lower().endswith(PHOTO_EXTENSIONS)]
+        documents = [item for item in existing if not item[0].lower().endswith(PHOTO_EXTENSIONS)]
+
+        await asyncio.gather(
+            self._send_batch(photos, 'photo'),
+            self._send_batch(documents, 'document')
+        )
+        return self.results[start:]
+
+
+def format_delivery_report(results):
+    """每个文件的投递结果与耗时"""
+    lines = []
+    for result in results:
+        name = os.path.basename(result['path'])
+        retry = f", 尝试 {result['attempts']} 次" if result['attempts'] > 1 else ""
+        if result['ok']:
+            lines.append(f"✅ {name} ({result['kind']}): {result['seconds']:.2f}s{retry}")
+        else:
+            lines.append(f"❌ {name} ({result['kind']}): {result['seconds']:.2f}s{retry}, {result['error']}")
+    return lines
@@ -9,12 +9,24 @@ import os
 import sys
 import argparse
 import glob
+import time
 import asyncio
 from datetime import datetime
-from telegram import Bot
-from telegram.error import TelegramError
 import logging
 
+# 使用分析模块的产物清单
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'analysis'))
+from artifact_manifest import ArtifactManifest
+from output_retention import format_size
+from telegram_delivery import (
+    DEFAULT_CONCURRENCY, DEFAULT_RATE_LIMIT, DEFAULT_RETRIES,
+    TelegramDelivery, create_bot, format_delivery_report
+)
+from upload_optimizer import (
+    DEFAULT_PREVIEW_MAX_SIDE, DEFAULT_ZIP_THRESHOLD_KB, LEDGER_FILENAME,
+    DeliveryLedger, prepare_uploads
+)
+
 # 设置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -27,24 +39,59 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# 推送的文件类型 -> (产物清单中的类型, 没有清单时的文件名模式)
+PUSH_ARTIFACTS = {
+    'keywords_csv': ('keywords_csv', 'keywords_analysis_*.csv'),
+    'wordcloud': ('wordcloud', 'wordcloud_*.png'),
+    'competitor_csv': ('competitor_csv', 'competitor_analysis_*.csv'),
+    'koc_csv': ('koc_csv', 'koc_users_*.csv'),
+    'topic_csv': ('topic_csv', 'topic_suggestions_*.csv'),
+    'notion_csv': ('notion_csv', 'notion_content_calendar.csv')
+}
+
+# 各模块的分析报告类型
+REPORT_ARTIFACTS = ['competitor_report', 'koc_report', 'topic_report', 'notion_report']
+REPORT_PATTERN = '*_report_*.txt'
+
+
+def find_latest_files_from_manifest(manifest):
+    """从产物清单取最近一次运行的文件 (该运行缺少的类型取该类型的最新文件)"""
+    files = {}
+    resolved = manifest.resolve(
+        [artifact_type for artifact_type, _ in PUSH_ARTIFACTS.values()] + REPORT_ARTIFACTS
+    )
+    
+    for file_type, (artifact_type, _) in PUSH_ARTIFACTS.items():
+        if resolved[artifact_type]:
+            files[file_type] = resolved[artifact_type]
+            logger.info(f"找到 {file_type}: {os.path.basename(files[file_type])}")
+    
+    reports = [resolved[artifact_type] for artifact_type in REPORT_ARTIFACTS if resolved[artifact_type]]
+    if reports:
+        files['reports'] = sorted(reports, key=os.path.getmtime, reverse=True)
+    
+    return files
+
+
 def find_latest_files(output_dir="output"):
-    """查找最新的分析文件"""
+    """
+    查找最新的分析文件
+    优先读取产物清单 (不扫描目录)，没有清单时按文件名模式查找
+    """
     if not os.path.exists(output_dir):
         logger.warning(f"输出目录不存在: {output_dir}")
         return {}
     
+    manifest = ArtifactManifest.open_existing(output_dir)
+    if manifest is not None:
+        with manifest:
+            return find_latest_files_from_manifest(manifest)
+    
     files = {}
     
     # 查找各类文件
-    patterns = {
-        'keywords_csv': 'keywords_analysis_*.csv',
-        'wordcloud': 'wordcloud_*.png',
-        'competitor_csv': 'competitor_analysis_*.csv',
-        'koc_csv': 'koc_users_*.csv',
-        'topic_csv': 'topic_suggestions_*.csv',
-        'notion_csv': 'notion_content_calendar.csv',
-        'reports': '*_report_*.txt'
-    }
+    patterns = {file_type: pattern for file_type, (_, pattern) in PUSH_ARTIFACTS.items()}
+    patterns['reports'] = REPORT_PATTERN
     
     for file_type, pattern in patterns.items():
         file_pattern = os.path.join(output_dir, pattern)
@@ -98,118 +145,95 @@ def generate_summary_message(files):
     return message
 
 
-async def send_telegram_message(bot_token, chat_id, message):
-    """发送文本消息"""
-    try:
-        bot = Bot(token=bot_token)
-        await bot.send_message(chat_id=chat_id, text=message, parse_mode='HTML')
-        logger.info("文本消息发送成功")
-        return True
-    except TelegramError as e:
-        logger.error(f"发送文本消息失败: {e}")
-        return False
-
-
-async def send_telegram_file(bot_token, chat_id, file_path, caption=""):
-    """发送文件"""
-    try:
-        bot = Bot(token=bot_token)
-        
-        with open(file_path, 'rb') as file:
-            if file_path.lower().endswith('.png'):
-                await bot.send_photo(
-                    chat_id=chat_id,
-                    photo=file,
-                    caption=caption
-                )
-            else:
-                await bot.send_document(
-                    chat_id=chat_id,
-                    document=file,
-                    caption=caption
-                )
-        
-        logger.info(f"文件发送成功: {os.path.basename(file_path)}")
-        return True
-    except TelegramError as e:
-        logger.error(f"发送文件失败 {file_path}: {e}")
-        return False
-    except Exception as e:
-        logger.error(f"发送文件异常 {file_path}: {e}")
-        return False
-
-
-async def push_to_telegram(bot_token, chat_id, output_dir="output"):
+async def push_to_telegram(bot_token, chat_id, output_dir="output", concurrency=DEFAULT_CONCURRENCY,
+                           rate_limit=DEFAULT_RATE_LIMIT, retries=DEFAULT_RETRIES, optimize=True,
+                           force_resend=False, preview_max_side=DEFAULT_PREVIEW_MAX_SIDE,
+                           zip_threshold_kb=DEFAULT_ZIP_THRESHOLD_KB):
     """推送分析结果到 Telegram"""
     logger.info("开始推送分析结果到 Telegram")
+    started = time.perf_counter()
     
     # 查找文件
     files = find_latest_files(output_dir)
     
-    if not files:
-        # 检查是否有真实数据
-        data_dir = "core/media_crawler/data/xhs"
-        if os.path.exists(data_dir):
-            csv_files = glob.glob(os.path.join(data_dir, "*.csv"))
-            if csv_files:
-                error_msg = "❌ 找到数据文件但分析失败，请检查分析脚本"
+    async with create_bot(bot_token, concurrency) as bot:
+        delivery = TelegramDelivery(bot, chat_id, concurrency, rate_limit, retries)
+        
+        if not files:
+            # 检查是否有真实数据
+            data_dir = "core/media_crawler/data/xhs"
+            if os.path.exists(data_dir):
+                csv_files = glob.glob(os.path.join(data_dir, "*.csv"))
+                if csv_files:
+                    error_msg = "❌ 找到数据文件但分析失败，请检查分析脚本"
+                else:
+                    error_msg = "❌ 未获取到真实数据\n\n💡 可能原因:\n• Cookie 已过期\n• 小红书 API 变更\n• 网络连接问题\n• 反爬机制阻止\n\n🔧 建议:\n• 更新 Cookie 配置\n• 检查网络连接\n• 稍后重试\n\n🚫 系统不会生成模拟数据，只使用真实数据进行分析"
             else:
-                error_msg = "❌ 未获取到真实数据\n\n💡 可能原因:\n• Cookie 已过期\n• 小红书 API 变更\n• 网络连接问题\n• 反爬机制阻止\n\n🔧 建议:\n• 更新 Cookie 配置\n• 检查网络连接\n• 稍后重试\n\n🚫 系统不会生成模拟数据，只使用真实数据进行分析"
-        else:
-            error_msg = "❌ 数据目录不存在，爬虫可能未正常运行"
+                error_msg = "❌ 数据目录不存在，爬虫可能未正常运行"
 
-        await send_telegram_message(bot_token, chat_id, error_msg)
-        return False
-    
-    # 发送汇总消息
-    summary_message = generate_summary_message(files)
-    await send_telegram_message(bot_token, chat_id, summary_message)
-    
-    # 发送重要文件
-    priority_files = [
-        ('wordcloud', '☁️ 关键词词云图'),
-        ('notion_csv', '📅 Notion内容日历'),
-        ('koc_csv', '👥 KOC用户列表'),
-        ('topic_csv', '💡 选题建议')
-    ]
-    
-    success_count = 0
-    total_count = 0
-    
-    for file_type, description in priority_files:
-        if file_type in files and files[file_type]:
-            total_count += 1
-            file_path = files[file_type]
-            
-            if os.path.exists(file_path):
-                success = await send_telegram_file(
-                    bot_token, chat_id, file_path, description
-                )
-                if success:
-                    success_count += 1
-                
-                # 避免发送过快
-                await asyncio.sleep(1)
-    
-    # 发送一个主要的分析报告
-    if 'reports' in files and files['reports']:
-        # 选择最新的报告
-        latest_report = files['reports'][0]
-        total_count += 1
+            await delivery.send_message(error_msg)
+            return False
+        
+        # 发送汇总消息
+        summary_message = generate_summary_message(files)
+        await delivery.send_message(summary_message)
+        
+        # 发送重要文件
+        priority_files = [
+            ('wordcloud', '☁️ 关键词词云图'),
+            ('notion_csv', '📅 Notion内容日历'),
+            ('koc_csv', '👥 KOC用户列表'),
+            ('topic_csv', '💡 选题建议')
+        ]
         
-        if os.path.exists(latest_report):
-            success = await send_telegram_file(
-                bot_token, chat_id, latest_report, "📋 详细分析报告"
+        items = [
+            (file_type, files[file_type], description)
+            for file_type, description in priority_files
+            if file_type in files and files[file_type]
+        ]
+        
+        # 发送一个主要的分析报告 (最新的报告)
+        if 'reports' in files and files['reports']:
+            items.append(('report', files['reports'][0], "📋 详细分析报告"))
+        
+        with DeliveryLedger(os.path.join(output_dir, LEDGER_FILENAME)) as ledger:
+            # 图片缩小为预览图、大 CSV 打包为 zip，内容与上次推送相同的文件跳过
+            uploads, skipped = prepare_uploads(
+                items, output_dir, chat_id, None if force_resend else ledger,
+                optimize, preview_max_side, zip_threshold_kb=zip_threshold_kb
             )
-            if success:
-                success_count += 1
-    
-    # 发送完成消息
-    completion_msg = f"✅ 推送完成！成功发送 {success_count}/{total_count} 个文件"
-    await send_telegram_message(bot_token, chat_id, completion_msg)
+            for upload in uploads:
+                if upload['send_path'] != upload['path']:
+                    logger.info(
+                        f"{os.path.basename(upload['path'])}: {format_size(upload['size'])} -> "
+                        f"{os.path.basename(upload['send_path'])} {format_size(upload['send_size'])}"
+                    )
+            for _, path in skipped:
+                logger.info(f"内容与上次推送相同，跳过: {os.path.basename(path)}")
+            
+            # 图片合并为相册、文档合并为文档组，同时上传
+            results = await delivery.send_files([(upload['send_path'], upload['caption']) for upload in uploads])
+            for line in format_delivery_report(results):
+                logger.info(line)
+            
+            by_send_path = {upload['send_path']: upload for upload in uploads}
+            for result in results:
+                if result['ok']:
+                    upload = by_send_path[result['path']]
+                    ledger.record(chat_id, upload['key'], upload['hash'], upload['path'])
+        
+        success_count = sum(1 for result in results if result['ok'])
+        total_count = len(uploads)
+        
+        # 发送完成消息
+        completion_msg = f"✅ 推送完成！成功发送 {success_count}/{total_count} 个文件"
+        if skipped:
+            completion_msg += f"，{len(skipped)} 个文件与上次推送相同已跳过"
+        await delivery.send_message(completion_msg)
     
-    logger.info(f"推送完成，成功率: {success_count}/{total_count}")
-    return success_count > 0
+    logger.info(f"推送完成，成功率: {success_count}/{total_count}，耗时 {time.perf_counter() - started:.2f}s")
+    # 所有文件都与上次相同时也视为推送成功
+    return success_count > 0 or success_count == total_count
 
 
 def main():
@@ -221,6 +245,7 @@ def main():
 使用示例:
   python scripts/telegram_push.py --token YOUR_BOT_TOKEN --chat-id YOUR_CHAT_ID
   python scripts/telegram_push.py --token $BOT_TOKEN --chat-id $CHAT_ID --output-dir results
+  python scripts/telegram_push.py --token $BOT_TOKEN --chat-id $CHAT_ID --force-resend --no-optimize
         """
     )
     
@@ -242,6 +267,46 @@ def main():
         default='output',
         help='分析结果目录 (默认: output)'
     )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f'同时上传的请求数 (默认: {DEFAULT_CONCURRENCY})'
+    )
+    parser.add_argument(
+        '--rate-limit',
+        type=int,
+        default=DEFAULT_RATE_LIMIT,
+        help=f'每分钟最多发起的请求数 (默认: {DEFAULT_RATE_LIMIT})'
+    )
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f'限流或网络错误时的重试次数 (默认: {DEFAULT_RETRIES})'
+    )
+    parser.add_argument(
+        '--no-optimize',
+        action='store_true',
+        help='发送原始文件，不生成预览图或 zip'
+    )
+    parser.add_argument(
+        '--force-resend',
+        action='store_true',
+        help='忽略投递记录，重新发送内容未变化的文件'
+    )
+    parser.add_argument(
+        '--preview-max-side',
+        type=int,
+        default=DEFAULT_PREVIEW_MAX_SIDE,
+        help=f'预览图的最长边像素 (默认: {DEFAULT_PREVIEW_MAX_SIDE})'
+    )
+    parser.add_argument(
+        '--zip-threshold-kb',
+        type=int,
+        default=DEFAULT_ZIP_THRESHOLD_KB,
+        help=f'超过该大小 (KB) 的 CSV 打包为 zip 发送 (默认: {DEFAULT_ZIP_THRESHOLD_KB})'
+    )
     
     args = parser.parse_args()
     
@@ -266,7 +331,10 @@ def main():
     try:
         # 运行异步推送
         success = asyncio.run(push_to_telegram(
-            args.token, args.chat_id, args.output_dir
+            args.token, args.chat_id, args.output_dir,
+            args.concurrency, args.rate_limit, args.retries,
+            optimize=not args.no_optimize, force_resend=args.force_resend,
+            preview_max_side=args.preview_max_side, zip_threshold_kb=args.zip_threshold_kb
         ))
         
         if success:
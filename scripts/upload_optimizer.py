@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推送文件优化模块
+发送前为图片生成适合聊天预览的缩小版 JPEG，把较大的 CSV 打包为 zip (原文件保留在输出目录)；
+投递记录表按 (会话, 文件类型) 保存上次推送文件的内容哈希，内容未变化的文件不再重复发送
+"""
+
+import os
+import sqlite3
+import hashlib
+import zipfile
+from datetime import datetime
+
+
+LEDGER_FILENAME = 'telegram_ledger.db'
+CACHE_SUBDIR = os.path.join('.cache', 'telegram')
+
+# Telegram 聊天中图片按 1280 / 2560 像素显示，超过的部分只增加上传体积
+DEFAULT_PREVIEW_MAX_SIDE = 1600
+DEFAULT_JPEG_QUALITY = 85
+# 超过该大小的 CSV 打包为 zip 发送，较小的保留 CSV 以便在聊天中直接预览
+DEFAULT_ZIP_THRESHOLD_KB = 200
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """文件内容的 sha256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_image_preview(path, cache_dir, digest, max_side=DEFAULT_PREVIEW_MAX_SIDE,
+                       quality=DEFAULT_JPEG_QUALITY):
+    """
+    生成缩小后的 JPEG 预览图 (按内容哈希缓存，同一张图只处理一次)
+    预览图不比原图小时直接发送原图
+    """
+    preview_path = os.path.join(cache_dir, f'{digest[:16]}_{max_side}_{quality}.jpg')
+    if not os.path.exists(preview_path):
+        from PIL import Image
+
+        with Image.open(path) as image:
+            image = image.convert('RGBA')
+            # 透明背景铺白色，与图表的白底一致
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            background.thumbnail((max_side, max_side), Image.LANCZOS)
+            tmp_path = f'{preview_path}.tmp'
+            background.save(tmp_path, 'JPEG', quality=quality, optimize=True, progressive=True)
+            os.replace(tmp_path, preview_path)
+
+    if os.path.getsize(preview_path) >= os.path.getsize(path):
+        return path
+    return preview_path
+
+
+def compress_document(path, cache_dir, digest, threshold_kb=DEFAULT_ZIP_THRESHOLD_KB):
+    """超过阈值的 CSV 打包为 zip (按内容哈希缓存)，其他文件原样发送"""
+    if not path.lower().endswith('.csv') or os.path.getsize(path) <= threshold_kb * 1024:
+        return path
+
+    name = os.path.basename(path)
+    zip_dir = os.path.join(cache_dir, digest[:16])
+    zip_path = os.path.join(zip_dir, f'{os.path.splitext(name)[0]}.zip')
+    if not os.path.exists(zip_path):
+        os.makedirs(zip_dir, exist_ok=True)
+        tmp_path = f'{zip_path}.tmp'
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+            archive.write(path, arcname=name)
+        os.replace(tmp_path, zip_path)
+    return zip_path
+
+
+class DeliveryLedger:
+    """
+    投递记录表 (SQLite)
+    以 (会话 ID, 文件类型) 为主键保存最近一次成功推送的文件与内容哈希
+    """
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS deliveries (
+                chat_id TEXT NOT NULL,
+                file_key TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                path TEXT NOT NULL,
+                sent_at TEXT NOT NULL,
+                PRIMARY KEY (chat_id, file_key)
+            )
+        """)
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def last_hash(self, chat_id, file_key):
+        """上次推送到该会话的同类型文件的内容哈希，没有记录时返回 None"""
+        row = self.conn.execute(
+            "SELECT content_hash FROM deliveries WHERE chat_id = ? AND file_key = ?",
+            (str(chat_id), file_key)
+        ).fetchone()
+        return row[0] if row else None
+
+    def record(self, chat_id, file_key, content_hash, path):
+        """记录一次成功推送"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO deliveries (chat_id, file_key, content_hash, path, sent_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (str(chat_id), file_key, content_hash, os.path.basename(path),
+                 datetime.now().isoformat(timespec='seconds'))
+            )
+
+
+def prune_cache(cache_dir, keep):
+    """删除本次推送没有用到的预览图与 zip (已推送过的内容不会再发送，缓存无需保留)"""
+    keep = {os.path.abspath(path) for path in keep}
+    for root, _, names in os.walk(cache_dir, topdown=False):
+        for name in names:
+            path = os.path.abspath(os.path.join(root, name))
+            if path not in keep:
+                os.remove(path)
+        if root != cache_dir and not os.listdir(root):
+            os.rmdir(root)
+
+
+def prepare_uploads(items, output_dir, chat_id, ledger=None, optimize=True,
+                    max_side=DEFAULT_PREVIEW_MAX_SIDE, quality=DEFAULT_JPEG_QUALITY,
+                    zip_threshold_kb=DEFAULT_ZIP_THRESHOLD_KB):
+    """
+    准备要推送的文件
+
+    Args:
+        items: [(文件类型, 文件路径, 说明)]
+        ledger: 投递记录表，为 None 时不跳过任何文件
+        optimize: 是否生成预览图与 zip
+
+    Returns:
+        (uploads, skipped)
+        uploads: [{'key', 'path', 'send_path', 'caption', 'hash', 'size', 'send_size'}]
+        skipped: 内容与上次推送相同而跳过的 [(文件类型, 文件路径)]
+    """
+    cache_dir = os.path.join(output_dir, CACHE_SUBDIR)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    uploads, skipped = [], []
+    for key, path, caption in items:
+        if not os.path.exists(path):
+            continue
+        digest = file_hash(path)
+        if ledger is not None and ledger.last_hash(chat_id, key) == digest:
+            skipped.append((key, path))
+            continue
+
+        send_path = path
+        if optimize:
+            if path.lower().endswith(IMAGE_EXTENSIONS):
+                send_path = make_image_preview(path, cache_dir, digest, max_side, quality)
+            else:
+                send_path = compress_document(path, cache_dir, digest, zip_threshold_kb)
+
+        uploads.append({
+            'key': key,
+            'path': path,
+            'send_path': send_path,
+            'caption': caption,
+            'hash': digest,
+            'size': os.path.getsize(path),
+            'send_size': os.path.getsize(send_path)
+        })
+
+    prune_cache(cache_dir, [upload['send_path'] for upload in uploads])
+    return uploads, skipped
+